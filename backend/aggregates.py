@@ -0,0 +1,196 @@
+"""
+Materialized analytics aggregates over the Tweet nodes.
+
+The A1/A2/A4/A5 endpoints read small aggregate nodes instead of scanning every tweet:
+
+    (:AggLikes {author, topic, year, likes, tweets})              A1 likes per year
+    (:AggTopicMonth {author, year, month, topic, tweets})         A2 topic trend per month
+    (:AggSentimentTopic {topic, weighted_sum, weight, tweets})    A4 weighted sentiment per topic
+    (:AggSentimentYear {author, year, score_sum, tweets})         A5 average sentiment per year
+
+The bulk loader keeps them up to date incrementally: in the same transaction that writes a
+chunk of tweets, it subtracts the previous contribution of each tweet and adds the new one,
+so re-loading a tweet is a no-op and updated tweets are accounted for.
+
+Usage (from the `backend` folder), e.g. after loading with the cypher script:
+    python aggregates.py --rebuild
+"""
+import argparse
+
+# label -> (key properties, value properties); `tweets` counts the contributing tweets
+AGGREGATES = {
+    "AggLikes": (["author", "topic", "year"], ["likes", "tweets"]),
+    "AggTopicMonth": (["author", "year", "month", "topic"], ["tweets"]),
+    "AggSentimentTopic": (["topic"], ["weighted_sum", "weight", "tweets"]),
+    "AggSentimentYear": (["author", "year"], ["score_sum", "tweets"]),
+}
+
+SENTIMENT_VALUES = {"positive": 1.0, "neutral": 0.0, "negative": -1.0}
+
+# Properties of a tweet needed to compute its contributions
+TWEET_FIELDS = ["author", "topic", "year", "month", "likes", "sentiment", "sentiment_confidence"]
+
+
+def contributions(tweet: dict) -> list:
+    """
+    Return the (label, key, values) contributions of one tweet, mirroring the original A-queries.
+    """
+    author, topic, year, month = tweet.get("author"), tweet.get("topic"), tweet.get("year"), tweet.get("month")
+    sentiment, confidence = tweet.get("sentiment"), tweet.get("sentiment_confidence")
+    result = []
+    if author is not None and topic is not None and year is not None:
+        result.append(("AggLikes", (author, topic, year), {"likes": tweet.get("likes") or 0, "tweets": 1}))
+        if month is not None:
+            result.append(("AggTopicMonth", (author, year, month, topic), {"tweets": 1}))
+    if topic is not None and sentiment in SENTIMENT_VALUES and confidence is not None:
+        result.append(("AggSentimentTopic", (topic,), {
+            "weighted_sum": SENTIMENT_VALUES[sentiment] * confidence, "weight": confidence, "tweets": 1,
+        }))
+    if author is not None and year is not None:
+        if sentiment in ("positive", "negative"):
+            score = SENTIMENT_VALUES[sentiment] * confidence if confidence is not None else None
+        else:
+            score = 0.0
+        if score is not None:
+            result.append(("AggSentimentYear", (author, year), {"score_sum": score, "tweets": 1}))
+    return result
+
+
+def compute_deltas(old_tweets, new_tweets) -> dict:
+    """
+    Aggregate the difference between the new and old contributions of a set of tweets.
+
+    Returns:
+        dict: label -> list of {"key": {...}, "values": {...}} deltas (zero deltas dropped).
+    """
+    sums = {}
+    for sign, tweets in ((-1, old_tweets), (1, new_tweets)):
+        for tweet in tweets:
+            for label, key, values in contributions(tweet):
+                acc = sums.setdefault(label, {}).setdefault(key, dict.fromkeys(values, 0))
+                for name, value in values.items():
+                    acc[name] += sign * value
+
+    deltas = {}
+    for label, groups in sums.items():
+        key_names, _ = AGGREGATES[label]
+        deltas[label] = [
+            {"key": dict(zip(key_names, key)), "values": values}
+            for key, values in groups.items() if any(values.values())
+        ]
+    return deltas
+
+
+def _apply_query(label: str) -> str:
+    key_names, value_names = AGGREGATES[label]
+    key = ", ".join(f"{k}: d.key.{k}" for k in key_names)
+    updates = ", ".join(f"a.{v} = coalesce(a.{v}, 0) + d.values.{v}" for v in value_names)
+    return f"""
+    UNWIND $deltas AS d
+    MERGE (a:{label} {{{key}}})
+    SET {updates}
+    WITH a WHERE a.tweets <= 0
+    DELETE a
+    """
+
+
+def read_tweets(tx, ids) -> list:
+    """
+    Read the aggregate-relevant properties of the existing tweets among `ids`.
+    """
+    fields = ", ".join(f"t.{f} AS {f}" for f in TWEET_FIELDS)
+    return tx.run(f"MATCH (t:Tweet) WHERE t.id IN $ids RETURN {fields}", ids=ids).data()
+
+
+def apply_deltas(tx, deltas: dict):
+    """
+    Apply aggregate deltas inside the caller's transaction.
+    """
+    for label, rows in deltas.items():
+        if rows:
+            tx.run(_apply_query(label), deltas=rows).consume()
+
+
+REBUILD_QUERIES = [
+    """
+    MATCH (t:Tweet) WHERE t.author IS NOT NULL AND t.topic IS NOT NULL AND t.year IS NOT NULL
+    WITH t.author AS author, t.topic AS topic, t.year AS year, sum(coalesce(t.likes, 0)) AS likes, count(t) AS tweets
+    CREATE (:AggLikes {author: author, topic: topic, year: year, likes: likes, tweets: tweets})
+    """,
+    """
+    MATCH (t:Tweet) WHERE t.author IS NOT NULL AND t.topic IS NOT NULL AND t.year IS NOT NULL AND t.month IS NOT NULL
+    WITH t.author AS author, t.year AS year, t.month AS month, t.topic AS topic, count(t) AS tweets
+    CREATE (:AggTopicMonth {author: author, year: year, month: month, topic: topic, tweets: tweets})
+    """,
+    """
+    MATCH (t:Tweet)
+    WHERE t.sentiment IN ['positive', 'neutral', 'negative'] AND t.topic IS NOT NULL AND t.sentiment_confidence IS NOT NULL
+    WITH t.topic AS topic,
+        CASE t.sentiment WHEN 'positive' THEN 1.0 WHEN 'neutral' THEN 0.0 WHEN 'negative' THEN -1.0 END AS s_value,
+        t.sentiment_confidence AS weight
+    WITH topic, sum(s_value * weight) AS weighted_sum, sum(weight) AS weight, count(*) AS tweets
+    CREATE (:AggSentimentTopic {topic: topic, weighted_sum: weighted_sum, weight: weight, tweets: tweets})
+    """,
+    """
+    MATCH (t:Tweet) WHERE t.author IS NOT NULL AND t.year IS NOT NULL
+    WITH t.author AS author, t.year AS year,
+        CASE t.sentiment
+            WHEN 'positive' THEN 1.0 * t.sentiment_confidence
+            WHEN 'negative' THEN -1.0 * t.sentiment_confidence
+            ELSE 0.0
+        END AS score
+    WHERE score IS NOT NULL
+    WITH author, year, sum(score) AS score_sum, count(*) AS tweets
+    CREATE (:AggSentimentYear {author: author, year: year, score_sum: score_sum, tweets: tweets})
+    """,
+]
+
+
+def aggregate_constraints() -> list:
+    """
+    Uniqueness constraints on the key of every aggregate label: MERGE then locks the key, so
+    the parallel chunk writers of the loader never create the same aggregate twice.
+    """
+    return [
+        f"CREATE CONSTRAINT {label.lower()}_key IF NOT EXISTS FOR (a:{label}) "
+        f"REQUIRE ({', '.join('a.' + k for k in keys)}) IS UNIQUE"
+        for label, (keys, _) in AGGREGATES.items()
+    ]
+
+
+def has_duplicate_aggregates(session) -> bool:
+    """
+    Tell whether any aggregate key has several nodes (written concurrently without constraint).
+    """
+    for label, (keys, _) in AGGREGATES.items():
+        key = ", ".join(f"a.{k}" for k in keys)
+        query = f"MATCH (a:{label}) WITH [{key}] AS key, count(*) AS n WHERE n > 1 RETURN count(*) AS duplicates"
+        if session.run(query).single()["duplicates"]:
+            return True
+    return False
+
+
+def rebuild_aggregates(session):
+    """
+    Recompute every aggregate node from the Tweet nodes.
+    """
+    for label in AGGREGATES:
+        session.run(f"MATCH (a:{label}) CALL {{ WITH a DELETE a }} IN TRANSACTIONS OF 10000 ROWS").consume()
+    for query in REBUILD_QUERIES:
+        session.run(query).consume()
+    print("[AGGREGATES] Rebuilt " + ", ".join(AGGREGATES))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Maintain the materialized analytics aggregates.")
+    parser.add_argument("--rebuild", action="store_true", required=True, help="Recompute every aggregate from the tweets")
+    parser.parse_args()
+
+    from neo4j_connector import Neo4jConnector
+
+    connector = Neo4jConnector()
+    try:
+        with connector.driver.session() as session:
+            rebuild_aggregates(session)
+    finally:
+        connector.close()
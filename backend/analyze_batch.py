@@ -0,0 +1,100 @@
+"""
+Attribute many tweets with one /analyze/batch request and evaluate the answers.
+
+Usage (from the `backend` folder, with the backend running):
+    python analyze_batch.py --csv ../utils/dataset.csv --output .cache/batch_results.ndjson
+    python analyze_batch.py --json tweets.json --limit 100
+
+A CSV is sent as JSON items whose id is the CSV row number; when it has an `Author` column
+the accuracy of the predicted authors is printed at the end (tweets of other authors are
+expected to be predicted as "neither"). Note that tweets of the dataset are also in the
+retrieval index, so their context contains the tweet itself. `--raw` uploads the CSV file
+as is (text/csv) instead.
+"""
+import argparse
+import csv
+import json
+import os
+import time
+
+import httpx
+
+KNOWN_AUTHORS = {"obama": "Obama", "musk": "Musk"}
+
+
+def load_items(args) -> tuple:
+    """
+    Return the items to send and the expected author of each item id (if known).
+    """
+    if args.json:
+        with open(args.json, encoding="utf-8") as f:
+            items = json.load(f)
+        items = [item if isinstance(item, dict) else {"id": i, "tweet": item} for i, item in enumerate(items)]
+        expected = {item.get("id", i): item["author"] for i, item in enumerate(items) if item.get("author")}
+    else:
+        items, expected = [], {}
+        with open(args.csv, newline="", encoding="utf-8") as f:
+            for row_number, row in enumerate(csv.DictReader(f), start=1):
+                if not row.get("Text"):
+                    continue
+                items.append({"id": row_number, "tweet": row["Text"]})
+                if row.get("Author"):
+                    expected[row_number] = KNOWN_AUTHORS.get(row["Author"].lower(), "neither")
+    return items[:args.limit] if args.limit else items, expected
+
+
+def run(args):
+    if args.raw:
+        with open(args.csv, "rb") as f:
+            content, headers, expected = f.read(), {"Content-Type": "text/csv"}, {}
+        total = None
+    else:
+        items, expected = load_items(args)
+        content, headers = json.dumps(items).encode("utf-8"), {"Content-Type": "application/json"}
+        total = len(items)
+
+    output = open(args.output, "w", encoding="utf-8") if args.output else None
+    results, summary = [], None
+    start = time.perf_counter()
+    try:
+        with httpx.Client(base_url=args.url, timeout=httpx.Timeout(None, connect=10)) as client:
+            with client.stream("POST", "/analyze/batch", content=content, headers=headers) as response:
+                if response.status_code != 200:
+                    response.read()
+                    raise SystemExit(f"HTTP {response.status_code}: {response.text}")
+                for line in response.iter_lines():
+                    if not line:
+                        continue
+                    result = json.loads(line)
+                    if result.get("done"):
+                        summary = result
+                        continue
+                    results.append(result)
+                    if output:
+                        output.write(line + "\n")
+                    if len(results) % args.progress_every == 0:
+                        rate = len(results) / (time.perf_counter() - start)
+                        print(f"[BATCH] {len(results)}/{total or '?'} tweets ({rate:.1f}/s)")
+    finally:
+        if output:
+            output.close()
+
+    report = {"results": len(results), "elapsed_s": round(time.perf_counter() - start, 2), "server": summary}
+    scored = [r for r in results if r["id"] in expected and r["predicted_author"] != "ERROR"]
+    if scored:
+        report["scored"] = len(scored)
+        report["accuracy"] = round(sum(r["predicted_author"] == expected[r["id"]] for r in scored) / len(scored), 4)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Attribute tweets in bulk with /analyze/batch.")
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("--csv", default=os.path.join("..", "utils", "dataset.csv"), help="Dataset CSV (Text and optional Author columns)")
+    source.add_argument("--json", help="JSON array of tweets or of {id, tweet, author} objects")
+    parser.add_argument("--url", default=os.getenv("BACKEND_URL", "http://localhost:8000"))
+    parser.add_argument("--limit", type=int, help="Only send the first N tweets")
+    parser.add_argument("--raw", action="store_true", help="Upload the CSV file as text/csv (no --limit, no accuracy)")
+    parser.add_argument("--output", help="Write the NDJSON results to this file")
+    parser.add_argument("--progress-every", type=int, default=100)
+    run(parser.parse_args())
@@ -0,0 +1,59 @@
+"""
+Build (or refresh) the corpus-wide HNSW index used by /analyze and measure its recall.
+
+Usage (from the `backend` folder):
+    python build_global_index.py
+    python build_global_index.py --recall --ef-search 16 32 64 128 --output .cache/global_index/recall.json
+
+The corpus is read from Neo4j, or from MEMORY_DATASET when CONNECTOR_BACKEND=memory.
+Recall@k compares the HNSW results with an exact search over the same vectors, both
+without filter and filtered on two topics (the query topic plus another one), as /analyze does.
+"""
+import argparse
+import json
+import os
+import time
+
+from services.embedding_store import EmbeddingStore
+from services.global_index import GlobalVectorIndex
+from services.tweet_analysis_generation import encode_queries, ENCODER_ID
+
+
+def open_connector():
+    if os.getenv("CONNECTOR_BACKEND", "neo4j") == "memory":
+        from memory_connector import InMemoryConnector
+        return InMemoryConnector(os.getenv("MEMORY_DATASET", os.path.join("..", "utils", "dataset.csv")))
+    from neo4j_connector import Neo4jConnector
+    return Neo4jConnector()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the global HNSW index and report its recall.")
+    parser.add_argument("--recall", action="store_true", help="Measure recall@k against exact search")
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--queries", type=int, default=200, help="Sampled query tweets for the recall")
+    parser.add_argument("--ef-search", type=int, nargs="+", help="HNSW beam widths to evaluate (default: the configured one)")
+    parser.add_argument("--output", help="Write the report to this JSON file")
+    args = parser.parse_args()
+
+    connector = open_connector()
+    index = GlobalVectorIndex(encode_queries, store=EmbeddingStore(), check_interval=0, encoder_id=ENCODER_ID)
+    try:
+        start = time.perf_counter()
+        index.refresh(connector)
+        report = {"build_s": round(time.perf_counter() - start, 2), "index": index.stats()}
+    finally:
+        connector.close()
+
+    if args.recall:
+        report["recall"] = [
+            index.recall_at_k(args.queries, args.k, ef_search=ef, filter_topics=filter_topics)
+            for ef in (args.ef_search or [None])
+            for filter_topics in (0, 2)
+        ]
+
+    print(json.dumps(report, indent=2))
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
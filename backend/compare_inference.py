@@ -0,0 +1,136 @@
+"""
+Accuracy-vs-speed comparison of the int8 ONNX models with the current (PyTorch) ones.
+
+Runs both zero-shot classifiers and both encoders on tweets of a dataset CSV and reports:
+    - classifier: top-1 agreement ONNX vs PyTorch, accuracy of each against the dataset
+      topic (rows whose topic is a candidate label), mean score difference, tweets/s;
+    - encoder: cosine similarity between the two embeddings of each tweet, overlap of the
+      10 nearest neighbours within the sample, tweets/s;
+    - size of the fp32 and int8 model files.
+
+Usage (from the `backend` folder, after `python export_onnx.py`):
+    python compare_inference.py --csv ../utils/dataset.csv --limit 500 --output .cache/onnx/comparison.json
+"""
+import argparse
+import csv
+import json
+import os
+import random
+import time
+
+import numpy as np
+
+from load_dataset import parse_entities
+from services.onnx_backend import OnnxSentenceEncoder, OnnxZeroShotClassifier, onnx_model_dir, QUANTIZED_FILE
+from services.topic_extraction import ZERO_SHOT_MODEL, build_classifier_input, candidate_labels
+from services.tweet_analysis_generation import ENCODER_MODEL
+
+
+def load_sample(path: str, limit: int, seed: int) -> list:
+    with open(path, newline="", encoding="utf-8") as f:
+        rows = [row for row in csv.DictReader(f) if row.get("Text")]
+    random.Random(seed).shuffle(rows)
+    return rows[:limit]
+
+
+def timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def compare_classifiers(rows: list, batch_size: int) -> dict:
+    from transformers import pipeline
+
+    # Same input as the backend and the dataset labels: text plus filtered entities
+    inputs = [build_classifier_input(row["Text"], parse_entities(row.get("entities"))) for row in rows]
+    reference = pipeline("zero-shot-classification", model=ZERO_SHOT_MODEL)
+    quantized = OnnxZeroShotClassifier(onnx_model_dir("zero_shot"))
+    torch_out, torch_s = timed(reference, inputs, candidate_labels, multi_label=False, batch_size=batch_size)
+    onnx_out, onnx_s = timed(quantized, inputs, candidate_labels, multi_label=False, batch_size=batch_size)
+
+    torch_top = [r["labels"][0] for r in torch_out]
+    onnx_top = [r["labels"][0] for r in onnx_out]
+    labelled = [i for i, row in enumerate(rows) if row.get("topic") in candidate_labels]
+    score_diff = [
+        abs(dict(zip(a["labels"], a["scores"]))[label] - dict(zip(b["labels"], b["scores"]))[label])
+        for a, b in zip(torch_out, onnx_out) for label in candidate_labels
+    ]
+    return {
+        "tweets": len(rows),
+        "top1_agreement": float(np.mean([a == b for a, b in zip(torch_top, onnx_top)])),
+        "labelled_tweets": len(labelled),
+        "torch_accuracy": float(np.mean([torch_top[i] == rows[i]["topic"] for i in labelled])) if labelled else None,
+        "onnx_accuracy": float(np.mean([onnx_top[i] == rows[i]["topic"] for i in labelled])) if labelled else None,
+        "mean_abs_score_diff": float(np.mean(score_diff)),
+        "torch_tweets_per_s": len(rows) / torch_s,
+        "onnx_tweets_per_s": len(rows) / onnx_s,
+        "speedup": torch_s / onnx_s,
+    }
+
+
+def compare_encoders(rows: list, batch_size: int, k: int = 10) -> dict:
+    from sentence_transformers import SentenceTransformer
+
+    texts = [row["Text"] for row in rows]
+    reference = SentenceTransformer(ENCODER_MODEL)
+    quantized = OnnxSentenceEncoder(onnx_model_dir("encoder"))
+    torch_vectors, torch_s = timed(reference.encode, texts, convert_to_numpy=True, batch_size=batch_size, normalize_embeddings=True)
+    onnx_vectors, onnx_s = timed(quantized.encode, texts, batch_size=batch_size)
+
+    cosine = np.sum(torch_vectors * onnx_vectors, axis=1)
+    k = min(k, len(texts) - 1)
+
+    def neighbours(vectors):
+        similarities = vectors @ vectors.T
+        np.fill_diagonal(similarities, -np.inf)
+        return np.argsort(-similarities, axis=1)[:, :k]
+
+    overlap = [len(set(a) & set(b)) / k for a, b in zip(neighbours(torch_vectors), neighbours(onnx_vectors))] if k > 0 else []
+    return {
+        "tweets": len(texts),
+        "mean_cosine": float(cosine.mean()),
+        "min_cosine": float(cosine.min()),
+        f"neighbour_overlap_at_{k}": float(np.mean(overlap)) if overlap else None,
+        "torch_tweets_per_s": len(texts) / torch_s,
+        "onnx_tweets_per_s": len(texts) / onnx_s,
+        "speedup": torch_s / onnx_s,
+    }
+
+
+def model_sizes() -> dict:
+    sizes = {}
+    for name in ("zero_shot", "encoder"):
+        model_dir = onnx_model_dir(name)
+        sizes[name] = {
+            f: round(os.path.getsize(os.path.join(model_dir, f)) / 1e6, 1)
+            for f in ("model.onnx", QUANTIZED_FILE) if os.path.exists(os.path.join(model_dir, f))
+        }
+    return sizes
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare the int8 ONNX models with the PyTorch ones.")
+    parser.add_argument("--csv", default=os.path.join("..", "utils", "dataset.csv"))
+    parser.add_argument("--limit", type=int, default=500, help="Tweets sampled from the CSV")
+    parser.add_argument("--batch-size", type=int, default=16)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--only", choices=["zero_shot", "encoder"])
+    parser.add_argument("--output", help="Write the report to this JSON file")
+    args = parser.parse_args()
+
+    rows = load_sample(args.csv, args.limit, args.seed)
+    report = {
+        "onnx_intra_op_threads": int(os.getenv("ONNX_INTRA_OP_THREADS", "0")),
+        "model_sizes_mb": model_sizes(),
+    }
+    if args.only != "encoder":
+        report["zero_shot"] = compare_classifiers(rows, args.batch_size)
+    if args.only != "zero_shot":
+        report["encoder"] = compare_encoders(rows, args.batch_size)
+
+    print(json.dumps(report, indent=2))
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
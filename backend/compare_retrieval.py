@@ -0,0 +1,139 @@
+"""
+Compare the entity-graph prefiltered retrieval (RETRIEVAL_INDEX=graph) with the current
+topic-filtered search of the global index: latency, search set size and context quality.
+
+Usage (from the `backend` folder, after `python migrate.py` created the entity_name index):
+    python compare_retrieval.py --limit 500
+    python compare_retrieval.py --limit 1000 --graph-limit 100 300 1000 --output .cache/retrieval_compare.json
+
+Every sampled tweet of the corpus (Neo4j, or MEMORY_DATASET when CONNECTOR_BACKEND=memory) is
+used as a query with leave-one-out retrieval (tweets with the same text are excluded), filtered
+on its dataset topic. The query entities come from the NER model, run per tweet and timed:
+the graph latencies include this NER pass (`ner_ms_mean`; /analyze usually gets the entities
+from the result cache filled by its topic classification, `search_ms_mean` excludes it). Context
+quality is the share of retrieved tweets written by the query author, the accuracy of the
+neighbour vote and the mean embedding distance; `overlap` is the share of the topic-path
+neighbours also returned by the graph path.
+"""
+import argparse
+import json
+import os
+import random
+import time
+
+from build_global_index import open_connector
+from evaluate_author_vote import percentile
+from services.author_vote import KNNAuthorClassifier
+from services.embedding_store import EmbeddingStore
+from services.global_index import GlobalVectorIndex
+from services.graph_retrieval import graph_search, entity_names
+from services.topic_extraction import extract_entities_batch
+from services.tweet_analysis_generation import encode_queries, ENCODER_ID
+
+
+def summarize(tweets: list, contexts: list, latencies: list, classifier: KNNAuthorClassifier) -> dict:
+    """
+    Latency and context quality of one retrieval path.
+    """
+    rows = [row for context in contexts for row in context]
+    votes = [classifier.predict(context)["predicted_author"] if context else None for context in contexts]
+    return {
+        "ms_mean": round(sum(latencies) / max(1, len(latencies)), 3),
+        "ms_p50": round(percentile(latencies, 50), 3) if latencies else None,
+        "ms_p95": round(percentile(latencies, 95), 3) if latencies else None,
+        "empty_contexts": sum(not context for context in contexts),
+        "author_agreement": round(sum(row["author"] == t["author"] for t, context in zip(tweets, contexts) for row in context) / max(1, len(rows)), 4),
+        "vote_accuracy": round(sum(v == t["author"] for v, t in zip(votes, tweets)) / max(1, len(tweets)), 4),
+        "mean_distance": round(sum(row["distance"] for row in rows) / max(1, len(rows)), 4),
+    }
+
+
+def run_topic_path(index: GlobalVectorIndex, tweets: list, vectors, k: int) -> tuple:
+    contexts, latencies, scanned = [], [], []
+    for tweet, vector in zip(tweets, vectors):
+        started = time.perf_counter()
+        rows = index.search(vector, k + 5, topics=[tweet["topic"]])
+        latencies.append(1000 * (time.perf_counter() - started))
+        contexts.append([row for row in rows if row["text"] != tweet["text"]][:k])
+        scanned.append(index.filter_size(topics=[tweet["topic"]]))
+    return contexts, latencies, scanned
+
+
+def extract_entities_timed(tweets: list) -> tuple:
+    """
+    Entities of every tweet, one uncached NER call per tweet as in /analyze, and the ms of each call.
+    """
+    entities, latencies = [], []
+    for tweet in tweets:
+        started = time.perf_counter()
+        entities.append(extract_entities_batch([tweet["text"]])[0])
+        latencies.append(1000 * (time.perf_counter() - started))
+    return entities, latencies
+
+
+def run_graph_path(index: GlobalVectorIndex, connector, tweets: list, vectors, entities: list, ner_ms: list, k: int, limit: int, merge: bool) -> tuple:
+    contexts, latencies, search_ms, candidates = [], [], [], []
+    for tweet, vector, ents, ner in zip(tweets, vectors, entities, ner_ms):
+        started = time.perf_counter()
+        rows, n = graph_search(index, connector, vector, ents, [tweet["topic"]], k + 5, limit=limit, merge=merge)
+        search_ms.append(1000 * (time.perf_counter() - started))
+        latencies.append(ner + search_ms[-1])
+        contexts.append([row for row in rows if row["text"] != tweet["text"]][:k])
+        candidates.append(n)
+    return contexts, latencies, search_ms, candidates
+
+
+def overlap(reference: list, contexts: list) -> float:
+    shared = sum(len({r["id"] for r in a} & {r["id"] for r in b}) for a, b in zip(reference, contexts))
+    return round(shared / max(1, sum(len(a) for a in reference)), 4)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare graph-prefiltered and topic-filtered retrieval.")
+    parser.add_argument("--k", type=int, default=10, help="Neighbours per tweet (as /analyze)")
+    parser.add_argument("--limit", type=int, default=500, help="Random sample of N query tweets")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--graph-limit", type=int, nargs="+", default=[300], help="Graph candidate limits to evaluate")
+    parser.add_argument("--output", help="Write the report to this JSON file")
+    args = parser.parse_args()
+
+    connector = open_connector()
+    index = GlobalVectorIndex(encode_queries, store=EmbeddingStore(), check_interval=0, encoder_id=ENCODER_ID)
+    classifier = KNNAuthorClassifier()
+    try:
+        index.refresh(connector)
+        tweets = [t for t in connector.LLM_get_corpus_tweets() if t.get("author") and t.get("topic")]
+        random.Random(args.seed).shuffle(tweets)
+        tweets = tweets[:args.limit]
+        vectors = encode_queries([t["text"] for t in tweets])
+        entities, ner_ms = extract_entities_timed(tweets)
+
+        topic_contexts, topic_ms, scanned = run_topic_path(index, tweets, vectors, args.k)
+        report = {
+            "k": args.k,
+            "queries": len(tweets),
+            "queries_without_entities": sum(not entity_names(ents) for ents in entities),
+            "ner_ms_mean": round(sum(ner_ms) / max(1, len(ner_ms)), 3),
+            "topic": dict(summarize(tweets, topic_contexts, topic_ms, classifier), search_set_mean=round(sum(scanned) / max(1, len(scanned)), 1)),
+            "graph": [],
+        }
+        for limit in args.graph_limit:
+            for merge in (True, False):
+                contexts, ms, search_ms, candidates = run_graph_path(index, connector, tweets, vectors, entities, ner_ms, args.k, limit, merge)
+                report["graph"].append(dict(
+                    summarize(tweets, contexts, ms, classifier),
+                    limit=limit,
+                    merge=merge,
+                    search_ms_mean=round(sum(search_ms) / max(1, len(search_ms)), 3),
+                    candidates_mean=round(sum(candidates) / max(1, len(candidates)), 1),
+                    candidates_p95=percentile(candidates, 95),
+                    overlap=overlap(topic_contexts, contexts),
+                ))
+    finally:
+        connector.close()
+
+    print(json.dumps(report, indent=2))
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
@@ -0,0 +1,180 @@
+"""
+Offline evaluation of the neighbour-vote author classifier (ATTRIBUTION_MODE=vote) against
+the LLM attribution of /analyze.
+
+Usage (from the `backend` folder):
+    python evaluate_author_vote.py --write-calibration
+    python evaluate_author_vote.py --limit 2000 --llm-sample 100 --output .cache/author_vote_eval.json
+
+Every sampled tweet of the corpus (Neo4j, or MEMORY_DATASET when CONNECTOR_BACKEND=memory) is
+used as a query with leave-one-out retrieval: its k nearest neighbours in the global index,
+filtered on its dataset topic, excluding tweets with the same text. Half of the sample fits
+the vote temperature and smoothing (minimum log loss), the other half reports accuracy, log
+loss, expected calibration error and the accuracy/coverage of the margin thresholds.
+`--llm-sample N` also runs the current LLM prompt on N test tweets (LM Studio must be running)
+and compares its accuracy and latency with the vote and with the vote + LLM fallback.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import time
+from contextlib import aclosing
+
+from build_global_index import open_connector
+from services.author_vote import KNNAuthorClassifier, log_loss, expected_calibration_error
+from services.embedding_store import EmbeddingStore
+from services.global_index import GlobalVectorIndex
+from services.tweet_analysis_generation import encode_queries, ENCODER_ID, build_attribution_prompt, predict_author, stream_llm_response, close_llm_client
+
+TEMPERATURES = [0.05, 0.1, 0.2, 0.3, 0.5, 0.75, 1.0, 2.0]
+ALPHAS = [0.01, 0.1, 0.5, 1.0, 2.0]
+MARGINS = [0.1, 0.3, 0.5, 0.7, 0.9]
+
+
+def percentile(values: list, q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q / 100 * len(ordered)))] if ordered else None
+
+
+def retrieve_neighbours(index: GlobalVectorIndex, tweets: list, k: int, batch_size: int = 256) -> tuple:
+    """
+    Leave-one-out neighbours of every tweet, and the mean search time per tweet in ms.
+    """
+    neighbours, search_s = [], 0.0
+    for start in range(0, len(tweets), batch_size):
+        batch = tweets[start:start + batch_size]
+        vectors = encode_queries([t["text"] for t in batch])
+        began = time.perf_counter()
+        found = index.search_batch(vectors, k + 5, topics=[[t["topic"]] if t.get("topic") else None for t in batch])
+        search_s += time.perf_counter() - began
+        neighbours += [[row for row in rows if row["text"] != t["text"]][:k] for t, rows in zip(batch, found)]
+    return neighbours, 1000 * search_s / max(1, len(tweets))
+
+
+def fit_calibration(classifier: KNNAuthorClassifier, neighbours: list, truths: list) -> dict:
+    grid = [
+        (log_loss([classifier.probabilities(rows, temperature, alpha) for rows in neighbours], truths), temperature, alpha)
+        for temperature in TEMPERATURES for alpha in ALPHAS
+    ]
+    loss, temperature, alpha = min(grid)
+    classifier.set_calibration(temperature, alpha, sorted(set(truths)))
+    return {"temperature": temperature, "alpha": alpha, "fit_log_loss": round(loss, 4)}
+
+
+def evaluate_votes(classifier: KNNAuthorClassifier, neighbours: list, truths: list) -> tuple:
+    started = time.perf_counter()
+    votes = [classifier.predict(rows) for rows in neighbours]
+    vote_ms = 1000 * (time.perf_counter() - started) / max(1, len(votes))
+    correct = [v["predicted_author"] == t for v, t in zip(votes, truths)]
+    thresholds = []
+    for margin in MARGINS:
+        kept = [c for v, c in zip(votes, correct) if v["margin"] >= margin]
+        thresholds.append({
+            "margin": margin,
+            "coverage": round(len(kept) / max(1, len(votes)), 4),
+            "accuracy": round(sum(kept) / len(kept), 4) if kept else None,
+        })
+    report = {
+        "tweets": len(votes),
+        "accuracy": round(sum(correct) / max(1, len(correct)), 4),
+        "log_loss": round(log_loss([v["probabilities"] for v in votes], truths), 4),
+        "ece": round(expected_calibration_error([v["probability"] for v in votes], correct), 4),
+        "vote_ms_per_tweet": round(vote_ms, 4),
+        "margins": thresholds,
+    }
+    return report, votes
+
+
+async def llm_attributions(tweets: list, neighbours: list, concurrency: int) -> list:
+    """
+    Run the /analyze LLM prompt on each tweet; returns (predicted author, seconds) pairs.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def attribute(tweet, rows):
+        async with semaphore:
+            started, chunks = time.perf_counter(), []
+            async with aclosing(stream_llm_response(build_attribution_prompt(tweet["text"], rows))) as stream:
+                async for text_chunk in stream:
+                    if "ERROR" in text_chunk:
+                        return "ERROR", time.perf_counter() - started
+                    chunks.append(text_chunk)
+            return predict_author("".join(chunks)), time.perf_counter() - started
+
+    try:
+        return await asyncio.gather(*(attribute(t, rows) for t, rows in zip(tweets, neighbours)))
+    finally:
+        await close_llm_client()
+
+
+def compare_with_llm(tweets: list, neighbours: list, votes: list, concurrency: int) -> dict:
+    answers = asyncio.run(llm_attributions(tweets, neighbours, concurrency))
+    scored = [i for i, (author, _) in enumerate(answers) if author != "ERROR"]
+    truths = [tweets[i]["author"] for i in scored]
+    llm = [answers[i][0] for i in scored]
+    vote = [votes[i]["predicted_author"] for i in scored]
+    hybrid = [votes[i]["predicted_author"] if votes[i]["confident"] else answers[i][0] for i in scored]
+    latencies = [1000 * answers[i][1] for i in scored]
+
+    def accuracy(predictions):
+        return round(sum(p == t for p, t in zip(predictions, truths)) / len(truths), 4) if truths else None
+
+    return {
+        "tweets": len(tweets),
+        "llm_errors": len(tweets) - len(scored),
+        "llm_accuracy": accuracy(llm),
+        "vote_accuracy": accuracy(vote),
+        "hybrid_accuracy": accuracy(hybrid),
+        "hybrid_llm_calls": round(sum(not votes[i]["confident"] for i in scored) / max(1, len(scored)), 4),
+        "llm_ms_p50": round(percentile(latencies, 50), 1) if latencies else None,
+        "llm_ms_p95": round(percentile(latencies, 95), 1) if latencies else None,
+        "agreement": round(sum(a == b for a, b in zip(llm, vote)) / len(llm), 4) if llm else None,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Evaluate the neighbour-vote author classifier.")
+    parser.add_argument("--k", type=int, default=10, help="Neighbours per tweet (as /analyze)")
+    parser.add_argument("--limit", type=int, help="Evaluate on a random sample of N tweets")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--llm-sample", type=int, default=0, help="Also run the LLM path on N test tweets")
+    parser.add_argument("--llm-concurrency", type=int, default=4)
+    parser.add_argument("--write-calibration", action="store_true", help="Save the fitted calibration for the backend")
+    parser.add_argument("--output", help="Write the report to this JSON file")
+    args = parser.parse_args()
+
+    connector = open_connector()
+    index = GlobalVectorIndex(encode_queries, store=EmbeddingStore(), check_interval=0, encoder_id=ENCODER_ID)
+    try:
+        index.refresh(connector)
+        tweets = [t for t in connector.LLM_get_corpus_tweets() if t.get("author")]
+    finally:
+        connector.close()
+
+    random.Random(args.seed).shuffle(tweets)
+    tweets = tweets[:args.limit] if args.limit else tweets
+    neighbours, search_ms = retrieve_neighbours(index, tweets, args.k)
+    truths = [t["author"] for t in tweets]
+    half = len(tweets) // 2
+
+    classifier = KNNAuthorClassifier()
+    report = {"k": args.k, "search_ms_per_tweet": round(search_ms, 3)}
+    report["calibration"] = fit_calibration(classifier, neighbours[:half], truths[:half])
+    report["vote"], votes = evaluate_votes(classifier, neighbours[half:], truths[half:])
+    report["vote"]["margin_threshold"] = classifier.margin
+    if args.llm_sample:
+        sample = slice(half, half + args.llm_sample)
+        report["llm"] = compare_with_llm(tweets[sample], neighbours[sample], votes[:args.llm_sample], args.llm_concurrency)
+
+    print(json.dumps(report, indent=2))
+    if args.write_calibration:
+        os.makedirs(os.path.dirname(os.path.abspath(classifier.calibration_path)), exist_ok=True)
+        with open(classifier.calibration_path, "w", encoding="utf-8") as f:
+            json.dump(classifier.calibration(), f, indent=2)
+        print(f"[VOTE] Calibration written to {classifier.calibration_path}")
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
@@ -0,0 +1,124 @@
+"""
+Precomputed tweet-generation exemplars per (author, topic).
+
+/generate_tweet puts example tweets of the author on the topic in its prompt. Instead of
+sampling them from every matching tweet at request time, a small pool of diverse,
+high-engagement tweets is kept per (author, topic):
+
+    (:ExemplarPool {author, topic, texts, built_at})
+
+so a generation request costs one index seek on a single node, whatever the size of the
+author's history. Pools are picked year by year in turn (most liked and retweeted first),
+skipping near-duplicate and very short tweets.
+
+The bulk loader rebuilds the pools after a load; after loading with the cypher script, run
+(from the `backend` folder):
+    python exemplars.py --rebuild
+    python exemplars.py --rebuild --pool-size 60
+"""
+import argparse
+import os
+import re
+from collections import deque
+
+# Tweets kept per (author, topic); the prompt uses GENERATION_CONTEXT_SIZE of them
+EXEMPLAR_POOL_SIZE = int(os.getenv("EXEMPLAR_POOL_SIZE", "40"))
+# Shorter tweets (once links and mentions are removed) carry too little style
+MIN_EXEMPLAR_CHARS = 20
+
+
+def engagement(tweet: dict) -> int:
+    return (tweet.get("likes") or 0) + (tweet.get("retweets") or 0)
+
+
+def _normalized(text: str) -> str:
+    return " ".join(re.sub(r"https?://\S+|@\w+|[^\w\s]", " ", text.lower()).split())
+
+
+def round_robin(strata: list, n: int) -> list:
+    """
+    Take the first item of every stratum, then the second, ... until `n` items.
+    """
+    queues = [deque(items) for items in strata if items]
+    picked = []
+    while queues and len(picked) < n:
+        for queue in list(queues):
+            picked.append(queue.popleft())
+            if not queue:
+                queues.remove(queue)
+            if len(picked) >= n:
+                break
+    return picked
+
+
+def select_exemplars(tweets: list, pool_size: int = None) -> list:
+    """
+    Pick a diverse, high-engagement pool among the tweets of one (author, topic).
+
+    Args:
+        tweets (list): Dictionaries with text, year, likes and retweets.
+        pool_size (int): Maximum number of texts (default EXEMPLAR_POOL_SIZE).
+
+    Returns:
+        list: The texts of the pool, the most engaging years first.
+    """
+    pool_size = pool_size or EXEMPLAR_POOL_SIZE
+    by_year, seen = {}, set()
+    for tweet in sorted(tweets, key=engagement, reverse=True):
+        key = _normalized(tweet["text"])
+        if len(key) < MIN_EXEMPLAR_CHARS or key in seen:
+            continue
+        seen.add(key)
+        by_year.setdefault(tweet.get("year"), []).append(tweet["text"])
+    return round_robin(list(by_year.values()), pool_size)
+
+
+# Best candidates per (author, topic, year): enough to fill a pool from a single year
+CANDIDATES_QUERY = """
+MATCH (t:Tweet)
+WHERE t.author IS NOT NULL AND t.topic IS NOT NULL AND t.text IS NOT NULL
+WITH t ORDER BY coalesce(t.likes, 0) + coalesce(t.retweets, 0) DESC
+WITH t.author AS author, t.topic AS topic, t.year AS year,
+     collect({text: t.text, likes: t.likes, retweets: t.retweets})[..$per_year] AS tweets
+RETURN author, topic, year, tweets
+"""
+
+WRITE_QUERY = """
+UNWIND $pools AS pool
+CREATE (:ExemplarPool {author: pool.author, topic: pool.topic, texts: pool.texts, built_at: datetime()})
+"""
+
+
+def rebuild_exemplar_pools(session, pool_size: int = None):
+    """
+    Recompute the exemplar pool of every (author, topic) from the Tweet nodes.
+    """
+    pool_size = pool_size or EXEMPLAR_POOL_SIZE
+    groups = {}
+    # Over-fetch per year, duplicates and short tweets are dropped by `select_exemplars`
+    for record in session.run(CANDIDATES_QUERY, per_year=2 * pool_size):
+        tweets = [dict(tweet, year=record["year"]) for tweet in record["tweets"]]
+        groups.setdefault((record["author"], record["topic"]), []).extend(tweets)
+    pools = [
+        {"author": author, "topic": topic, "texts": select_exemplars(tweets, pool_size)}
+        for (author, topic), tweets in groups.items()
+    ]
+    session.run("MATCH (p:ExemplarPool) DELETE p").consume()
+    session.run(WRITE_QUERY, pools=pools).consume()
+    print(f"[EXEMPLARS] Rebuilt {len(pools)} exemplar pools of up to {pool_size} tweets")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Maintain the tweet-generation exemplar pools.")
+    parser.add_argument("--rebuild", action="store_true", required=True, help="Recompute every pool from the tweets")
+    parser.add_argument("--pool-size", type=int, help="Tweets per (author, topic) (env EXEMPLAR_POOL_SIZE, default 40)")
+    args = parser.parse_args()
+
+    from neo4j_connector import Neo4jConnector
+
+    connector = Neo4jConnector()
+    try:
+        with connector.driver.session() as session:
+            rebuild_exemplar_pools(session, args.pool_size)
+    finally:
+        connector.close()
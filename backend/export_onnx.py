@@ -0,0 +1,84 @@
+"""
+Export the zero-shot classifier and the sentence encoder to ONNX and quantize them to int8.
+
+Usage (from the `backend` folder, needs `pip install onnx onnxruntime`):
+    python export_onnx.py [--only zero_shot|encoder]
+
+The models are written to ONNX_MODEL_DIR/zero_shot and ONNX_MODEL_DIR/encoder
+(default backend/.cache/onnx) and used by a backend started with INFERENCE_BACKEND=onnx.
+Compare them with the current models with `python compare_inference.py`.
+"""
+import argparse
+import os
+import time
+
+from services.onnx_backend import onnx_model_dir, QUANTIZED_FILE
+from services.topic_extraction import ZERO_SHOT_MODEL
+
+ENCODER_HUB_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+
+
+def export_model(source: str, model_dir: str, classifier: bool, opset: int = 14):
+    """
+    Export a transformers model to `model_dir`/model.onnx, then dynamically quantize its
+    weights to int8 into `model_dir`/model_quantized.onnx. Tokenizer and config are saved alongside.
+
+    Args:
+        source (str): Hub name or local path of the model.
+        model_dir (str): Output directory.
+        classifier (bool): Export the sequence classification head (logits) instead of the hidden states.
+        opset (int): ONNX opset version.
+    """
+    import torch
+    from onnxruntime.quantization import quantize_dynamic, QuantType
+    from transformers import AutoModel, AutoModelForSequenceClassification, AutoTokenizer
+
+    os.makedirs(model_dir, exist_ok=True)
+    tokenizer = AutoTokenizer.from_pretrained(source)
+    model = (AutoModelForSequenceClassification if classifier else AutoModel).from_pretrained(source)
+    model.eval()
+
+    if classifier:
+        sample = tokenizer(["A sample tweet"], ["This example is politics."], return_tensors="pt")
+    else:
+        sample = tokenizer(["A sample tweet"], return_tensors="pt")
+    input_names = [name for name in ("input_ids", "attention_mask", "token_type_ids") if name in sample]
+
+    class Wrapper(torch.nn.Module):
+        def __init__(self):
+            super().__init__()
+            self.model = model
+
+        def forward(self, *inputs):
+            return self.model(**dict(zip(input_names, inputs)), return_dict=False)[0]
+
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+    dynamic_axes["output"] = {0: "batch"} if classifier else {0: "batch", 1: "sequence"}
+    fp32_path = os.path.join(model_dir, "model.onnx")
+    with torch.no_grad():
+        torch.onnx.export(
+            Wrapper(), tuple(sample[name] for name in input_names), fp32_path,
+            input_names=input_names, output_names=["output"], dynamic_axes=dynamic_axes, opset_version=opset,
+        )
+    quantize_dynamic(fp32_path, os.path.join(model_dir, QUANTIZED_FILE), weight_type=QuantType.QInt8)
+    tokenizer.save_pretrained(model_dir)
+    model.config.save_pretrained(model_dir)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export quantized ONNX models for INFERENCE_BACKEND=onnx.")
+    parser.add_argument("--only", choices=["zero_shot", "encoder"], help="Export a single model")
+    parser.add_argument("--zero-shot-model", default=ZERO_SHOT_MODEL)
+    parser.add_argument("--encoder-model", default=ENCODER_HUB_MODEL)
+    args = parser.parse_args()
+
+    targets = [("zero_shot", args.zero_shot_model, True), ("encoder", args.encoder_model, False)]
+    for name, source, classifier in targets:
+        if args.only and args.only != name:
+            continue
+        start = time.perf_counter()
+        model_dir = onnx_model_dir(name)
+        export_model(source, model_dir, classifier)
+        sizes = {f: os.path.getsize(os.path.join(model_dir, f)) / 1e6 for f in ("model.onnx", QUANTIZED_FILE)}
+        print(f"[ONNX] {name}: {source} -> {model_dir} in {time.perf_counter() - start:.0f}s "
+              f"(fp32 {sizes['model.onnx']:.0f} MB, int8 {sizes[QUANTIZED_FILE]:.0f} MB)")
@@ -0,0 +1,27 @@
+"""
+Export the Tweet graph to the Parquet snapshot read by the columnar analytics backend.
+
+Usage (from the `backend` folder):
+    python export_snapshot.py [--path backend/.cache/analytics_snapshot.parquet]
+
+Run it after each ingest; a backend started with ANALYTICS_BACKEND=columnar reloads
+the snapshot as soon as the file is replaced.
+"""
+import argparse
+import time
+
+from neo4j_connector import Neo4jConnector
+from services.columnar_analytics import export_snapshot
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export the analytics snapshot.")
+    parser.add_argument("--path", default=None, help="Snapshot file (default: ANALYTICS_SNAPSHOT)")
+    args = parser.parse_args()
+
+    connector = Neo4jConnector()
+    try:
+        start = time.perf_counter()
+        total = export_snapshot(connector, args.path)
+        print(f"[SNAPSHOT] {total} tweets exported in {time.perf_counter() - start:.1f}s")
+    finally:
+        connector.close()
@@ -0,0 +1,94 @@
+"""
+Embed every tweet once and append the vectors to the shared embedding store.
+
+Usage (from the `backend` folder):
+    python ingest_embeddings.py --csv ../utils/dataset.csv
+    python ingest_embeddings.py --from-neo4j
+
+Tweets already present in the store are skipped, so the command can be re-run
+after new tweets are loaded to embed only the new ones.
+"""
+import argparse
+import csv
+import time
+
+from services.embedding_store import EmbeddingStore, tweet_id
+
+
+def iter_csv_tweets(path: str):
+    """
+    Yield (date, text) pairs from a dataset CSV without loading it in memory.
+    """
+    with open(path, newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            if row.get("Text"):
+                yield row["Date"], row["Text"]
+
+
+def iter_neo4j_tweets():
+    """
+    Yield (date, text) pairs for every Tweet node in Neo4j.
+    """
+    from neo4j_connector import Neo4jConnector
+
+    connector = Neo4jConnector()
+    try:
+        with connector.driver.session() as session:
+            for record in session.run("MATCH (t:Tweet) WHERE t.text IS NOT NULL RETURN t.date AS date, t.text AS text"):
+                yield record["date"], record["text"]
+    finally:
+        connector.close()
+
+
+def ingest(tweets, store: EmbeddingStore, batch_size: int = 256):
+    """
+    Embed the tweets missing from the store, in batches.
+
+    Args:
+        tweets (iterable): (date, text) pairs.
+        store (EmbeddingStore): Destination store.
+        batch_size (int): Number of tweets encoded per call.
+
+    Returns:
+        tuple: (number of tweets seen, number of tweets embedded)
+    """
+    from services.tweet_analysis_generation import get_encoder, ENCODER_ID
+
+    encoder = get_encoder()
+
+    seen, added = 0, 0
+    batch_ids, batch_texts = [], []
+
+    def flush():
+        vectors = encoder.encode(batch_texts, convert_to_numpy=True, batch_size=batch_size)
+        return store.add(batch_ids, vectors, ENCODER_ID)
+
+    for date, text in tweets:
+        seen += 1
+        tid = tweet_id(date, text)
+        if tid in store:
+            continue
+        batch_ids.append(tid)
+        batch_texts.append(text)
+        if len(batch_ids) >= batch_size:
+            added += flush()
+            batch_ids, batch_texts = [], []
+    if batch_ids:
+        added += flush()
+    return seen, added
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Precompute tweet embeddings into the memory-mapped store.")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--csv", help="Dataset CSV with Date and Text columns")
+    source.add_argument("--from-neo4j", action="store_true", help="Read the tweets from the Neo4j database")
+    parser.add_argument("--store-dir", default=None, help="Embedding store folder (default: EMBEDDING_STORE_DIR)")
+    parser.add_argument("--batch-size", type=int, default=256)
+    args = parser.parse_args()
+
+    store = EmbeddingStore(args.store_dir)
+    start = time.perf_counter()
+    tweets = iter_neo4j_tweets() if args.from_neo4j else iter_csv_tweets(args.csv)
+    seen, added = ingest(tweets, store, args.batch_size)
+    print(f"[INGEST] {seen} tweets read, {added} embedded, {len(store)} in store ({time.perf_counter() - start:.1f}s)")
@@ -0,0 +1,271 @@
+"""
+Bulk-load a dataset CSV (utils/dataset.csv format) into Neo4j.
+
+Usage (from the `backend` folder):
+    python load_dataset.py ../utils/dataset.csv
+    python load_dataset.py ../utils/dataset.csv --chunk-size 5000 --workers 4
+
+The CSV is streamed in chunks, the `entities` column is parsed once in Python, and
+each chunk is written with UNWIND batches: Entity nodes first, then Tweet nodes and
+MENTIONS relationships in parallel transactions. Tweets are merged on their `id`, so
+the load is idempotent; completed chunks are checkpointed so a crashed load resumes
+where it stopped. The analytics aggregates (see `aggregates.py`) are updated in the same
+transaction as the tweets they summarize; chunks sharing tweet ids are never written concurrently.
+"""
+import argparse
+import ast
+import csv
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from neo4j_connector import Neo4jConnector
+from migrate import apply_migrations
+from services.embedding_store import tweet_id
+from aggregates import read_tweets, compute_deltas, apply_deltas
+from exemplars import rebuild_exemplar_pools
+
+ENTITY_QUERY = """
+UNWIND $entities AS entity
+MERGE (:Entity {name: entity.name, type: entity.type})
+"""
+
+TWEET_QUERY = """
+UNWIND $rows AS row
+MERGE (t:Tweet {id: row.id})
+SET t.date = row.date,
+    t.text = row.text,
+    t.retweets = row.retweets,
+    t.likes = row.likes,
+    t.topic = row.topic,
+    t.confidence = row.confidence,
+    t.sentiment = row.sentiment,
+    t.sentiment_confidence = row.sentiment_confidence,
+    t.author = row.author,
+    t.day = CASE WHEN row.day IS NULL THEN null ELSE date(row.day) END,
+    t.year = row.year,
+    t.month = row.month
+WITH t, row
+UNWIND row.entities AS entity
+MATCH (e:Entity {name: entity.name, type: entity.type})
+MERGE (t)-[:MENTIONS]->(e)
+"""
+
+
+def parse_entities(value: str) -> list:
+    """
+    Parse the `entities` column ("[['NBA', 'ORG'], ...]") into {name, type} dictionaries.
+    """
+    try:
+        parsed = ast.literal_eval(value) if value else []
+    except (ValueError, SyntaxError):
+        return []
+    entities = []
+    for item in parsed:
+        if len(item) == 2 and str(item[0]).strip() and str(item[1]).strip():
+            entities.append({"name": str(item[0]).strip(), "type": str(item[1]).strip()})
+    return entities
+
+
+def _to_int(value):
+    return int(float(value)) if value not in (None, "") else None
+
+
+def _to_float(value):
+    return float(value) if value not in (None, "") else None
+
+
+def parse_row(row: dict) -> dict:
+    """
+    Convert a CSV row into the parameters of one Tweet node.
+    """
+    date = row["Date"]
+    return {
+        "id": tweet_id(date, row["Text"]),
+        "date": date,
+        "text": row["Text"],
+        "retweets": _to_int(row.get("Retweets")),
+        "likes": _to_int(row.get("Likes")),
+        "topic": row.get("topic") or None,
+        "confidence": _to_float(row.get("confidence")),
+        "sentiment": row.get("sentiment") or None,
+        "sentiment_confidence": _to_float(row.get("sentiment_confidence")),
+        "author": row.get("Author") or None,
+        "day": date[:10] if len(date) >= 10 else None,
+        "year": _to_int(date[:4]) if len(date) >= 4 else None,
+        "month": _to_int(date[5:7]) if len(date) >= 7 else None,
+        "entities": parse_entities(row.get("entities")),
+    }
+
+
+def iter_chunks(path: str, chunk_size: int):
+    """
+    Yield (chunk index, list of parsed rows) from the CSV without loading it in memory.
+    """
+    with open(path, newline="", encoding="utf-8") as f:
+        chunk, index = [], 0
+        for row in csv.DictReader(f):
+            if not row.get("Text"):
+                continue
+            chunk.append(parse_row(row))
+            if len(chunk) >= chunk_size:
+                yield index, chunk
+                chunk, index = [], index + 1
+        if chunk:
+            yield index, chunk
+
+
+class Checkpoint:
+    """
+    Persist the number of leading chunks fully written, so a restarted load skips them.
+    Chunks complete out of order; only the contiguous prefix is recorded.
+    """
+
+    def __init__(self, path: str, source: str, chunk_size: int):
+        self.path = path
+        self.key = {"source": os.path.abspath(source), "chunk_size": chunk_size}
+        self.done = set()
+        self.prefix = 0
+        self._lock = threading.Lock()
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                saved = json.load(f)
+            if {k: saved.get(k) for k in self.key} == self.key:
+                self.prefix = saved["chunks_done"]
+
+    def mark(self, index: int):
+        with self._lock:
+            self.done.add(index)
+            advanced = False
+            while self.prefix in self.done:
+                self.done.discard(self.prefix)
+                self.prefix += 1
+                advanced = True
+            if advanced:
+                with open(self.path + ".tmp", "w", encoding="utf-8") as f:
+                    json.dump(dict(self.key, chunks_done=self.prefix), f)
+                os.replace(self.path + ".tmp", self.path)
+
+
+def write_entities(session, rows):
+    entities = {(e["name"], e["type"]) for row in rows for e in row["entities"]}
+    if entities:
+        session.execute_write(lambda tx: tx.run(ENTITY_QUERY, entities=[{"name": n, "type": t} for n, t in entities]).consume())
+
+
+def write_tweets(connector: Neo4jConnector, rows) -> int:
+    # Rows with the same date and text share an id: only the last one is written, otherwise its
+    # aggregate contributions would be added once per row while MERGE keeps a single node
+    rows = list({row["id"]: row for row in rows}.values())
+
+    def work(tx):
+        previous = read_tweets(tx, [row["id"] for row in rows])
+        tx.run(TWEET_QUERY, rows=rows).consume()
+        apply_deltas(tx, compute_deltas(previous, rows))
+
+    with connector.driver.session() as session:
+        session.execute_write(work)
+    return len(rows)
+
+
+class LoadError(RuntimeError):
+    """
+    Raised by `load` when chunks failed to be written (the checkpoint keeps them for a re-run).
+    """
+
+
+def load(path: str, connector: Neo4jConnector, chunk_size: int = 2000, workers: int = 4, checkpoint_path: str = None):
+    """
+    Load the CSV into Neo4j.
+
+    Args:
+        path (str): Dataset CSV path.
+        connector (Neo4jConnector): Destination database.
+        chunk_size (int): Rows per UNWIND batch.
+        workers (int): Parallel write transactions.
+        checkpoint_path (str): Checkpoint file (default: next to the CSV).
+
+    Returns:
+        int: Number of rows written in this run.
+
+    Raises:
+        LoadError: When a chunk failed; no new chunk is started after the first failure.
+    """
+    checkpoint = Checkpoint(checkpoint_path or path + ".load_checkpoint.json", path, chunk_size)
+    if checkpoint.prefix:
+        print(f"[LOAD] Resuming after {checkpoint.prefix} completed chunks")
+
+    written, start = 0, time.perf_counter()
+    progress_lock = threading.Lock()
+    failures = {}  # chunk index -> exception
+    slots = threading.BoundedSemaphore(workers * 2)  # Bound the chunks held in memory
+    # Tweet ids of the chunks being written: a chunk sharing one waits for them, so the aggregate
+    # delta of a tweet is never computed by two transactions from the same previous state
+    writing, writing_changed = set(), threading.Condition()
+
+    def on_done(index, ids, future):
+        nonlocal written
+        with writing_changed:
+            writing.difference_update(ids)
+            writing_changed.notify_all()
+        slots.release()
+        if future.exception() is not None:
+            print(f"[LOAD] Chunk {index} failed: {future.exception()}")
+            with progress_lock:
+                failures[index] = future.exception()
+            return
+        checkpoint.mark(index)
+        with progress_lock:
+            written += future.result()
+            elapsed = time.perf_counter() - start
+            print(f"[LOAD] {written} rows written ({written / elapsed:.0f} rows/s)")
+
+    with ThreadPoolExecutor(max_workers=workers) as executor, connector.driver.session() as session:
+        for index, rows in iter_chunks(path, chunk_size):
+            if index < checkpoint.prefix:
+                continue
+            if failures:
+                break
+            # Entities are merged by a single writer so parallel tweet writes never race to create them
+            write_entities(session, rows)
+            slots.acquire()
+            ids = {row["id"] for row in rows}
+            with writing_changed:
+                writing_changed.wait_for(lambda: writing.isdisjoint(ids))
+                writing.update(ids)
+            future = executor.submit(write_tweets, connector, rows)
+            future.add_done_callback(lambda f, i=index, ids=ids: on_done(i, ids, f))
+
+    elapsed = time.perf_counter() - start
+    if failures:
+        raise LoadError(f"{len(failures)} chunk(s) failed ({', '.join(map(str, sorted(failures)))}) after writing "
+                        f"{written} rows in {elapsed:.1f}s; re-run the same command to resume from the checkpoint")
+    print(f"[LOAD] Done: {written} rows in {elapsed:.1f}s ({written / max(elapsed, 1e-9):.0f} rows/s)")
+    return written
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bulk-load a dataset CSV into Neo4j.")
+    parser.add_argument("csv", help="Dataset CSV (utils/dataset.csv format)")
+    parser.add_argument("--chunk-size", type=int, default=2000)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--checkpoint", default=None, help="Checkpoint file (default: <csv>.load_checkpoint.json)")
+    args = parser.parse_args()
+
+    connector = Neo4jConnector()
+    try:
+        # Constraints and indexes must exist before merging on Tweet.id / Entity(name, type)
+        apply_migrations(connector)
+        try:
+            load(args.csv, connector, args.chunk_size, args.workers, args.checkpoint)
+        except LoadError as e:
+            print(f"[LOAD] Failed: {e}")
+            sys.exit(1)
+        # Generation exemplars are picked among all the tweets, so they are rebuilt after the load
+        with connector.driver.session() as session:
+            rebuild_exemplar_pools(session)
+    finally:
+        connector.close()
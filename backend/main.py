@@ -1,17 +1,89 @@
-from fastapi import FastAPI, Query
+import logging
+from typing import Literal, Optional
+from fastapi import FastAPI, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse, StreamingResponse
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from starlette.background import BackgroundTask
 from schemas import TweetRequest, TweetGenerationRequest 
-import pandas as pd
-from neo4j_connector import Neo4jConnector
+import numpy as np
+from neo4j_connector import Neo4jConnector, AsyncNeo4jConnector
+import os
+import re
 import json
-import faiss
-
-from services.topic_extraction import classify_topic
-from services.tweet_analysis_generation import stream_llm_response, stream_llm_generation, encoder 
+import time
+import asyncio
+import threading
+from contextlib import aclosing
+
+from services.topic_extraction import rank_topics, extract_entities_batch, candidate_labels, TOPIC_CACHE_KIND, ENTITIES_CACHE_KIND
+from services.tweet_analysis_generation import stream_llm_response, stream_llm_generation, close_llm_client, encode_queries, VECTOR_CACHE_KIND, ENCODER_ID
+from services.tweet_analysis_generation import build_attribution_prompt, predict_author, llm_backend
+from services.result_cache import result_cache
+from services.response_cache import ResponseCache
+from services.columnar_analytics import ColumnarAnalytics
+from services.model_registry import models
+from services.batcher import MicroBatcher
+from services.embedding_store import EmbeddingStore
+from services.vector_index import TopicIndexCache
+from services.global_index import GlobalVectorIndex
+from services.graph_retrieval import graph_search, GRAPH_PREFILTER_LIMIT, GRAPH_PREFILTER_MERGE
+from services.metrics import metrics, span, slow_requests, MetricsMiddleware
+from services.streaming import NDJSONTextStream, wants_delta
+from services.answer_cache import SemanticAnswerCache
+from services.batch_input import parse_batch_items, BatchInputError
+from services.author_vote import KNNAuthorClassifier
+from services.model_ipc import model_server
+from services.llm_scheduler import llm_scheduler, LLMQueueFull
+
+logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO").upper(), format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+logger = logging.getLogger(__name__)
 
 app = FastAPI()
-connector = Neo4jConnector()
+if os.getenv("CONNECTOR_BACKEND", "neo4j") == "memory":
+    # Database-free mode (benchmarks, demos): tweets are read from MEMORY_DATASET
+    from memory_connector import InMemoryConnector, AsyncInMemoryConnector
+    connector = InMemoryConnector()
+    async_connector = AsyncInMemoryConnector(connector)
+else:
+    connector = Neo4jConnector()  # Sync connector, used from worker threads (topic index builds)
+    async_connector = AsyncNeo4jConnector()  # Async connector, used by the route handlers
+# Analytics (A*) queries: Neo4j by default, or the in-memory columnar engine over a snapshot
+analytics = ColumnarAnalytics() if os.getenv("ANALYTICS_BACKEND", "neo4j") == "columnar" else async_connector
+response_cache = ResponseCache()  # Analytics responses (single-flight, ETag)
+embedding_store = EmbeddingStore()
+answer_cache = SemanticAnswerCache()  # Past /analyze answers, reused for near-duplicate tweets
+# Replay cached answers as a stream of word frames (default) or as a single final frame
+ANSWER_CACHE_REPLAY_STREAM = os.getenv("ANSWER_CACHE_REPLAY_STREAM", "1") == "1"
+# Retrieval: one corpus-wide HNSW index filtered on the top predicted topics (default),
+# the tweets sharing entities with the query in the graph (RETRIEVAL_INDEX=graph, see
+# services/graph_retrieval.py), or the previous per-topic flat indexes (RETRIEVAL_INDEX=topic)
+RETRIEVAL_INDEX = os.getenv("RETRIEVAL_INDEX", "global")
+RETRIEVAL_TOPICS = int(os.getenv("RETRIEVAL_TOPICS", "2"))
+global_index = GlobalVectorIndex(encode_queries, store=embedding_store, encoder_id=ENCODER_ID)
+topic_index_cache = TopicIndexCache(encode_queries, store=embedding_store, encoder_id=ENCODER_ID)
+# Attribution by the LLM ("llm") or by a vote of the retrieved neighbours' authors, with the
+# LLM only below the vote margin or on request ("vote"); overridable per request
+ATTRIBUTION_MODE = os.getenv("ATTRIBUTION_MODE", "llm")
+author_classifier = KNNAuthorClassifier()
+# /analyze/batch: maximum tweets per request, tweets featurized/searched together, concurrent LLM calls
+BATCH_ANALYZE_MAX_ITEMS = int(os.getenv("BATCH_ANALYZE_MAX_ITEMS", "50000"))
+BATCH_ANALYZE_CHUNK_SIZE = int(os.getenv("BATCH_ANALYZE_CHUNK_SIZE", "256"))
+BATCH_ANALYZE_LLM_CONCURRENCY = int(os.getenv("BATCH_ANALYZE_LLM_CONCURRENCY", "4"))
+
+# /generate_tweet examples: drawn from the precomputed exemplar pool of (author, topic) ("pool",
+# sampled "stratified" when no pool was built), or sampled in the database ("random", "stratified")
+GENERATION_CONTEXT = os.getenv("GENERATION_CONTEXT", "pool")
+GENERATION_CONTEXT_SIZE = int(os.getenv("GENERATION_CONTEXT_SIZE", "20"))
+
+# Coalesce concurrent /analyze calls into batched NER/classification and embedding runs
+topic_batcher = MicroBatcher("classify_topic", rank_topics)
+embedding_batcher = MicroBatcher("encode_query", encode_queries)
+# Query entities for graph retrieval, on the NER thread of the topic batcher (spaCy never runs
+# concurrently); usually answered from the result cache filled by the topic classification
+entity_batcher = MicroBatcher("extract_entities", extract_entities_batch, executor=topic_batcher.executor)
+
+# Request duration / in-flight / error metrics (served on /metrics)
+app.add_middleware(MetricsMiddleware)
 
 # Allow requests from frontend
 app.add_middleware(
@@ -23,15 +95,135 @@ app.add_middleware(
 )
 
 
+# Models needed by /analyze (the analytics endpoints need none)
+ANALYZE_MODELS = ["ner", "zero_shot", "encoder"]
+
+
+async def cached_submit(batcher: MicroBatcher, kind: str, text: str):
+    # Answer repeated tweets from the result cache without waiting for a batch
+    with span(batcher.name):
+        cached = result_cache.get(kind, text, count_miss=False)
+        if cached is not None:
+            return cached
+        return await batcher.submit(text)
+
+
+def retrieve_context(query_vector, topics: list, k: int = 10, entities: list = None) -> list:
+    """
+    Return the k tweets nearest to the query among the given topics, or among the tweets
+    sharing the query `entities` in graph mode (blocking: FAISS + sync connector).
+    """
+    if RETRIEVAL_INDEX == "topic":
+        index, rows = topic_index_cache.get(topics[0], connector)
+        if index is None:
+            return []
+        distances, indices = index.search(query_vector.reshape(1, -1), min(k, index.ntotal))
+        return [dict(rows[i], distance=float(d)) for i, d in zip(indices[0], distances[0])]
+    global_index.refresh(connector)
+    if RETRIEVAL_INDEX == "graph":
+        rows, candidates = graph_search(global_index, connector, query_vector, entities or [], topics, k)
+        logger.debug(f"Graph prefilter: {candidates} candidate tweets")
+        return rows
+    return global_index.search(query_vector, k, topics=topics)
+
+
+def retrieve_context_batch(query_vectors, topics: list, k: int = 10, entities: list = None) -> list:
+    """
+    Batched `retrieve_context`: one matrix search per distinct topic filter (one graph
+    lookup per tweet in graph mode).
+    """
+    if RETRIEVAL_INDEX == "topic":
+        results = [[] for _ in topics]
+        groups = {}
+        for position, query_topics in enumerate(topics):
+            groups.setdefault(query_topics[0], []).append(position)
+        for topic, positions in groups.items():
+            index, rows = topic_index_cache.get(topic, connector)
+            if index is None:
+                continue
+            queries = np.stack([query_vectors[p] for p in positions])
+            distances, indices = index.search(queries, min(k, index.ntotal))
+            for position, row_indices, row_distances in zip(positions, indices, distances):
+                results[position] = [dict(rows[i], distance=float(d)) for i, d in zip(row_indices, row_distances)]
+        return results
+    global_index.refresh(connector)
+    if RETRIEVAL_INDEX == "graph":
+        return [graph_search(global_index, connector, vector, ents, query_topics, k)[0]
+                for vector, ents, query_topics in zip(query_vectors, entities, topics)]
+    return global_index.search_batch(np.stack(query_vectors), k, topics=topics)
+
+
+@app.on_event("startup")
+def load_models_in_background():
+    # Load every model in parallel without delaying the server start
+    models.start()
+    # Optional stack sampler behind /debug/slow-requests (PROFILE_SLOW_REQUESTS)
+    slow_requests.start()
+    # Optionally build/load the retrieval index(es) before the first /analyze request
+    if os.getenv("VECTOR_INDEX_WARM", "0") == "1":
+        if RETRIEVAL_INDEX == "topic":
+            threading.Thread(target=topic_index_cache.warm, args=(candidate_labels, connector), daemon=True).start()
+        else:
+            threading.Thread(target=global_index.refresh, args=(connector,), daemon=True).start()
+
+
+@app.on_event("shutdown")
+async def close_clients():
+    await close_llm_client()
+    await async_connector.close()
+    connector.close()
+
+
 @app.post("/analyze")
-async def LLM_analyze_tweet(data: TweetRequest):
-    topic, confidence = classify_topic(data.tweet)
-    print(f"[DEBUG] Topic extracted: {topic} ({confidence:.2%})")
+async def LLM_analyze_tweet(data: TweetRequest, request: Request):
+    if not models.is_ready(ANALYZE_MODELS):
+        return JSONResponse(status_code=503, headers={"Retry-After": "10"}, content={
+            "predicted_author": "ERROR",
+            "explanation": "The analysis models are still loading. Please retry in a few seconds.",
+            "models": models.status(),
+            "streaming": False
+        })
+
+    ranking, query_vector = await asyncio.gather(
+        cached_submit(topic_batcher, TOPIC_CACHE_KIND, data.tweet),
+        cached_submit(embedding_batcher, VECTOR_CACHE_KIND, data.tweet),
+    )
+    topic, confidence = ranking[0]
+    search_topics = [label for label, _ in ranking[:RETRIEVAL_TOPICS]]
+    logger.debug(f"Topic extracted: {topic} ({confidence:.2%}), retrieval topics: {search_topics}")
+
+    # Cumulative frames by default, delta frames on request (?stream=delta / Accept: ...; format=delta)
+    stream = NDJSONTextStream("explanation", delta=wants_delta(request))
+
+    # Near-duplicate of a recently attributed tweet: replay its answer instead of calling the LLM
+    cached_answer = answer_cache.lookup(query_vector, topic)
+    if cached_answer is not None:
+        logger.debug(f"Answer cache hit (similarity {cached_answer['similarity']:.3f}, Topic: {topic})")
+
+        async def replay_cached_answer():
+            yield stream.start()
+            if ANSWER_CACHE_REPLAY_STREAM:
+                for piece in re.split(r"(?<=\s)(?=\S)", cached_answer["explanation"]):
+                    yield stream.chunk(piece)
+            yield stream.final({
+                "predicted_author": cached_answer["predicted_author"],
+                "explanation": cached_answer["explanation"],
+                "confidence": 100.0,
+                "topic": topic,
+                "topic_confidence": round(confidence * 100, 2),
+                "cached": True,
+                "similarity": round(cached_answer["similarity"], 4),
+            })
+
+        return StreamingResponse(replay_cached_answer(), media_type="application/x-ndjson", headers={"X-Stream-Format": stream.format})
     
-    df = connector.LLM_get_tweets_by_topic(topic)
-    df = pd.DataFrame(df)
+    entities = await cached_submit(entity_batcher, ENTITIES_CACHE_KIND, data.tweet) if RETRIEVAL_INDEX == "graph" else None
+
+    # Index refreshes use the sync connector and FAISS, so they run off the event loop
+    with span("vector_search"):
+        context_rows = await asyncio.to_thread(retrieve_context, query_vector, search_topics, 10, entities)
     
-    if df.empty:
+    if not context_rows:
         return JSONResponse(status_code=404, content={
             "predicted_author": "ERROR",
             "explanation": "No tweets found for this topic. Please try a different tweet.",
@@ -41,116 +233,263 @@ async def LLM_analyze_tweet(data: TweetRequest):
             "streaming": False
         })
         
-    # Context embedding and search
-    corpus_embeddings = encoder.encode(df["text"].tolist(), convert_to_numpy=True)
-    dimension = corpus_embeddings.shape[1]
-    index = faiss.IndexFlatL2(dimension)
-    index.add(corpus_embeddings)
-
-    query_embedding = encoder.encode([data.tweet])
-    distances, indices = index.search(query_embedding, 10)
-    
-    # Prepare context tweets with authors
-    context_tweets_with_authors = []
-    for idx in indices[0]:
-        t_text = df.iloc[idx]["text"]
-        t_author = df.iloc[idx]["author"]
-        context_tweets_with_authors.append(f'- "{t_text}" (Author: {t_author})')
-    
-    context_str = "\n".join(context_tweets_with_authors)
-    print(f"[DEBUG] Context tweets for LLM: {context_str}")
-    
-    prompt = f"""I will provide you with a list of tweets.
-
-Tweets:
-{context_str}
-
-Now, consider this new tweet:
+    context_ids = [row["id"] for row in context_rows]
+
+    # Fast attribution: a clear neighbour vote is answered without the LLM
+    vote = author_classifier.predict(context_rows) if (data.mode or ATTRIBUTION_MODE) == "vote" else None
+    if vote is not None:
+        logger.debug(f"Author vote: {vote['predicted_author']} ({vote['probability']:.2%}, margin {vote['margin']:.2f})")
+    if vote is not None and vote["confident"] and not data.explain:
+        async def send_vote():
+            yield stream.start()
+            yield stream.final({
+                "predicted_author": vote["predicted_author"],
+                "explanation": author_classifier.explain(vote, context_rows),
+                "confidence": round(vote["probability"] * 100, 2),
+                "topic": topic,
+                "topic_confidence": round(confidence * 100, 2),
+                "method": "vote",
+                "margin": round(vote["margin"], 4),
+            })
+            logger.info(f"Predicted Author: {vote['predicted_author']} (vote), Confidence: {vote['probability']:.2%}, Topic: {topic}")
+
+        return StreamingResponse(send_vote(), media_type="application/x-ndjson", headers={"X-Stream-Format": stream.format})
+
+    # Take a place in the LLM queue now, failing fast when too many attributions already wait
+    try:
+        ticket = llm_scheduler.admit("attribution")
+    except LLMQueueFull as e:
+        return JSONResponse(status_code=429, headers={"Retry-After": str(e.retry_after)}, content={
+            "predicted_author": "ERROR",
+            "explanation": f"The language model is busy. Please retry in {e.retry_after} seconds.",
+            "confidence": 0.0,
+            "topic": topic,
+            "topic_confidence": round(confidence * 100, 2),
+            "streaming": False
+        })
 
-"{data.tweet}"
-Question: Could this tweet have been written by Obama, Musk or neither?
-Answer and give a brief explanation."""
+    prompt = build_attribution_prompt(data.tweet, context_rows)
+    logger.debug(f"Prompt for LLM: {prompt}")
 
     async def generate_llm_response():
-        full_explanation = ""
-        
-        initial_data = {
-            "explanation": full_explanation, # Initial empty explanation
-            "streaming": True # Indicates that streaming will start
-        }
-        yield json.dumps(initial_data) + "\n"
-
-        # Stream LLM response
-        async for text_chunk in stream_llm_response(prompt):
-            if "ERROR" in text_chunk: 
-                final_error_data = {
-                    "predicted_author": "ERROR",
-                    "explanation": text_chunk,
-                    "confidence": 0.0,
-                    "topic": topic,
-                    "topic_confidence": round(confidence * 100, 2),
-                    "streaming": False # End streaming
-                }
-                yield json.dumps(final_error_data) + "\n"
-                print(f"[FINAL RESULT] ERROR: {text_chunk} (Topic: {topic}, Topic Confidence: {round(confidence * 100, 2)}%)")
-                return 
-
-            full_explanation += text_chunk
-            # Send a partial update with the current explanation
-            partial_data = {
+        yield stream.start() # Indicates that streaming will start
+
+        # Wait for an LLM slot, telling the caller its place in the queue
+        try:
+            async for position in llm_scheduler.positions(ticket):
+                yield stream.queued(position)
+
+            # Stream LLM response (closing the stream cancels the upstream completion)
+            async with aclosing(stream_llm_response(prompt)) as llm_stream:
+                async for text_chunk in llm_stream:
+                    if await request.is_disconnected():
+                        logger.info(f"Client disconnected, cancelling LLM generation (Topic: {topic})")
+                        return
+                    if "ERROR" in text_chunk: 
+                        yield stream.final({
+                            "predicted_author": "ERROR",
+                            "explanation": text_chunk,
+                            "confidence": 0.0,
+                            "topic": topic,
+                            "topic_confidence": round(confidence * 100, 2),
+                        })
+                        logger.warning(f"{text_chunk} (Topic: {topic}, Topic Confidence: {round(confidence * 100, 2)}%)")
+                        return 
+
+                    # Send a partial update with the current explanation (or only the new text)
+                    yield stream.chunk(text_chunk)
+
+            # Final result processing
+            full_explanation = stream.text
+            final_predicted_author = predict_author(full_explanation)
+
+            final_result = {
+                "predicted_author": final_predicted_author,
                 "explanation": full_explanation,
-                "streaming": True # Keep streaming status
+                "confidence": 100.0, 
+                "topic": topic,
+                "topic_confidence": round(confidence * 100, 2),
             }
-            yield json.dumps(partial_data) + "\n"
-
-        # Final result processing
-        response_lower = full_explanation.lower()
-        if "obama" in response_lower:
-            final_predicted_author = "Obama"
-        elif "musk" in response_lower or "elon" in response_lower:
-            final_predicted_author = "Musk"
-        else:
-            final_predicted_author = "neither" # Default if no author found
-
-        final_data = {
-            "predicted_author": final_predicted_author,
-            "explanation": full_explanation,
-            "confidence": 100.0, 
-            "topic": topic,
-            "topic_confidence": round(confidence * 100, 2),
-            "streaming": False # States that streaming is done
-        }
-        yield json.dumps(final_data) + "\n" # Sending final result
-
-        # Log the final result
-        print(f"[FINAL RESULT] Predicted Author: {final_predicted_author}, LLM Confidence: {100.0}%, Topic: {topic}, Topic Confidence: {round(confidence * 100, 2)}%")
+            if vote is not None:
+                final_result["vote"] = {key: vote[key] for key in ("predicted_author", "probability", "margin")}
+            yield stream.final(final_result) # Sending final result, streaming is done
+            answer_cache.store(query_vector, topic, context_ids, final_predicted_author, full_explanation)
+
+            # Log the final result
+            logger.info(f"Predicted Author: {final_predicted_author}, LLM Confidence: {100.0}%, Topic: {topic}, Topic Confidence: {round(confidence * 100, 2)}%")
+        finally:
+            llm_scheduler.release(ticket)
+
+    # The background task releases the ticket if the body is never iterated (client gone early)
+    return StreamingResponse(generate_llm_response(), media_type="application/x-ndjson", headers={"X-Stream-Format": stream.format},
+                             background=BackgroundTask(llm_scheduler.release, ticket))
+
+async def attribute_batch_item(item: dict, ranking: list, query_vector, context_rows: list, semaphore: asyncio.Semaphore, mode: str) -> dict:
+    """
+    Attribute one tweet of a batch (answer cache, neighbour vote in "vote" mode, then one
+    non-streamed LLM call) and return its result line.
+    """
+    topic, confidence = ranking[0]
+    result = {"id": item["id"], "topic": topic, "topic_confidence": round(confidence * 100, 2)}
+
+    cached_answer = answer_cache.lookup(query_vector, topic)
+    if cached_answer is not None:
+        return dict(result, predicted_author=cached_answer["predicted_author"], explanation=cached_answer["explanation"],
+                    context_ids=cached_answer["context_ids"], cached=True)
+    if not context_rows:
+        return dict(result, predicted_author="ERROR", explanation="No tweets found for this topic.")
+
+    context_ids = [row["id"] for row in context_rows]
+    vote = author_classifier.predict(context_rows) if mode == "vote" else None
+    if vote is not None and vote["confident"]:
+        return dict(result, predicted_author=vote["predicted_author"], explanation=author_classifier.explain(vote, context_rows),
+                    confidence=round(vote["probability"] * 100, 2), method="vote", context_ids=context_ids)
+    chunks = []
+    # Batch calls wait behind the interactive ones (lowest scheduler priority) and are never rejected
+    async with semaphore, llm_scheduler.slot("batch"):
+        async with aclosing(stream_llm_response(build_attribution_prompt(item["tweet"], context_rows))) as llm_stream:
+            async for text_chunk in llm_stream:
+                if "ERROR" in text_chunk:
+                    return dict(result, predicted_author="ERROR", explanation=text_chunk)
+                chunks.append(text_chunk)
+
+    explanation = "".join(chunks)
+    predicted_author = predict_author(explanation)
+    answer_cache.store(query_vector, topic, context_ids, predicted_author, explanation)
+    return dict(result, predicted_author=predicted_author, explanation=explanation, context_ids=context_ids)
+
+
+async def run_analyze_batch(items: list, results: asyncio.Queue, tasks: set, mode: str):
+    """
+    Featurize and search the batch chunk by chunk, then fan the LLM calls out as tasks that
+    put their result on `results` when done. At most one chunk of LLM calls is kept waiting,
+    so single /analyze requests still get the NER/classification and encoder threads.
+    """
+    loop = asyncio.get_running_loop()
+    semaphore = asyncio.Semaphore(BATCH_ANALYZE_LLM_CONCURRENCY)
+
+    async def attribute(*args):
+        try:
+            result = await attribute_batch_item(*args, semaphore, mode)
+        except Exception as e:
+            result = {"id": args[0]["id"], "predicted_author": "ERROR", "explanation": f"ERROR: {e}"}
+        results.put_nowait(result)
+
+    # Every item gets exactly one line on `results` (the consumer waits for len(items) of them):
+    # `dispatched` items have theirs put or coming from an attribution task
+    dispatched = 0
+    try:
+        for start in range(0, len(items), BATCH_ANALYZE_CHUNK_SIZE):
+            while len(tasks) >= BATCH_ANALYZE_CHUNK_SIZE:
+                await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+
+            chunk = items[start:start + BATCH_ANALYZE_CHUNK_SIZE]
+            texts = [item["tweet"] for item in chunk]
+            try:
+                # Same worker threads as the /analyze micro-batchers, one vectorized call per model
+                rankings, vectors = await asyncio.gather(
+                    loop.run_in_executor(topic_batcher.executor, rank_topics, texts),
+                    loop.run_in_executor(embedding_batcher.executor, encode_queries, texts),
+                )
+                search_topics = [[label for label, _ in ranking[:RETRIEVAL_TOPICS]] for ranking in rankings]
+                entities = None
+                if RETRIEVAL_INDEX == "graph":
+                    entities = await loop.run_in_executor(topic_batcher.executor, extract_entities_batch, texts)
+                with span("vector_search"):
+                    contexts = await asyncio.to_thread(retrieve_context_batch, vectors, search_topics, 10, entities)
+            except Exception as e:
+                logger.warning(f"Batch chunk {start}-{start + len(chunk)} failed: {e}")
+                for item in chunk:
+                    results.put_nowait({"id": item["id"], "predicted_author": "ERROR", "explanation": f"ERROR: {e}"})
+                dispatched += len(chunk)
+                continue
+
+            for args in zip(chunk, rankings, vectors, contexts):
+                task = asyncio.create_task(attribute(*args))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+                dispatched += 1
+            if dispatched < start + len(chunk):
+                raise RuntimeError(f"Only {dispatched - start} of {len(chunk)} tweets of the chunk were featurized")
+    except Exception as e:
+        logger.warning(f"Batch failed after {dispatched} of {len(items)} tweets: {e}")
+        for item in items[dispatched:]:
+            results.put_nowait({"id": item["id"], "predicted_author": "ERROR", "explanation": f"ERROR: {e}"})
 
 
-    return StreamingResponse(generate_llm_response(), media_type="application/x-ndjson")
+@app.post("/analyze/batch")
+async def LLM_analyze_batch(request: Request, mode: Optional[Literal["llm", "vote"]] = Query(None)):
+    if not models.is_ready(ANALYZE_MODELS):
+        return JSONResponse(status_code=503, headers={"Retry-After": "10"}, content={
+            "error": "The analysis models are still loading. Please retry in a few seconds.",
+            "models": models.status(),
+        })
+    try:
+        items = parse_batch_items(await request.body(), request.headers.get("content-type", ""), BATCH_ANALYZE_MAX_ITEMS)
+    except BatchInputError as e:
+        return JSONResponse(status_code=400, content={"error": str(e)})
+
+    logger.info(f"Batch attribution of {len(items)} tweets")
+
+    async def stream_results():
+        start = time.perf_counter()
+        results, tasks = asyncio.Queue(), set()
+        producer = asyncio.create_task(run_analyze_batch(items, results, tasks, mode or ATTRIBUTION_MODE))
+        counts = {"errors": 0, "cached": 0}
+        try:
+            # One line per tweet, in completion order, then a summary line
+            for _ in items:
+                result = await results.get()
+                counts["errors"] += result["predicted_author"] == "ERROR"
+                counts["cached"] += bool(result.get("cached"))
+                yield json.dumps(result) + "\n"
+            yield json.dumps(dict(counts, done=True, items=len(items), elapsed_s=round(time.perf_counter() - start, 2))) + "\n"
+            logger.info(f"Batch of {len(items)} tweets in {time.perf_counter() - start:.1f}s ({counts['errors']} errors)")
+        finally:
+            # Client gone or batch finished: stop the producer and the pending LLM calls
+            producer.cancel()
+            for task in list(tasks):
+                task.cancel()
+
+    return StreamingResponse(stream_results(), media_type="application/x-ndjson")
 
 @app.post("/generate_tweet")
-async def LLM_generate_author_tweet(data: TweetGenerationRequest):
+async def LLM_generate_author_tweet(data: TweetGenerationRequest, request: Request):
     author = data.author
     topic = data.topic
 
-    print(f"[DEBUG] Generating tweet for Author: {author}, Topic: {topic}")
+    logger.debug(f"Generating tweet for Author: {author}, Topic: {topic}")
 
-    # Retrieve tweets by author and topic
-    df = connector.LLM_get_tweets_by_author_topic(author, topic)
-    df = pd.DataFrame(df)
+    # Take a place in the LLM queue now, failing fast when too many generations already wait
+    try:
+        ticket = llm_scheduler.admit("generation")
+    except LLMQueueFull as e:
+        return JSONResponse(status_code=429, headers={"Retry-After": str(e.retry_after)}, content={
+            "error": f"The language model is busy. Please retry in {e.retry_after} seconds.",
+            "streaming": False
+        })
 
-    if df.empty:
+    # Example tweets of the author on the topic, sampled by the database (only their texts are fetched)
+    sampling = data.sampling or GENERATION_CONTEXT
+    sample_tweets = []
+    try:
+        if sampling == "pool":
+            sample_tweets = await async_connector.LLM_get_exemplar_pool(author, topic, GENERATION_CONTEXT_SIZE)
+        if not sample_tweets:
+            sample_tweets = await async_connector.LLM_sample_tweets_by_author_topic(author, topic, GENERATION_CONTEXT_SIZE, stratified=sampling != "random")
+    except BaseException:
+        llm_scheduler.release(ticket)
+        raise
+
+    if not sample_tweets:
+        llm_scheduler.release(ticket)
         return JSONResponse(status_code=404, content={
             "error": f"No tweets found for {author} on topic '{topic}'. Cannot generate.",
             "streaming": False
         })
 
-    # Randomly select 20 tweets (or fewer if less than 20 available)
-    sample_size = min(20, len(df))
-    sample_tweets = df.sample(n=sample_size)["text"].tolist() # .sample() to get random rows from the DataFrame
-
     context_tweets = "\n".join([f'- "{t}"' for t in sample_tweets])
-    print(f"[DEBUG] Sample context tweets for generation:\n{context_tweets}")
+    logger.debug(f"Sample context tweets for generation:\n{context_tweets}")
 
     # 3. Construct the prompt for the LLM
     system_prompt = f"You are an expert in generating tweets in the style of a specific author. Your task is to produce a tweet that closely mimics the writing style, tone, and common vocabulary of {author} on the given topic."
@@ -162,68 +501,130 @@ Now, generate a new tweet in the style of {author} about {topic}.
 The tweet should be concise and engaging. 
 Do NOT include any explanations or extra text, just the tweet itself."""
 
+    stream = NDJSONTextStream("generated_tweet", delta=wants_delta(request))
+
     async def generate_response_stream():
         # Initial chunk for frontend, indicating streaming has started
-        yield json.dumps({"generated_tweet": "", "streaming": True}) + "\n"
-
-        full_generated_tweet = ""
-        # Stream the response from the LLM
-        async for text_chunk in stream_llm_generation(system_prompt, user_prompt): 
-            full_generated_tweet += text_chunk
-            # Send partial update for frontend
-            yield json.dumps({"generated_tweet": full_generated_tweet, "streaming": True}) + "\n"
+        yield stream.start()
+
+        try:
+            async for position in llm_scheduler.positions(ticket):
+                yield stream.queued(position)
+
+            # Stream the response from the LLM (closing the stream cancels the upstream completion)
+            async with aclosing(stream_llm_generation(system_prompt, user_prompt)) as llm_stream:
+                async for text_chunk in llm_stream:
+                    if await request.is_disconnected():
+                        logger.info(f"Client disconnected, cancelling tweet generation (Author: {author}, Topic: {topic})")
+                        return
+                    # Send partial update for frontend
+                    yield stream.chunk(text_chunk)
         
-        # Post-processing to remove quotes
-        full_generated_tweet = full_generated_tweet.strip() # Remove leading/trailing whitespace
-        if full_generated_tweet.startswith('"') and full_generated_tweet.endswith('"'):
-            full_generated_tweet = full_generated_tweet[1:-1].strip() # Remove quotes and re-strip
+            # Post-processing to remove quotes
+            full_generated_tweet = stream.text.strip() # Remove leading/trailing whitespace
+            if full_generated_tweet.startswith('"') and full_generated_tweet.endswith('"'):
+                full_generated_tweet = full_generated_tweet[1:-1].strip() # Remove quotes and re-strip
         
-        # Final chunk, indicating streaming is complete
-        yield json.dumps({"generated_tweet": full_generated_tweet, "streaming": False}) + "\n"
-        print(f"[FINAL GENERATED TWEET] Author: {author}, Topic: {topic}\nTweet: \"{full_generated_tweet}\"")
+            # Final chunk, indicating streaming is complete
+            yield stream.final({"generated_tweet": full_generated_tweet})
+            logger.info(f"Author: {author}, Topic: {topic}\nTweet: \"{full_generated_tweet}\"")
+        finally:
+            llm_scheduler.release(ticket)
 
-    return StreamingResponse(generate_response_stream(), media_type="application/x-ndjson")
+    return StreamingResponse(generate_response_stream(), media_type="application/x-ndjson", headers={"X-Stream-Format": stream.format},
+                             background=BackgroundTask(llm_scheduler.release, ticket))
 
 @app.get("/analytics/topics")
-async def A_get_topics(author: str = Query(...)):
-    try:
-        topics = connector.A_get_topics_by_author(author)
+async def A_get_topics(request: Request, author: str = Query(...)):
+    async def compute():
+        topics = await analytics.A_get_topics_by_author(author)
         return {"author": author, "topics": topics}
+    try:
+        return await response_cache.respond(request, ("topics", author), compute)
     except Exception as e:
         return JSONResponse(status_code=500, content={"error": str(e)})
 
 @app.get("/analytics/years")
-async def A_get_years(author: str = Query("All")):
-    try:
-        years = connector.A_get_years_by_author(author)
+async def A_get_years(request: Request, author: str = Query("All")):
+    async def compute():
+        years = await analytics.A_get_years_by_author(author)
         return {"author": author, "years": years}
+    try:
+        return await response_cache.respond(request, ("years", author), compute)
     except Exception as e:
         return JSONResponse(status_code=500, content={"error": str(e)})
 
 @app.get("/analytics/likes-by-year")
-async def A1_get_likes_by_year(topic: str = Query(..., description="Topic to analyze"), author: str = Query(..., description="Author to filter by")):
-    try:
-        data = connector.A1_get_likes_by_year_for_topic_and_author(topic,author)
+async def A1_get_likes_by_year(request: Request, topic: str = Query(..., description="Topic to analyze"), author: str = Query(..., description="Author to filter by")):
+    async def compute():
+        data = await analytics.A1_get_likes_by_year_for_topic_and_author(topic,author)
         return {"topic": topic, "author": author, "data": data}
+    try:
+        return await response_cache.respond(request, ("likes-by-year", topic, author), compute)
     except Exception as e:
         return JSONResponse(status_code=500, content={"error": str(e)})
     
 @app.get("/topic-trend-by-year")
-def A2_topic_trend_by_year(year: str = Query(..., min_length=4, max_length=4), author: str = Query("All")):
-    data = connector.A2_get_topic_trend_by_month_year(year, author)
-    return {"data": data}
+async def A2_topic_trend_by_year(request: Request, year: str = Query(..., pattern=r"^\d{4}$"), author: str = Query("All")):
+    async def compute():
+        return {"data": await analytics.A2_get_topic_trend_by_month_year(year, author)}
+    return await response_cache.respond(request, ("topic-trend", year, author), compute)
 
 @app.get("/top-tweets")
-def A3_get_top_tweets(metric: str = Query("likes", enum=["likes", "retweets"]), limit: int = 5, author: str = Query(...)):
-    data = connector.A3_get_top_tweets(metric, limit, author)
-    return {"data": data}
+async def A3_get_top_tweets(request: Request, metric: str = Query("likes", enum=["likes", "retweets"]), limit: int = 5, author: str = Query(...)):
+    async def compute():
+        return {"data": await analytics.A3_get_top_tweets(metric, limit, author)}
+    return await response_cache.respond(request, ("top-tweets", metric, limit, author), compute)
 
 @app.get("/analytics/sentiment-by-topic")
-def A4_sentiment_by_topic():
-    data = connector.A4_get_average_sentiment_by_topic()
-    return {"data": data}
+async def A4_sentiment_by_topic(request: Request):
+    async def compute():
+        return {"data": await analytics.A4_get_average_sentiment_by_topic()}
+    return await response_cache.respond(request, ("sentiment-by-topic",), compute)
 
 @app.get("/sentiment-per-year")
-def A5_sentiment_per_year(author: str = Query(...)):
-    data = connector.A5_get_average_sentiment_per_year(author)
-    return {"data": data}
\ No newline at end of file
+async def A5_sentiment_per_year(request: Request, author: str = Query(...)):
+    async def compute():
+        return {"data": await analytics.A5_get_average_sentiment_per_year(author)}
+    return await response_cache.respond(request, ("sentiment-per-year", author), compute)
+
+@app.get("/health")
+def get_health():
+    return {"status": "ok", "ready": models.is_ready(), "models": models.status()}
+
+@app.get("/ready")
+def get_ready():
+    status = {"ready": models.is_ready(), "models": models.status()}
+    return status if status["ready"] else JSONResponse(status_code=503, content=status)
+
+@app.get("/stats/batching")
+def get_batching_stats():
+    stats = {"batchers": [topic_batcher.stats(), embedding_batcher.stats(), entity_batcher.stats()]}
+    if model_server is not None:
+        stats["model_server"] = model_server.call("stats")
+    return stats
+
+@app.get("/stats/cache")
+def get_cache_stats():
+    return dict(result_cache.stats(), responses=response_cache.summary(), answers=answer_cache.summary())
+
+@app.get("/stats/index")
+def get_index_stats():
+    return {
+        "retrieval": RETRIEVAL_INDEX,
+        "retrieval_topics": RETRIEVAL_TOPICS,
+        "graph_prefilter": {"limit": GRAPH_PREFILTER_LIMIT, "merge": GRAPH_PREFILTER_MERGE},
+        "global": global_index.stats(),
+    }
+
+@app.get("/stats/llm")
+def get_llm_stats():
+    return dict(llm_backend.stats(), scheduler=llm_scheduler.stats())
+
+@app.get("/metrics")
+def get_metrics():
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+@app.get("/debug/slow-requests")
+def get_slow_requests():
+    return {"enabled": slow_requests.enabled, "requests": slow_requests.dump()}
@@ -0,0 +1,156 @@
+"""
+In-memory stand-in for Neo4j, seeded from a dataset CSV (utils/dataset.csv format).
+
+Selected with CONNECTOR_BACKEND=memory (dataset path in MEMORY_DATASET). It implements
+the same methods and result shapes as `Neo4jConnector` / `AsyncNeo4jConnector`, so the
+backend can run (e.g. for benchmarks) without a database.
+"""
+import logging
+import os
+import random
+
+from load_dataset import iter_chunks
+from exemplars import select_exemplars, round_robin
+from services.columnar_analytics import ColumnarAnalytics
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DATASET = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "utils", "dataset.csv")
+
+
+class InMemoryConnector:
+    """
+    Sync in-memory connector (used where `Neo4jConnector` is, e.g. topic index builds).
+    """
+
+    def __init__(self, path: str = None):
+        """
+        Args:
+            path (str): Dataset CSV (env MEMORY_DATASET, default utils/dataset.csv).
+        """
+        path = path or os.getenv("MEMORY_DATASET", DEFAULT_DATASET)
+        self.rows = [row for _, chunk in iter_chunks(path, 10000) for row in chunk]
+        self.by_topic = {}
+        for row in self.rows:
+            self.by_topic.setdefault(row["topic"], []).append(row)
+        self.by_entity = {}  # Entity name -> rows mentioning it (the MENTIONS relationships)
+        for row in self.rows:
+            for name in {entity["name"] for entity in row["entities"]}:
+                self.by_entity.setdefault(name, []).append(row)
+        self.exemplar_pools = None  # (author, topic) -> texts, built on first use
+        logger.info(f"In-memory connector loaded {len(self.rows)} tweets from {path}")
+
+    def close(self):
+        pass
+
+    @staticmethod
+    def _tweet(row: dict) -> dict:
+        return {"text": row["text"], "date": row["date"], "sentiment": row["sentiment"], "author": row["author"]}
+
+    def LLM_get_tweets_by_topic(self, topic: str):
+        return [self._tweet(row) for row in self.by_topic.get(topic, [])]
+
+    def LLM_get_topic_fingerprint(self, topic: str):
+        rows = self.by_topic.get(topic, [])
+        dates = [row["date"] for row in rows if row["date"] is not None]
+        return f"{len(rows)}:{max(dates) if dates else None}:{sum(len(row['text']) for row in rows)}"
+
+    def LLM_get_corpus_tweets(self):
+        return [dict(self._tweet(row), topic=row["topic"], year=row["year"]) for row in self.rows]
+
+    def LLM_get_corpus_fingerprint(self):
+        dates = [row["date"] for row in self.rows if row["date"] is not None]
+        return f"{len(self.rows)}:{max(dates) if dates else None}:{sum(len(row['text']) for row in self.rows)}"
+
+    def LLM_get_tweets_by_entities(self, names: list, limit: int = 300):
+        shared = {}
+        for name in set(names):
+            for row in self.by_entity.get(name, []):
+                entry = shared.setdefault(row["id"], [row, 0])
+                entry[1] += 1
+        ranked = sorted(shared.values(), key=lambda entry: (-entry[1], -(entry[0]["likes"] or 0)))[:limit]
+        return [{"id": row["id"], "text": row["text"], "date": row["date"], "author": row["author"], "topic": row["topic"], "shared": n} for row, n in ranked]
+
+    def LLM_get_tweets_by_author_topic(self, author: str, topic: str):
+        return [self._tweet(row) for row in self.by_topic.get(topic, []) if row["author"] == author]
+
+    def LLM_sample_tweets_by_author_topic(self, author: str, topic: str, n: int, stratified: bool = True):
+        rows = [row for row in self.by_topic.get(topic, []) if row["author"] == author]
+        random.shuffle(rows)
+        if not stratified:
+            return [row["text"] for row in rows[:n]]
+        by_year = {}
+        for row in rows:
+            by_year.setdefault(row["year"], []).append(row["text"])
+        strata = list(by_year.values())
+        random.shuffle(strata)
+        return round_robin(strata, n)
+
+    def LLM_get_exemplar_pool(self, author: str, topic: str, n: int):
+        if self.exemplar_pools is None:
+            groups = {}
+            for row in self.rows:
+                if row["author"] is not None and row["topic"] is not None:
+                    groups.setdefault((row["author"], row["topic"]), []).append(row)
+            self.exemplar_pools = {key: select_exemplars(rows) for key, rows in groups.items()}
+        pool = self.exemplar_pools.get((author, topic), [])
+        return random.sample(pool, min(n, len(pool)))
+
+
+class AsyncInMemoryConnector:
+    """
+    Async in-memory connector: the LLM_* queries of `InMemoryConnector` plus the A*
+    analytics answered by a columnar engine over the same rows.
+    """
+
+    def __init__(self, connector: InMemoryConnector):
+        self.connector = connector
+        self.engine = ColumnarAnalytics.from_rows(connector.rows)
+
+    async def close(self):
+        pass
+
+    async def A_get_topics_by_author(self, author: str):
+        return await self.engine.A_get_topics_by_author(author)
+
+    async def A_get_years_by_author(self, author: str):
+        return await self.engine.A_get_years_by_author(author)
+
+    async def A1_get_likes_by_year_for_topic_and_author(self, topic: str, author: str):
+        return await self.engine.A1_get_likes_by_year_for_topic_and_author(topic, author)
+
+    async def A2_get_topic_trend_by_month_year(self, year: str, author: str):
+        return await self.engine.A2_get_topic_trend_by_month_year(year, author)
+
+    async def A3_get_top_tweets(self, metric: str, limit: int, author: str):
+        return await self.engine.A3_get_top_tweets(metric, limit, author)
+
+    async def A4_get_average_sentiment_by_topic(self):
+        return await self.engine.A4_get_average_sentiment_by_topic()
+
+    async def A5_get_average_sentiment_per_year(self, author):
+        return await self.engine.A5_get_average_sentiment_per_year(author)
+
+    async def LLM_get_tweets_by_topic(self, topic: str):
+        return self.connector.LLM_get_tweets_by_topic(topic)
+
+    async def LLM_get_topic_fingerprint(self, topic: str):
+        return self.connector.LLM_get_topic_fingerprint(topic)
+
+    async def LLM_get_corpus_tweets(self):
+        return self.connector.LLM_get_corpus_tweets()
+
+    async def LLM_get_corpus_fingerprint(self):
+        return self.connector.LLM_get_corpus_fingerprint()
+
+    async def LLM_get_tweets_by_entities(self, names: list, limit: int = 300):
+        return self.connector.LLM_get_tweets_by_entities(names, limit)
+
+    async def LLM_get_tweets_by_author_topic(self, author: str, topic: str):
+        return self.connector.LLM_get_tweets_by_author_topic(author, topic)
+
+    async def LLM_sample_tweets_by_author_topic(self, author: str, topic: str, n: int, stratified: bool = True):
+        return self.connector.LLM_sample_tweets_by_author_topic(author, topic, n, stratified)
+
+    async def LLM_get_exemplar_pool(self, author: str, topic: str, n: int):
+        return self.connector.LLM_get_exemplar_pool(author, topic, n)
@@ -0,0 +1,258 @@
+"""
+Versioned schema migrations for the Tweet graph.
+
+Usage (from the `backend` folder, after loading the dataset):
+    python migrate.py            # apply pending migrations, print PROFILE db hits of the
+                                 # pre-migration analytics queries before and the current ones after
+    python migrate.py --status   # list applied and pending migrations
+    python migrate.py --no-profile
+
+Applied migrations are recorded as (:SchemaMigration {version, name, applied_at}) nodes,
+so running the command again only applies the new ones.
+"""
+import argparse
+import time
+
+import neo4j_queries as queries
+from neo4j_connector import Neo4jConnector
+from services.embedding_store import tweet_id
+from aggregates import rebuild_aggregates, aggregate_constraints, has_duplicate_aggregates
+from exemplars import rebuild_exemplar_pools
+
+
+def backfill_tweet_ids(session, batch_size: int = 5000):
+    """
+    Set `t.id` (see `tweet_id`) on every Tweet node that does not have one yet.
+    """
+    total = 0
+    while True:
+        rows = session.run(
+            "MATCH (t:Tweet) WHERE t.id IS NULL RETURN elementId(t) AS eid, t.date AS date, t.text AS text LIMIT $n",
+            n=batch_size,
+        ).data()
+        if not rows:
+            return total
+        session.run(
+            "UNWIND $rows AS row MATCH (t:Tweet) WHERE elementId(t) = row.eid SET t.id = row.id",
+            rows=[{"eid": r["eid"], "id": tweet_id(r["date"], r["text"])} for r in rows],
+        ).consume()
+        total += len(rows)
+        print(f"[MIGRATE]   {total} tweet ids set")
+
+
+def rebuild_aggregates_if_duplicated(session):
+    if has_duplicate_aggregates(session):
+        rebuild_aggregates(session)
+
+
+# Cypher that derives the typed date fields from the `date` string ("YYYY-MM-DD HH:MM:SS")
+TYPED_DATE_FIELDS = """
+    t.day = date(substring(t.date, 0, 10)),
+    t.year = toInteger(substring(t.date, 0, 4)),
+    t.month = toInteger(substring(t.date, 5, 2))
+"""
+
+# (version, name, steps): a step is a Cypher string or a function taking a session
+MIGRATIONS = [
+    (1, "tweet_id_unique", [
+        backfill_tweet_ids,
+        "CREATE CONSTRAINT tweet_id_unique IF NOT EXISTS FOR (t:Tweet) REQUIRE t.id IS UNIQUE",
+    ]),
+    (2, "tweet_range_indexes", [
+        "CREATE INDEX tweet_author IF NOT EXISTS FOR (t:Tweet) ON (t.author)",
+        "CREATE INDEX tweet_topic IF NOT EXISTS FOR (t:Tweet) ON (t.topic)",
+        "CREATE INDEX tweet_sentiment IF NOT EXISTS FOR (t:Tweet) ON (t.sentiment)",
+        "CREATE INDEX tweet_author_topic IF NOT EXISTS FOR (t:Tweet) ON (t.author, t.topic)",
+    ]),
+    (3, "tweet_typed_dates", [
+        f"""
+        MATCH (t:Tweet) WHERE t.date IS NOT NULL AND t.year IS NULL
+        CALL {{ WITH t SET {TYPED_DATE_FIELDS} }} IN TRANSACTIONS OF 10000 ROWS
+        """,
+        "CREATE INDEX tweet_year IF NOT EXISTS FOR (t:Tweet) ON (t.year)",
+        "CREATE INDEX tweet_author_year IF NOT EXISTS FOR (t:Tweet) ON (t.author, t.year)",
+    ]),
+    (4, "entity_name_type_unique", [
+        "CREATE CONSTRAINT entity_name_type_unique IF NOT EXISTS FOR (e:Entity) REQUIRE (e.name, e.type) IS UNIQUE",
+    ]),
+    (5, "analytics_aggregates", [
+        "CREATE INDEX agg_likes_author_topic IF NOT EXISTS FOR (a:AggLikes) ON (a.author, a.topic)",
+        "CREATE INDEX agg_topic_month_year IF NOT EXISTS FOR (a:AggTopicMonth) ON (a.year)",
+        "CREATE INDEX agg_sentiment_year_author IF NOT EXISTS FOR (a:AggSentimentYear) ON (a.author)",
+        *aggregate_constraints(),
+        rebuild_aggregates,
+    ]),
+    # Name-only seeks for the graph retrieval prefilter (the NER label of a query entity may
+    # differ from the stored one); (name, type) lookups use the constraint of migration 4
+    (6, "entity_name_index", [
+        "CREATE INDEX entity_name IF NOT EXISTS FOR (e:Entity) ON (e.name)",
+    ]),
+    (7, "generation_exemplar_pools", [
+        "CREATE INDEX exemplar_pool_author_topic IF NOT EXISTS FOR (p:ExemplarPool) ON (p.author, p.topic)",
+        rebuild_exemplar_pools,
+    ]),
+    # Databases migrated to 5 before it created the aggregate key constraints: remove the
+    # duplicates left by concurrent loads, then add the constraints (no-op otherwise)
+    (8, "aggregate_key_constraints", [
+        rebuild_aggregates_if_duplicated,
+        *aggregate_constraints(),
+    ]),
+]
+
+
+def applied_versions(session) -> set:
+    return {r["version"] for r in session.run("MATCH (m:SchemaMigration) RETURN m.version AS version")}
+
+
+def apply_migrations(connector: Neo4jConnector) -> list:
+    """
+    Apply the pending migrations in version order.
+
+    Returns:
+        list: The (version, name) of the migrations applied.
+    """
+    done = []
+    with connector.driver.session() as session:
+        applied = applied_versions(session)
+        for version, name, steps in MIGRATIONS:
+            if version in applied:
+                continue
+            print(f"[MIGRATE] Applying {version:03d}_{name}")
+            start = time.perf_counter()
+            for step in steps:
+                if callable(step):
+                    step(session)
+                else:
+                    session.run(step).consume()
+            session.run("CALL db.awaitIndexes(300)").consume()
+            session.run(
+                "MERGE (m:SchemaMigration {version: $version}) SET m.name = $name, m.applied_at = datetime()",
+                version=version, name=name,
+            ).consume()
+            print(f"[MIGRATE] Applied {version:03d}_{name} in {time.perf_counter() - start:.1f}s")
+            done.append((version, name))
+    return done
+
+
+def _db_hits(plan: dict) -> int:
+    return plan.get("dbHits", 0) + sum(_db_hits(child) for child in plan.get("children", []))
+
+
+# Analytics queries as they were before the migrations (string slicing of `date`, full tweet
+# scans instead of aggregate nodes), profiled for the "before" column: the current queries
+# need the typed fields and aggregates, so on the old schema they would match nothing
+LEGACY_QUERIES = {
+    "A_get_years_by_author": """
+    MATCH (t:Tweet) WHERE t.date IS NOT NULL AND t.author = $author
+    RETURN DISTINCT substring(t.date, 0, 4) AS year ORDER BY year
+    """,
+    "A1_get_likes_by_year_for_topic_and_author": """
+    MATCH (t:Tweet) WHERE t.topic = $topic AND t.author = $author
+    WITH t, substring(t.date, 0, 4) AS year
+    RETURN year, sum(t.likes) AS total_likes ORDER BY year
+    """,
+    "A2_get_topic_trend_by_month_year": """
+    MATCH (t:Tweet) WHERE t.date STARTS WITH $year AND t.topic IS NOT NULL AND t.author = $author
+    RETURN substring(t.date, 5, 2) AS month, t.topic AS topic, count(*) AS count ORDER BY month, count DESC
+    """,
+    "A3_get_top_tweets": """
+    MATCH (t:Tweet) WHERE t.likes IS NOT NULL AND t.author = $author
+    RETURN t.text AS content, t.likes AS likes, t.retweets AS retweets,
+        substring(t.date, 0, 10) AS date, t.topic AS topic, t.author AS author
+    ORDER BY t.likes DESC LIMIT 5
+    """,
+    "A4_get_average_sentiment_by_topic": """
+    MATCH (t:Tweet)
+    WHERE t.sentiment IN ['positive', 'neutral', 'negative'] AND t.topic IS NOT NULL AND t.sentiment_confidence IS NOT NULL
+    WITH t.topic AS topic,
+        CASE t.sentiment WHEN 'positive' THEN 1 WHEN 'neutral' THEN 0 WHEN 'negative' THEN -1 END AS s_value,
+        t.sentiment_confidence AS weight
+    RETURN topic, sum(s_value * weight) / sum(weight) AS weighted_average_sentiment
+    ORDER BY weighted_average_sentiment DESC
+    """,
+    "A5_get_average_sentiment_per_year": """
+    MATCH (t:Tweet) WHERE t.author = $author
+    WITH toInteger(split(t.date, "-")[0]) AS year,
+        CASE t.sentiment
+            WHEN "positive" THEN 1.0 * t.sentiment_confidence
+            WHEN "negative" THEN -1.0 * t.sentiment_confidence
+            ELSE 0
+        END AS sentiment_score
+    RETURN year, avg(sentiment_score) AS avg_sentiment ORDER BY year
+    """,
+}
+
+
+def sample_queries(session, legacy: bool = False) -> dict:
+    """
+    Build the connector queries to profile, with parameters taken from the data
+    (`legacy`: the pre-migration versions of the analytics queries).
+    """
+    sample = session.run(
+        "MATCH (t:Tweet) WHERE t.author IS NOT NULL AND t.topic IS NOT NULL "
+        "RETURN t.author AS author, t.topic AS topic, substring(t.date, 0, 4) AS year LIMIT 1"
+    ).single()
+    if sample is None:
+        return {}
+    author, topic, year = sample["author"], sample["topic"], sample["year"]
+    entity = session.run("MATCH (e:Entity)<-[:MENTIONS]-() RETURN e.name AS name LIMIT 1").single()
+    built = {
+        "LLM_get_tweets_by_topic": queries.LLM_get_tweets_by_topic(topic),
+        "LLM_get_tweets_by_author_topic": queries.LLM_get_tweets_by_author_topic(author, topic),
+        "LLM_sample_tweets_by_author_topic": queries.LLM_sample_tweets_by_author_topic(author, topic, 20),
+        "LLM_get_exemplar_pool": queries.LLM_get_exemplar_pool(author, topic, 20),
+        "LLM_get_tweets_by_entities": queries.LLM_get_tweets_by_entities([entity["name"]] if entity else [], 300),
+        "A_get_years_by_author": queries.A_get_years_by_author(author),
+        "A1_get_likes_by_year_for_topic_and_author": queries.A1_get_likes_by_year_for_topic_and_author(topic, author),
+        "A2_get_topic_trend_by_month_year": queries.A2_get_topic_trend_by_month_year(year, author),
+        "A3_get_top_tweets": queries.A3_get_top_tweets("likes", 5, author),
+        "A4_get_average_sentiment_by_topic": queries.A4_get_average_sentiment_by_topic(),
+        "A5_get_average_sentiment_per_year": queries.A5_get_average_sentiment_per_year(author),
+    }
+    if legacy:
+        params = {"author": author, "topic": topic, "year": year}
+        for name, query in LEGACY_QUERIES.items():
+            built[name] = (query, params, None)
+    return built
+
+
+def profile_queries(connector: Neo4jConnector, legacy: bool = False) -> dict:
+    """
+    Run the connector queries (or their pre-migration versions) with PROFILE and return their total db hits.
+    """
+    hits = {}
+    with connector.driver.session() as session:
+        for name, (query, params, _) in sample_queries(session, legacy).items():
+            if query is None:
+                continue
+            summary = session.run("PROFILE " + query, **params).consume()
+            hits[name] = _db_hits(summary.profile) if summary.profile else None
+    return hits
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Apply the Tweet graph schema migrations.")
+    parser.add_argument("--status", action="store_true", help="Only list applied and pending migrations")
+    parser.add_argument("--no-profile", action="store_true", help="Skip the PROFILE db-hit comparison")
+    args = parser.parse_args()
+
+    connector = Neo4jConnector()
+    try:
+        if args.status:
+            with connector.driver.session() as session:
+                applied = applied_versions(session)
+            for version, name, _ in MIGRATIONS:
+                print(f"{version:03d}_{name}: {'applied' if version in applied else 'pending'}")
+        else:
+            before = {} if args.no_profile else profile_queries(connector, legacy=True)
+            done = apply_migrations(connector)
+            if not done:
+                print("[MIGRATE] Schema is up to date.")
+            if not args.no_profile:
+                after = profile_queries(connector)
+                # "before": pre-migration queries on the old schema, "after": current queries on the new one
+                print(f"\n{'query':45} {'legacy db hits':>15} {'db hits after':>15}")
+                for name in after:
+                    print(f"{name:45} {str(before.get(name)):>15} {str(after[name]):>15}")
+    finally:
+        connector.close()
@@ -0,0 +1,95 @@
+"""
+Shared model server: one process owns the NER, zero-shot and encoder models and serves every
+uvicorn worker over a Unix socket, so the models are loaded once whatever the worker count.
+
+Usage (from the `backend` folder):
+    python model_server.py --socket /tmp/tweet-attribution-models.sock
+    MODEL_SERVER_SOCKET=/tmp/tweet-attribution-models.sock uvicorn main:app --workers 4
+
+Texts received from all the workers are coalesced into batches per model (micro-batching),
+results go back as JSON and embeddings as raw float32 buffers (no pickling).
+"""
+import argparse
+import asyncio
+import os
+
+import numpy as np
+
+# This process owns the models: the services must not forward to a model server themselves
+SOCKET_PATH = os.environ.pop("MODEL_SERVER_SOCKET", None) or "/tmp/tweet-attribution-models.sock"
+# nor load the chat LLM, which stays in the backend workers
+os.environ["LLM_BACKEND"] = "lmstudio"
+
+from services.batcher import MicroBatcher
+from services.model_ipc import array_header, read_frame, write_frame
+from services.model_registry import models
+from services.topic_extraction import extract_entities_batch, rank_topics
+from services.tweet_analysis_generation import encode_queries
+
+
+class ModelServer:
+    def __init__(self, batch_size: int = None, max_wait_ms: float = None):
+        batch_size = batch_size or int(os.getenv("MODEL_SERVER_BATCH_SIZE", "64"))
+        self.batchers = {
+            "entities": MicroBatcher("server.entities", extract_entities_batch, batch_size, max_wait_ms),
+            "rank_topics": MicroBatcher("server.rank_topics", rank_topics, batch_size, max_wait_ms),
+            "encode": MicroBatcher("server.encode", encode_queries, batch_size, max_wait_ms),
+        }
+        self.connections = 0
+
+    async def run(self, op: str, texts: list):
+        if op == "status":
+            return models.status()
+        if op == "stats":
+            return {"connections": self.connections, "batchers": [b.stats() for b in self.batchers.values()]}
+        if op not in self.batchers:
+            raise ValueError(f"Unknown operation '{op}'.")
+        # Every text is queued on its own so texts of concurrent workers share batches
+        results = await asyncio.gather(*(self.batchers[op].submit(text) for text in texts))
+        if op == "encode":
+            return np.stack(results).astype(np.float32) if results else np.zeros((0, 0), dtype=np.float32)
+        return results
+
+    async def handle(self, reader, writer):
+        self.connections += 1
+        try:
+            while True:
+                try:
+                    header, _ = await read_frame(reader)
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    break
+                try:
+                    result = await self.run(header["op"], header.get("texts") or [])
+                except Exception as e:
+                    await write_frame(writer, {"ok": False, "error": str(e)})
+                    continue
+                if isinstance(result, np.ndarray):
+                    await write_frame(writer, {"ok": True, "array": array_header(result)}, result)
+                else:
+                    await write_frame(writer, {"ok": True, "result": result})
+        finally:
+            self.connections -= 1
+            writer.close()
+
+
+async def serve(path: str, batch_size: int = None):
+    if os.path.exists(path):
+        os.unlink(path)
+    server = ModelServer(batch_size)
+    unix_server = await asyncio.start_unix_server(server.handle, path=path)
+    os.chmod(path, 0o600)
+    models.start()
+    print(f"[MODEL SERVER] Listening on {path}, loading {', '.join(models.status())}")
+    async with unix_server:
+        await unix_server.serve_forever()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve the NER, zero-shot and encoder models to the backend workers.")
+    parser.add_argument("--socket", default=SOCKET_PATH, help="Unix socket path (env MODEL_SERVER_SOCKET)")
+    parser.add_argument("--batch-size", type=int, help="Maximum texts per model batch (env MODEL_SERVER_BATCH_SIZE, default 64)")
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args.socket, args.batch_size))
+    except KeyboardInterrupt:
+        pass
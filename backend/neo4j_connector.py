@@ -1,9 +1,67 @@
-from neo4j import GraphDatabase
+from neo4j import GraphDatabase, AsyncGraphDatabase, Query
+import functools
+import inspect
 import os
+import time
 from dotenv import load_dotenv
 
+import neo4j_queries as queries
+from services.metrics import record_query
+
 load_dotenv()
 
+
+def _driver_config():
+    """
+    Connection settings shared by the sync and async drivers, read from environment variables.
+    """
+    return {
+        "max_connection_pool_size": int(os.getenv("NEO4J_MAX_POOL_SIZE", "50")),
+        "connection_timeout": float(os.getenv("NEO4J_CONNECTION_TIMEOUT", "15")),
+        "connection_acquisition_timeout": float(os.getenv("NEO4J_ACQUISITION_TIMEOUT", "30")),
+    }
+
+
+def _query(text: str) -> Query:
+    """
+    Wrap a Cypher string with the configured transaction timeout (NEO4J_QUERY_TIMEOUT, seconds).
+    """
+    timeout = os.getenv("NEO4J_QUERY_TIMEOUT")
+    return Query(text, timeout=float(timeout)) if timeout else Query(text)
+
+
+def timed_query(method):
+    """
+    Record the duration and failures of a connector query (sync or async) under its method name.
+    """
+    name = method.__name__
+
+    if inspect.iscoroutinefunction(method):
+        @functools.wraps(method)
+        async def wrapper(*args, **kwargs):
+            start, failed = time.perf_counter(), False
+            try:
+                return await method(*args, **kwargs)
+            except Exception:
+                failed = True
+                raise
+            finally:
+                record_query(name, time.perf_counter() - start, start, failed)
+        return wrapper
+
+    @functools.wraps(method)
+    def wrapper(*args, **kwargs):
+        start, failed = time.perf_counter(), False
+        try:
+            return method(*args, **kwargs)
+        except Exception:
+            failed = True
+            raise
+        finally:
+            record_query(name, time.perf_counter() - start, start, failed)
+    return wrapper
+
+
 class Neo4jConnector:
     def __init__(self):
         """
@@ -11,7 +69,8 @@ class Neo4jConnector:
         """
         self.driver = GraphDatabase.driver(
             os.getenv("NEO4J_URI"),
-            auth=(os.getenv("NEO4J_USER"), os.getenv("NEO4J_PASSWORD"))
+            auth=(os.getenv("NEO4J_USER"), os.getenv("NEO4J_PASSWORD")),
+            **_driver_config()
         )
 
     def close(self):
@@ -19,173 +78,169 @@ class Neo4jConnector:
         Close the Neo4j database connection.
         """
         self.driver.close()
-        
+
+    def _run(self, query: str, params: dict, transform):
+        """
+        Run a query built by `neo4j_queries` and shape its records.
+        """
+        if query is None:
+            return transform([])
+        with self.driver.session() as session:
+            result = session.run(_query(query), **params)
+            return transform([record.data() for record in result])
+
+    @timed_query
     def LLM_get_tweets_by_topic(self, topic: str):
         """
         Retrieve tweets by a specific author and topic from the Neo4j database.
-        
+
         Args:
             topic (str): The topic to filter tweets by.
-            
+
         Returns:
             list: A list of tweets by the specified topic, each represented as a dictionary.
         """
-        """if author not in  ["Obama", "Musk"]:
-            print("[DEBUG] Author not found.")
-            return []"""
-        
-        with self.driver.session() as session:
-            result = session.run(
-                """
-                MATCH (t:Tweet)
-                WHERE t.topic = $topic 
-                RETURN t.text AS text, t.date AS date, t.sentiment AS sentiment, t.author AS author
-                """,
-                
-                topic=topic
-            )
-            return [record.data() for record in result]
+        return self._run(*queries.LLM_get_tweets_by_topic(topic))
+
+    @timed_query
+    def LLM_get_topic_fingerprint(self, topic: str):
+        """
+        Return a cheap fingerprint of the tweets of a topic, used to detect changes
+        to the Tweet nodes without fetching them.
+
+        Args:
+            topic (str): The topic to fingerprint.
+
+        Returns:
+            str: A string combining tweet count, latest date and total text length.
+        """
+        return self._run(*queries.LLM_get_topic_fingerprint(topic))
+
+    @timed_query
+    def LLM_get_corpus_tweets(self):
+        """
+        Retrieve every tweet with the metadata indexed by the global vector index.
+
+        Returns:
+            list: Dictionaries with text, date, author, topic and year.
+        """
+        return self._run(*queries.LLM_get_corpus_tweets())
 
+    @timed_query
+    def LLM_get_corpus_fingerprint(self):
+        """
+        Return a cheap fingerprint of all the Tweet nodes (count, latest date, total text length).
+        """
+        return self._run(*queries.LLM_get_corpus_fingerprint())
+
+    @timed_query
+    def LLM_get_tweets_by_entities(self, names: list, limit: int = 300):
+        """
+        Retrieve the tweets mentioning any of the given entities (Entity -> MENTIONS traversal).
+
+        Args:
+            names (list): Entity names extracted from the query tweet.
+            limit (int): Maximum number of tweets returned.
+
+        Returns:
+            list: Dictionaries with id, text, date, author, topic and `shared` (number of the
+            entities mentioned), most shared entities first.
+        """
+        return self._run(*queries.LLM_get_tweets_by_entities(names, limit))
+
+    @timed_query
     def LLM_get_tweets_by_author_topic(self, author: str, topic: str):
         """
         Retrieve tweets by a specific author and topic for tweet generation.
-        
+
         Args:
             author (str): The author to filter tweets by (e.g., "Obama", "Musk").
             topic (str): The topic to filter tweets by.
-            
+
         Returns:
             list: A list of tweets by the specified author and topic, each as a dictionary.
         """
-        if author not in ["Obama", "Musk"]:
-            print(f"[DEBUG] Author '{author}' not supported for tweet generation.")
-            return []
-        
-        with self.driver.session() as session:
-            result = session.run(
-                """
-                MATCH (t:Tweet)
-                WHERE t.author = $author AND t.topic = $topic
-                RETURN t.text AS text, t.date AS date, t.sentiment AS sentiment, t.author AS author
-                """,
-                author=author,
-                topic=topic
-            )
-            return [record.data() for record in result]
+        return self._run(*queries.LLM_get_tweets_by_author_topic(author, topic))
 
-    def A_get_topics_by_author(self, author: str):
+    @timed_query
+    def LLM_sample_tweets_by_author_topic(self, author: str, topic: str, n: int, stratified: bool = True):
         """
-        Return distinct topics for tweets authored by the given author.
-        
+        Sample tweet texts of an author on a topic inside the database (tweet generation context).
+
         Args:
-            author (str): The author's name to filter tweets by (or 'All')
-            
+            author (str): Any author present in the graph.
+            topic (str): The topic to filter tweets by.
+            n (int): Number of texts.
+            stratified (bool): Spread the sample over the years instead of a uniform sample.
+
         Returns:
-            list: A list of distinct topics associated with the author's tweets.
-        """
-        query = """
-        MATCH (t:Tweet)
-        WHERE t.topic IS NOT NULL
+            list: Up to n tweet texts.
         """
+        return self._run(*queries.LLM_sample_tweets_by_author_topic(author, topic, n, stratified))
 
-        if author != "All":
-            query += " AND t.author = $author"
+    @timed_query
+    def LLM_get_exemplar_pool(self, author: str, topic: str, n: int):
+        """
+        Draw n texts from the precomputed exemplar pool of (author, topic) (empty if none was built).
+        """
+        return self._run(*queries.LLM_get_exemplar_pool(author, topic, n))
 
-        query += """
-        RETURN DISTINCT t.topic AS topic
-        ORDER BY topic
+    @timed_query
+    def A_get_topics_by_author(self, author: str):
         """
+        Return distinct topics for tweets authored by the given author.
 
-        with self.driver.session() as session:
-            result = session.run(query, author=author) if author != "All" else session.run(query)
-            return [record["topic"] for record in result]
+        Args:
+            author (str): The author's name to filter tweets by (or 'All')
 
+        Returns:
+            list: A list of distinct topics associated with the author's tweets.
+        """
+        return self._run(*queries.A_get_topics_by_author(author))
+
+    @timed_query
     def A_get_years_by_author(self, author: str):
         """
         Return distinct years (YYYY) in which the given author has posted tweets.
 
         Args:
             author (str): Author name or "All"
-        
+
         Returns:
             list: A sorted list of years (as strings)
         """
-        query = """
-        MATCH (t:Tweet)
-        WHERE t.date IS NOT NULL
-        """
+        return self._run(*queries.A_get_years_by_author(author))
 
-        if author != "All":
-            query += " AND t.author = $author"
+    @timed_query
+    def A1_get_likes_by_year_for_topic_and_author(self, topic: str, author: str):
 
-        query += """
-        RETURN DISTINCT substring(t.date, 0, 4) AS year
-        ORDER BY year
         """
+        Return number of likes per year for a given topic.
 
-        with self.driver.session() as session:
-            result = session.run(query, author=author) if author != "All" else session.run(query)
-            return [record["year"] for record in result]
-
-    def A1_get_likes_by_year_for_topic_and_author(self, topic: str, author: str):
-        
-        """
-        Return number of likes per year for a given topic. 
-        
         Args:
             topic (str): The topic to filter tweets by.
             author (str): The author to filter tweets by.
-        
+
         Returns:
             list: A list of dictionaries with year and total likes for that year.
         """
-        with self.driver.session() as session:
-            result = session.run(
-                """
-                MATCH (t:Tweet)
-                WHERE t.topic = $topic AND t.author = $author
-                WITH t, substring(t.date, 0, 4) AS year
-                RETURN year, sum(t.likes) AS total_likes
-                ORDER BY year
-                """,
-                topic=topic,
-                author=author
-            )
-            return [{"year": record["year"], "likes": record["total_likes"]} for record in result]
-        
+        return self._run(*queries.A1_get_likes_by_year_for_topic_and_author(topic, author))
+
+    @timed_query
     def A2_get_topic_trend_by_month_year(self, year: str, author: str):
         """
         Retrieve the topic trend for a specific year and author from the Neo4j database.
-        
+
         Args:
             year (str): Year in 'YYYY' format
             author (str): Author name or 'All' for all authors
-        
+
         Returns:
             list: List of {month, topic, count}
         """
-        query = """
-        MATCH (t:Tweet)
-        WHERE t.date STARTS WITH $year
-        AND t.topic IS NOT NULL
-        """
-
-        if author != "All":
-            query += " AND t.author = $author"
-
-        query += """
-        RETURN substring(t.date, 5, 2) AS month, t.topic AS topic, count(*) AS count
-        ORDER BY month, count DESC
-        """
-
-        params = {"year": year}
-        if author != "All":
-            params["author"] = author
-
-        with self.driver.session() as session:
-            result = session.run(query, **params)
-            return result.data()
+        return self._run(*queries.A2_get_topic_trend_by_month_year(year, author))
 
+    @timed_query
     def A3_get_top_tweets(self, metric: str, limit: int, author: str):
         """
         Retrieve top tweets ordered by likes or retweets.
@@ -198,78 +253,123 @@ class Neo4jConnector:
         Returns:
             list: tweets with id, content, likes, retweets, date, and topic
         """
-        assert metric in ["likes", "retweets"]
-        query = f"""
-        MATCH (t:Tweet)
-        WHERE t.{metric} IS NOT NULL
-        """
-        
-        if author != "All":
-            query += " AND t.author = $author"
-            
-        query += f"""
-        RETURN t.text AS content, t.likes AS likes, t.retweets AS retweets,
-            substring(t.date, 0, 10) AS date, t.topic AS topic, t.author AS author
-        ORDER BY t.{metric} DESC
-        LIMIT $limit"""
-        
-        with self.driver.session() as session:
-            params = {"limit": limit}
-            if author != "All":
-                params["author"] = author
-            result = session.run(query, **params)
-            return result.data()
+        return self._run(*queries.A3_get_top_tweets(metric, limit, author))
 
+    @timed_query
     def A4_get_average_sentiment_by_topic(self):
         """
         Retrieve the average sentiment for each topic from the Neo4j database.
-        
+
         Returns:
             list: A list of dictionaries containing the topic and its average sentiment value.
         """
-        with self.driver.session() as session:
-            result = session.run("""
-                MATCH (t:Tweet)
-                WHERE t.sentiment IN ['positive', 'neutral', 'negative'] 
-                AND t.topic IS NOT NULL 
-                AND t.sentiment_confidence IS NOT NULL
-                WITH t.topic AS topic,
-                    CASE t.sentiment
-                        WHEN 'positive' THEN 1
-                        WHEN 'neutral' THEN 0
-                        WHEN 'negative' THEN -1
-                    END AS s_value,
-                    t.sentiment_confidence AS weight
-                RETURN topic, 
-                    sum(s_value * weight) / sum(weight) AS weighted_average_sentiment
-                ORDER BY weighted_average_sentiment DESC
-            """)
-            return [
-                {"topic": row["topic"], "average_sentiment": row["weighted_average_sentiment"]}
-                for row in result
-            ]
+        return self._run(*queries.A4_get_average_sentiment_by_topic())
 
+    @timed_query
     def A5_get_average_sentiment_per_year(self, author):
         """
         Retrieve the average sentiment per year for a given author.
-        
+
         Args:
             author (str): Author to filter tweets by.
-        
+
         Returns:
             list: List of dictionaries with year and average sentiment.
         """
-        with self.driver.session() as session:
-            result = session.run("""
-                MATCH (t:Tweet)
-                WHERE t.author = $author
-                WITH toInteger(split(t.date, "-")[0]) AS year,
-                    CASE t.sentiment
-                        WHEN "positive" THEN 1.0 * t.sentiment_confidence
-                        WHEN "negative" THEN -1.0 * t.sentiment_confidence
-                        ELSE 0
-                    END AS sentiment_score
-                RETURN year, avg(sentiment_score) AS avg_sentiment
-                ORDER BY year
-            """, author=author)
-            return [{"year": record["year"], "avg_sentiment": record["avg_sentiment"]} for record in result]
+        return self._run(*queries.A5_get_average_sentiment_per_year(author))
+
+
+class AsyncNeo4jConnector:
+    """
+    Async variant of `Neo4jConnector` built on the neo4j async driver, so queries
+    do not block the event loop and concurrent requests share the connection pool.
+    Methods run the same queries and return the same shapes as the sync connector.
+    """
+
+    def __init__(self):
+        """
+        Initialize the async Neo4j driver using environment variables
+        (pool size and timeouts: NEO4J_MAX_POOL_SIZE, NEO4J_CONNECTION_TIMEOUT,
+        NEO4J_ACQUISITION_TIMEOUT, NEO4J_QUERY_TIMEOUT).
+        """
+        self.driver = AsyncGraphDatabase.driver(
+            os.getenv("NEO4J_URI"),
+            auth=(os.getenv("NEO4J_USER"), os.getenv("NEO4J_PASSWORD")),
+            **_driver_config()
+        )
+
+    async def close(self):
+        """
+        Close the Neo4j database connection.
+        """
+        await self.driver.close()
+
+    async def _run(self, query: str, params: dict, transform):
+        """
+        Run a query built by `neo4j_queries` and shape its records.
+        """
+        if query is None:
+            return transform([])
+        async with self.driver.session() as session:
+            result = await session.run(_query(query), **params)
+            return transform(await result.data())
+
+    @timed_query
+    async def LLM_get_tweets_by_topic(self, topic: str):
+        return await self._run(*queries.LLM_get_tweets_by_topic(topic))
+
+    @timed_query
+    async def LLM_get_topic_fingerprint(self, topic: str):
+        return await self._run(*queries.LLM_get_topic_fingerprint(topic))
+
+    @timed_query
+    async def LLM_get_corpus_tweets(self):
+        return await self._run(*queries.LLM_get_corpus_tweets())
+
+    @timed_query
+    async def LLM_get_corpus_fingerprint(self):
+        return await self._run(*queries.LLM_get_corpus_fingerprint())
+
+    @timed_query
+    async def LLM_get_tweets_by_entities(self, names: list, limit: int = 300):
+        return await self._run(*queries.LLM_get_tweets_by_entities(names, limit))
+
+    @timed_query
+    async def LLM_get_tweets_by_author_topic(self, author: str, topic: str):
+        return await self._run(*queries.LLM_get_tweets_by_author_topic(author, topic))
+
+    @timed_query
+    async def LLM_sample_tweets_by_author_topic(self, author: str, topic: str, n: int, stratified: bool = True):
+        return await self._run(*queries.LLM_sample_tweets_by_author_topic(author, topic, n, stratified))
+
+    @timed_query
+    async def LLM_get_exemplar_pool(self, author: str, topic: str, n: int):
+        return await self._run(*queries.LLM_get_exemplar_pool(author, topic, n))
+
+    @timed_query
+    async def A_get_topics_by_author(self, author: str):
+        return await self._run(*queries.A_get_topics_by_author(author))
+
+    @timed_query
+    async def A_get_years_by_author(self, author: str):
+        return await self._run(*queries.A_get_years_by_author(author))
+
+    @timed_query
+    async def A1_get_likes_by_year_for_topic_and_author(self, topic: str, author: str):
+        return await self._run(*queries.A1_get_likes_by_year_for_topic_and_author(topic, author))
+
+    @timed_query
+    async def A2_get_topic_trend_by_month_year(self, year: str, author: str):
+        return await self._run(*queries.A2_get_topic_trend_by_month_year(year, author))
+
+    @timed_query
+    async def A3_get_top_tweets(self, metric: str, limit: int, author: str):
+        return await self._run(*queries.A3_get_top_tweets(metric, limit, author))
+
+    @timed_query
+    async def A4_get_average_sentiment_by_topic(self):
+        return await self._run(*queries.A4_get_average_sentiment_by_topic())
+
+    @timed_query
+    async def A5_get_average_sentiment_per_year(self, author):
+        return await self._run(*queries.A5_get_average_sentiment_per_year(author))
@@ -0,0 +1,234 @@
+"""
+Cypher queries shared by the sync (`Neo4jConnector`) and async (`AsyncNeo4jConnector`) connectors.
+
+Each builder returns a `(query, params, transform)` tuple: the connector runs `query`
+with `params` and passes the list of record dictionaries to `transform`, which
+shapes the result returned to the caller. A `None` query means "return transform([])".
+
+The analytics queries filter on the indexed `author`/`topic` properties and on the typed
+`year`/`month`/`day` fields created by `migrate.py`, so the planner can use index seeks
+instead of slicing the `date` string of every tweet. A1, A2, A4 and A5 read the
+materialized aggregate nodes maintained by `aggregates.py`, summing over the matching nodes
+so the result stays right even if an aggregate key ever has more than one node.
+"""
+import random
+
+
+def _rows(records):
+    return records
+
+
+def LLM_get_tweets_by_topic(topic: str):
+    query = """
+    MATCH (t:Tweet)
+    WHERE t.topic = $topic
+    RETURN t.text AS text, t.date AS date, t.sentiment AS sentiment, t.author AS author
+    """
+    return query, {"topic": topic}, _rows
+
+
+def LLM_get_topic_fingerprint(topic: str):
+    query = """
+    MATCH (t:Tweet)
+    WHERE t.topic = $topic
+    RETURN count(t) AS n, max(t.date) AS last_date, sum(size(t.text)) AS text_size
+    """
+    return query, {"topic": topic}, lambda records: f"{records[0]['n']}:{records[0]['last_date']}:{records[0]['text_size']}"
+
+
+def LLM_get_corpus_tweets():
+    query = """
+    MATCH (t:Tweet)
+    WHERE t.text IS NOT NULL
+    RETURN t.text AS text, t.date AS date, t.author AS author, t.topic AS topic, t.year AS year
+    """
+    return query, {}, _rows
+
+
+def LLM_get_corpus_fingerprint():
+    query = """
+    MATCH (t:Tweet)
+    RETURN count(t) AS n, max(t.date) AS last_date, sum(size(t.text)) AS text_size
+    """
+    return query, {}, lambda records: f"{records[0]['n']}:{records[0]['last_date']}:{records[0]['text_size']}"
+
+
+def LLM_get_tweets_by_entities(names: list, limit: int):
+    if not names:
+        return None, {}, _rows
+
+    # Entity seeks on the `entity_name` index, then MENTIONS traversal; tweets sharing the
+    # most query entities first
+    query = """
+    MATCH (e:Entity)
+    WHERE e.name IN $names
+    MATCH (e)<-[:MENTIONS]-(t:Tweet)
+    WITH t, count(DISTINCT e.name) AS shared
+    ORDER BY shared DESC, t.likes DESC
+    LIMIT $limit
+    RETURN t.id AS id, t.text AS text, t.date AS date, t.author AS author, t.topic AS topic, shared
+    """
+    return query, {"names": list(names), "limit": limit}, _rows
+
+
+def LLM_get_tweets_by_author_topic(author: str, topic: str):
+    query = """
+    MATCH (t:Tweet)
+    WHERE t.author = $author AND t.topic = $topic
+    RETURN t.text AS text, t.date AS date, t.sentiment AS sentiment, t.author AS author
+    """
+    return query, {"author": author, "topic": topic}, _rows
+
+
+def LLM_sample_tweets_by_author_topic(author: str, topic: str, n: int, stratified: bool = True):
+    # Sampled in the database, only the texts are returned; stratified samples take the
+    # tweets of every year in turn, so the examples span the author's whole history
+    if stratified:
+        query = """
+        MATCH (t:Tweet)
+        WHERE t.author = $author AND t.topic = $topic
+        WITH t.year AS year, t.text AS text ORDER BY rand()
+        WITH year, collect(text)[..$n] AS texts
+        UNWIND range(0, size(texts) - 1) AS i
+        WITH texts[i] AS text, i ORDER BY i, rand()
+        LIMIT $n
+        RETURN text
+        """
+    else:
+        query = """
+        MATCH (t:Tweet)
+        WHERE t.author = $author AND t.topic = $topic
+        WITH t.text AS text ORDER BY rand()
+        LIMIT $n
+        RETURN text
+        """
+    return query, {"author": author, "topic": topic, "n": n}, lambda records: [r["text"] for r in records]
+
+
+def LLM_get_exemplar_pool(author: str, topic: str, n: int):
+    # One precomputed node per (author, topic), see exemplars.py; n texts drawn from its pool
+    query = """
+    MATCH (p:ExemplarPool {author: $author, topic: $topic})
+    RETURN p.texts AS texts
+    """
+
+    def transform(records):
+        texts = records[0]["texts"] if records else []
+        return random.sample(texts, min(n, len(texts)))
+
+    return query, {"author": author, "topic": topic}, transform
+
+
+def A_get_topics_by_author(author: str):
+    query = """
+    MATCH (t:Tweet)
+    WHERE t.topic IS NOT NULL
+    """
+
+    if author != "All":
+        query += " AND t.author = $author"
+
+    query += """
+    RETURN DISTINCT t.topic AS topic
+    ORDER BY topic
+    """
+    params = {"author": author} if author != "All" else {}
+    return query, params, lambda records: [record["topic"] for record in records]
+
+
+def A_get_years_by_author(author: str):
+    query = """
+    MATCH (t:Tweet)
+    WHERE t.year IS NOT NULL
+    """
+
+    if author != "All":
+        query += " AND t.author = $author"
+
+    query += """
+    RETURN DISTINCT toString(t.year) AS year
+    ORDER BY year
+    """
+    params = {"author": author} if author != "All" else {}
+    return query, params, lambda records: [record["year"] for record in records]
+
+
+def A1_get_likes_by_year_for_topic_and_author(topic: str, author: str):
+    query = """
+    MATCH (a:AggLikes)
+    WHERE a.topic = $topic AND a.author = $author
+    RETURN toString(a.year) AS year, sum(a.likes) AS total_likes
+    ORDER BY year
+    """
+    return query, {"topic": topic, "author": author}, lambda records: [
+        {"year": record["year"], "likes": record["total_likes"]} for record in records
+    ]
+
+
+def A2_get_topic_trend_by_month_year(year: str, author: str):
+    query = """
+    MATCH (a:AggTopicMonth)
+    WHERE a.year = $year
+    """
+
+    if author != "All":
+        query += " AND a.author = $author"
+
+    query += """
+    RETURN right("0" + toString(a.month), 2) AS month, a.topic AS topic, sum(a.tweets) AS count
+    ORDER BY month, count DESC
+    """
+
+    params = {"year": int(year)}
+    if author != "All":
+        params["author"] = author
+    return query, params, _rows
+
+
+def A3_get_top_tweets(metric: str, limit: int, author: str):
+    assert metric in ["likes", "retweets"]
+    query = f"""
+    MATCH (t:Tweet)
+    WHERE t.{metric} IS NOT NULL
+    """
+
+    if author != "All":
+        query += " AND t.author = $author"
+
+    query += f"""
+    RETURN t.text AS content, t.likes AS likes, t.retweets AS retweets,
+        toString(t.day) AS date, t.topic AS topic, t.author AS author
+    ORDER BY t.{metric} DESC
+    LIMIT $limit"""
+
+    params = {"limit": limit}
+    if author != "All":
+        params["author"] = author
+    return query, params, _rows
+
+
+def A4_get_average_sentiment_by_topic():
+    query = """
+    MATCH (a:AggSentimentTopic)
+    WITH a.topic AS topic, sum(a.weighted_sum) AS weighted_sum, sum(a.weight) AS weight
+    WHERE weight > 0
+    RETURN topic, weighted_sum / weight AS weighted_average_sentiment
+    ORDER BY weighted_average_sentiment DESC
+    """
+    return query, {}, lambda records: [
+        {"topic": row["topic"], "average_sentiment": row["weighted_average_sentiment"]} for row in records
+    ]
+
+
+def A5_get_average_sentiment_per_year(author: str):
+    query = """
+    MATCH (a:AggSentimentYear)
+    WHERE a.author = $author
+    WITH a.year AS year, sum(a.score_sum) AS score_sum, sum(a.tweets) AS tweets
+    WHERE tweets > 0
+    RETURN year, score_sum / tweets AS avg_sentiment
+    ORDER BY year
+    """
+    return query, {"author": author}, lambda records: [
+        {"year": record["year"], "avg_sentiment": record["avg_sentiment"]} for record in records
+    ]
@@ -1,7 +1,10 @@
+from typing import Literal, Optional
 from pydantic import BaseModel
 
 class TweetRequest(BaseModel):
     tweet: str
+    mode: Optional[Literal["llm", "vote"]] = None  # Default: ATTRIBUTION_MODE
+    explain: bool = False  # In "vote" mode, always add the LLM explanation
 
 class TweetResponse(BaseModel):
     author: str
@@ -10,4 +13,5 @@ class TweetResponse(BaseModel):
 
 class TweetGenerationRequest(BaseModel):
     author: str
-    topic: str
\ No newline at end of file
+    topic: str
+    sampling: Optional[Literal["pool", "random", "stratified"]] = None  # Context tweets (default: GENERATION_CONTEXT)
\ No newline at end of file
@@ -0,0 +1,117 @@
+import os
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+from services.metrics import metrics
+
+answer_cache_lookups = metrics.counter("answer_cache_lookups_total", "Semantic answer cache lookups.", ["outcome"])
+
+
+class SemanticAnswerCache:
+    """
+    Cache of past /analyze answers looked up by query embedding similarity.
+
+    Each entry keeps the normalized query vector, the topic, the ids of the retrieved
+    context tweets and the final attribution and explanation. A new tweet of the same
+    topic whose cosine similarity with a stored query reaches the threshold reuses that
+    answer (e.g. retweets, trailing-URL or whitespace variants) instead of calling the LLM.
+    Entries expire after a TTL and the least recently used ones are evicted first.
+    """
+
+    def __init__(self, threshold: float = None, max_entries: int = None, ttl: float = None):
+        """
+        Args:
+            threshold (float): Minimum cosine similarity of a hit (env ANSWER_CACHE_THRESHOLD, default 0.95).
+            max_entries (int): Maximum number of answers (env ANSWER_CACHE_SIZE, default 1000, 0 disables the cache).
+            ttl (float): Seconds an answer can be reused (env ANSWER_CACHE_TTL, default 3600).
+        """
+        self.threshold = threshold if threshold is not None else float(os.getenv("ANSWER_CACHE_THRESHOLD", "0.95"))
+        self.max_entries = max_entries if max_entries is not None else int(os.getenv("ANSWER_CACHE_SIZE", "1000"))
+        self.ttl = ttl if ttl is not None else float(os.getenv("ANSWER_CACHE_TTL", "3600"))
+        self._entries = OrderedDict()  # seq -> entry, least recently used first
+        self._seq = 0
+        self.stats = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0, "expired": 0}
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0
+
+    @staticmethod
+    def _normalize(vector) -> np.ndarray:
+        vector = np.asarray(vector, dtype=np.float32).reshape(-1)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm > 0 else vector
+
+    def _purge_expired(self):
+        now = time.monotonic()
+        expired = [seq for seq, entry in self._entries.items() if entry["expires_at"] <= now]
+        for seq in expired:
+            del self._entries[seq]
+        self.stats["expired"] += len(expired)
+
+    def lookup(self, vector, topic: str):
+        """
+        Return the most similar stored answer of the same topic, or None.
+
+        Args:
+            vector: Query embedding of the new tweet.
+            topic (str): Topic predicted for the new tweet.
+
+        Returns:
+            dict: The entry ("predicted_author", "explanation", "context_ids", ...) plus its "similarity".
+        """
+        if not self.enabled:
+            return None
+        self._purge_expired()
+        candidates = [(seq, entry) for seq, entry in self._entries.items() if entry["topic"] == topic]
+        if candidates:
+            similarities = np.stack([entry["vector"] for _, entry in candidates]) @ self._normalize(vector)
+            best = int(np.argmax(similarities))
+            if similarities[best] >= self.threshold:
+                seq, entry = candidates[best]
+                self._entries.move_to_end(seq)
+                self.stats["hits"] += 1
+                answer_cache_lookups.inc(outcome="hit")
+                return dict(entry, similarity=float(similarities[best]))
+        self.stats["misses"] += 1
+        answer_cache_lookups.inc(outcome="miss")
+        return None
+
+    def store(self, vector, topic: str, context_ids: list, predicted_author: str, explanation: str):
+        """
+        Remember the final answer of an /analyze call.
+        """
+        if not self.enabled:
+            return
+        self._seq += 1
+        self._entries[self._seq] = {
+            "vector": self._normalize(vector),
+            "topic": topic,
+            "context_ids": list(context_ids),
+            "predicted_author": predicted_author,
+            "explanation": explanation,
+            "expires_at": time.monotonic() + self.ttl,
+        }
+        self.stats["stores"] += 1
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.stats["evictions"] += 1
+
+    def clear(self):
+        self._entries.clear()
+
+    def summary(self) -> dict:
+        """
+        Counters, hit rate and configuration, for /stats/cache.
+        """
+        lookups = self.stats["hits"] + self.stats["misses"]
+        return dict(
+            self.stats,
+            entries=len(self._entries),
+            hit_rate=round(self.stats["hits"] / lookups, 4) if lookups else None,
+            threshold=self.threshold,
+            max_entries=self.max_entries,
+            ttl=self.ttl,
+        )
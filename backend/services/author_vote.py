@@ -0,0 +1,107 @@
+import json
+import math
+import os
+
+# Default location of the calibration written by evaluate_author_vote.py
+DEFAULT_CALIBRATION_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache", "author_vote.json")
+
+
+class KNNAuthorClassifier:
+    """
+    Predict the author of a tweet from the authors of its retrieved neighbours.
+
+    Each neighbour votes for its author with weight exp(-distance / temperature) (squared L2
+    distance between normalized embeddings, i.e. 2 - 2 cos). The probability of an author is
+    its share of the votes, smoothed with `alpha` pseudo-votes per author. Temperature and
+    smoothing are fitted on the dataset (minimum log loss) by evaluate_author_vote.py, which
+    writes them to the calibration file loaded here.
+    """
+
+    def __init__(self, calibration_path: str = None, margin: float = None):
+        """
+        Args:
+            calibration_path (str): JSON file with "temperature", "alpha" and "authors"
+                (env AUTHOR_VOTE_CALIBRATION, default backend/.cache/author_vote.json).
+            margin (float): Probability margin between the two most likely authors above which
+                the vote is trusted without an LLM explanation (env AUTHOR_VOTE_MARGIN, default 0.5).
+        """
+        self.calibration_path = calibration_path or os.getenv("AUTHOR_VOTE_CALIBRATION", DEFAULT_CALIBRATION_PATH)
+        self.margin = margin if margin is not None else float(os.getenv("AUTHOR_VOTE_MARGIN", "0.5"))
+        self.temperature = 0.5
+        self.alpha = 0.5
+        self.authors = ["Obama", "Musk"]
+        self.calibrated = False
+        if os.path.exists(self.calibration_path):
+            with open(self.calibration_path, encoding="utf-8") as f:
+                self.set_calibration(**json.load(f))
+
+    def set_calibration(self, temperature: float, alpha: float, authors: list = None, **_):
+        self.temperature = temperature
+        self.alpha = alpha
+        self.authors = authors or self.authors
+        self.calibrated = True
+
+    def calibration(self) -> dict:
+        return {"temperature": self.temperature, "alpha": self.alpha, "authors": self.authors}
+
+    def probabilities(self, neighbours: list, temperature: float = None, alpha: float = None) -> dict:
+        """
+        Author probabilities given the neighbour rows ("author" and "distance").
+        """
+        temperature = temperature if temperature is not None else self.temperature
+        alpha = alpha if alpha is not None else self.alpha
+        authors = list(self.authors) + sorted({row["author"] for row in neighbours} - set(self.authors))
+        votes = dict.fromkeys(authors, alpha)
+        for row in neighbours:
+            votes[row["author"]] += math.exp(-row.get("distance", 0.0) / temperature)
+        total = sum(votes.values())
+        return {author: vote / total for author, vote in votes.items()}
+
+    def predict(self, neighbours: list) -> dict:
+        """
+        Returns:
+            dict: "predicted_author", its "probability", the "margin" over the runner-up,
+            "confident" (margin above the threshold), the "probabilities" of every author
+            and the number of "neighbours".
+        """
+        probabilities = self.probabilities(neighbours)
+        ranked = sorted(probabilities.items(), key=lambda item: item[1], reverse=True)
+        margin = ranked[0][1] - (ranked[1][1] if len(ranked) > 1 else 0.0)
+        return {
+            "predicted_author": ranked[0][0],
+            "probability": ranked[0][1],
+            "margin": margin,
+            "confident": bool(neighbours) and margin >= self.margin,
+            "probabilities": probabilities,
+            "neighbours": len(neighbours),
+        }
+
+    def explain(self, vote: dict, neighbours: list) -> str:
+        """
+        Short explanation of a vote, used when the LLM is skipped.
+        """
+        same = sum(row["author"] == vote["predicted_author"] for row in neighbours)
+        return (f"{same} of the {len(neighbours)} most similar tweets were written by {vote['predicted_author']} "
+                f"(probability {vote['probability']:.0%}).")
+
+
+def log_loss(probabilities: list, truths: list) -> float:
+    """
+    Mean negative log-likelihood of the true authors.
+    """
+    return -sum(math.log(max(p.get(t, 0.0), 1e-12)) for p, t in zip(probabilities, truths)) / max(1, len(truths))
+
+
+def expected_calibration_error(confidences: list, correct: list, bins: int = 10) -> float:
+    """
+    Mean gap between confidence and accuracy over equal-width confidence bins, weighted by bin size.
+    """
+    total, error = len(confidences), 0.0
+    for b in range(bins):
+        low, high = b / bins, (b + 1) / bins
+        members = [i for i, c in enumerate(confidences) if low < c <= high or (b == 0 and c == 0)]
+        if members:
+            accuracy = sum(correct[i] for i in members) / len(members)
+            confidence = sum(confidences[i] for i in members) / len(members)
+            error += len(members) / total * abs(accuracy - confidence)
+    return error
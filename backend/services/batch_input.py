@@ -0,0 +1,60 @@
+import csv
+import io
+import json
+
+
+class BatchInputError(ValueError):
+    pass
+
+
+def parse_batch_items(body: bytes, content_type: str, max_items: int) -> list:
+    """
+    Parse the body of a batch request into {"id", "tweet"} items.
+
+    Accepted bodies:
+        - JSON (application/json): an array of strings or of objects with a "tweet" (or "text")
+          field and an optional "id";
+        - CSV (text/csv): a header row with a "Text" (or "tweet") column and an optional "id" column.
+    Items without an id get their 0-based position in the input.
+
+    Raises:
+        BatchInputError: The body is malformed, empty or has more than `max_items` tweets.
+    """
+    try:
+        text = body.decode("utf-8-sig")
+    except UnicodeDecodeError as e:
+        raise BatchInputError(f"The body must be UTF-8 encoded: {e}")
+    if "csv" in (content_type or ""):
+        reader = csv.DictReader(io.StringIO(text))
+        records = list(reader)
+        column = next((c for c in ("Text", "text", "tweet") if c in (reader.fieldnames or [])), None)
+        if column is None:
+            raise BatchInputError("The CSV needs a 'Text' or 'tweet' column.")
+    else:
+        try:
+            records = json.loads(text)
+        except json.JSONDecodeError as e:
+            raise BatchInputError(f"Invalid JSON: {e}")
+        if not isinstance(records, list):
+            raise BatchInputError("The JSON body must be an array.")
+        column = None
+
+    items = []
+    for position, record in enumerate(records):
+        if isinstance(record, str):
+            item = {"id": position, "tweet": record}
+        elif isinstance(record, dict):
+            tweet = record.get(column) if column else record.get("tweet", record.get("text"))
+            item_id = record.get("id")
+            item = {"id": position if item_id in (None, "") else item_id, "tweet": tweet}
+        else:
+            raise BatchInputError(f"Item {position} must be a string or an object.")
+        if not isinstance(item["tweet"], str) or not item["tweet"].strip():
+            raise BatchInputError(f"Item {item['id']} has no tweet text.")
+        items.append(item)
+
+    if not items:
+        raise BatchInputError("The batch is empty.")
+    if len(items) > max_items:
+        raise BatchInputError(f"The batch has {len(items)} tweets, the limit is {max_items}.")
+    return items
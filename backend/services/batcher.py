@@ -0,0 +1,113 @@
+import logging
+import asyncio
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+
+class MicroBatcher:
+    """
+    Coalesce items submitted by concurrent requests into batches for a model call.
+
+    Callers `await submit(item)` and receive their own result. A background task waits
+    for the first pending item, then keeps collecting until `max_batch_size` items are
+    queued or `max_wait_ms` elapsed, and runs `batch_fn(items)` in a worker thread so
+    the event loop is never blocked by the model.
+    """
+
+    def __init__(self, name: str, batch_fn, max_batch_size: int = None, max_wait_ms: float = None, executor=None):
+        """
+        Args:
+            name (str): Name used in logs and stats.
+            batch_fn (callable): Function mapping a list of items to a list of results (same order).
+            max_batch_size (int): Maximum number of items per batch (env BATCH_MAX_SIZE, default 16).
+            max_wait_ms (float): Maximum time the first item of a batch waits for others (env BATCH_MAX_WAIT_MS, default 10).
+            executor (Executor): Executor running `batch_fn` (default: a dedicated single thread).
+        """
+        self.name = name
+        self.batch_fn = batch_fn
+        self.max_batch_size = max_batch_size or int(os.getenv("BATCH_MAX_SIZE", "16"))
+        self.max_wait = (max_wait_ms if max_wait_ms is not None else float(os.getenv("BATCH_MAX_WAIT_MS", "10"))) / 1000
+        self.executor = executor or ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"batch-{name}")
+        self._queue = None
+        self._worker = None
+        self._stats = {"batches": 0, "items": 0, "max_batch_size": 0, "queue_wait_total": 0.0, "queue_wait_max": 0.0}
+
+    def _ensure_worker(self):
+        if self._worker is None or self._worker.done():
+            self._queue = asyncio.Queue()
+            self._worker = asyncio.get_running_loop().create_task(self._run())
+
+    async def submit(self, item):
+        """
+        Queue one item and wait for its result.
+        """
+        self._ensure_worker()
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((item, future, time.perf_counter()))
+        return await future
+
+    async def _collect(self):
+        batch = [await self._queue.get()]
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect()
+            # Callers that gave up (e.g. cancelled requests) are not processed
+            batch = [entry for entry in batch if not entry[1].done()]
+            if not batch:
+                continue
+
+            started = time.perf_counter()
+            waits = [started - enqueued for _, _, enqueued in batch]
+            self._stats["batches"] += 1
+            self._stats["items"] += len(batch)
+            self._stats["max_batch_size"] = max(self._stats["max_batch_size"], len(batch))
+            self._stats["queue_wait_total"] += sum(waits)
+            self._stats["queue_wait_max"] = max(self._stats["queue_wait_max"], max(waits))
+
+            try:
+                results = await loop.run_in_executor(self.executor, self.batch_fn, [item for item, _, _ in batch])
+            except Exception as e:
+                logger.warning(f"Batch '{self.name}' of {len(batch)} items failed: {e}")
+                for _, future, _ in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            for (_, future, _), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+
+    def stats(self) -> dict:
+        """
+        Return batch-size and queue-wait statistics.
+
+        Returns:
+            dict: Counters plus average batch size and average/max queue wait in milliseconds.
+        """
+        s = self._stats
+        return {
+            "name": self.name,
+            "batches": s["batches"],
+            "items": s["items"],
+            "avg_batch_size": round(s["items"] / s["batches"], 2) if s["batches"] else 0.0,
+            "max_batch_size": s["max_batch_size"],
+            "avg_queue_wait_ms": round(1000 * s["queue_wait_total"] / s["items"], 3) if s["items"] else 0.0,
+            "max_queue_wait_ms": round(1000 * s["queue_wait_max"], 3),
+            "pending": self._queue.qsize() if self._queue is not None else 0,
+            "config": {"max_batch_size": self.max_batch_size, "max_wait_ms": self.max_wait * 1000},
+        }
@@ -0,0 +1,259 @@
+import logging
+import os
+import threading
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Default location of the Tweet snapshot read by the columnar engine
+DEFAULT_SNAPSHOT_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache", "analytics_snapshot.parquet")
+
+SNAPSHOT_QUERY = """
+MATCH (t:Tweet)
+RETURN t.id AS id, t.text AS text, t.author AS author, t.topic AS topic,
+    t.sentiment AS sentiment, t.sentiment_confidence AS sentiment_confidence,
+    t.likes AS likes, t.retweets AS retweets, t.year AS year, t.month AS month,
+    toString(t.day) AS day
+"""
+
+DICTIONARY_COLUMNS = ["author", "topic", "sentiment"]
+SENTIMENT_VALUES = {"positive": 1.0, "neutral": 0.0, "negative": -1.0}
+
+
+def _require_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError as e:
+        raise ImportError("The columnar analytics backend needs pyarrow (pip install pyarrow).") from e
+    return pyarrow, pyarrow.parquet
+
+
+def export_snapshot(connector, path: str = None, batch_size: int = 50000) -> int:
+    """
+    Export the Tweet properties used by the analytics endpoints to a Parquet snapshot.
+    Author, topic and sentiment are dictionary-encoded. The file is replaced atomically,
+    so a running engine picks up the new snapshot on its next call.
+
+    Args:
+        connector (Neo4jConnector): Source database.
+        path (str): Snapshot file (env ANALYTICS_SNAPSHOT, default backend/.cache/analytics_snapshot.parquet).
+        batch_size (int): Rows per Parquet row group.
+
+    Returns:
+        int: Number of tweets exported.
+    """
+    pa, pq = _require_pyarrow()
+    path = path or os.getenv("ANALYTICS_SNAPSHOT", DEFAULT_SNAPSHOT_PATH)
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+    schema = pa.schema([
+        ("id", pa.string()), ("text", pa.string()),
+        ("author", pa.dictionary(pa.int32(), pa.string())),
+        ("topic", pa.dictionary(pa.int32(), pa.string())),
+        ("sentiment", pa.dictionary(pa.int32(), pa.string())),
+        ("sentiment_confidence", pa.float64()),
+        ("likes", pa.int64()), ("retweets", pa.int64()),
+        ("year", pa.int32()), ("month", pa.int32()), ("day", pa.string()),
+    ])
+
+    def write(writer, rows):
+        columns = {name: [row[name] for row in rows] for name in schema.names}
+        arrays = [
+            pa.array(columns[field.name], type=field.type.value_type).dictionary_encode()
+            if field.name in DICTIONARY_COLUMNS else pa.array(columns[field.name], type=field.type)
+            for field in schema
+        ]
+        writer.write_table(pa.Table.from_arrays(arrays, schema=schema))
+
+    total = 0
+    with pq.ParquetWriter(path + ".tmp", schema) as writer, connector.driver.session() as session:
+        rows = []
+        for record in session.run(SNAPSHOT_QUERY):
+            rows.append(record.data())
+            if len(rows) >= batch_size:
+                write(writer, rows)
+                total, rows = total + len(rows), []
+        if rows:
+            write(writer, rows)
+            total += len(rows)
+    os.replace(path + ".tmp", path)
+    return total
+
+
+class ColumnarAnalytics:
+    """
+    Read-only analytics engine over a Parquet snapshot of the Tweet graph.
+
+    The snapshot is loaded as NumPy column arrays (dictionary codes for author/topic/
+    sentiment, integers for year/month) and the A-methods of `Neo4jConnector` are
+    answered with vectorized group-bys and top-k selection. The snapshot is reloaded
+    when the file changes. Methods are async and return the same shapes as
+    `AsyncNeo4jConnector`, so the routes can use either.
+    """
+
+    def __init__(self, path: str = None):
+        """
+        Args:
+            path (str): Snapshot file (env ANALYTICS_SNAPSHOT, default backend/.cache/analytics_snapshot.parquet).
+        """
+        self.path = path or os.getenv("ANALYTICS_SNAPSHOT", DEFAULT_SNAPSHOT_PATH)
+        self._lock = threading.Lock()
+        self._mtime = None
+        self.columns = None
+        self.categories = {}
+
+    def _load(self):
+        _, pq = _require_pyarrow()
+        # Row groups carry their own dictionaries: unify them so codes are global
+        table = pq.read_table(self.path, read_dictionary=DICTIONARY_COLUMNS).unify_dictionaries()
+        columns, categories = {}, {}
+        for name in DICTIONARY_COLUMNS:
+            array = table.column(name).combine_chunks()
+            categories[name] = array.dictionary.to_pylist()
+            columns[name] = array.indices.fill_null(-1).to_numpy(zero_copy_only=False).astype(np.int32)
+        for name in ["year", "month"]:
+            columns[name] = table.column(name).fill_null(-1).to_numpy().astype(np.int32)
+        for name in ["likes", "retweets"]:
+            column = table.column(name)
+            columns[name] = column.fill_null(0).to_numpy().astype(np.int64)
+            columns[name + "_valid"] = column.is_valid().to_numpy(zero_copy_only=False)
+        columns["sentiment_confidence"] = table.column("sentiment_confidence").to_numpy(zero_copy_only=False).astype(np.float64)
+        for name in ["text", "day"]:
+            columns[name] = np.asarray(table.column(name).to_pylist(), dtype=object)
+        return columns, categories
+
+    @classmethod
+    def from_rows(cls, rows: list):
+        """
+        Build an engine over in-memory tweet rows (dicts with the snapshot columns)
+        instead of a Parquet file; it is never reloaded.
+        """
+        engine = cls.__new__(cls)
+        engine.path, engine._lock, engine._mtime = None, threading.Lock(), None
+        columns, categories = {}, {}
+        for name in DICTIONARY_COLUMNS:
+            values = [row.get(name) for row in rows]
+            categories[name] = sorted({v for v in values if v is not None})
+            codes = {v: i for i, v in enumerate(categories[name])}
+            columns[name] = np.array([codes[v] if v is not None else -1 for v in values], dtype=np.int32)
+        for name in ["year", "month"]:
+            columns[name] = np.array([row.get(name) if row.get(name) is not None else -1 for row in rows], dtype=np.int32)
+        for name in ["likes", "retweets"]:
+            columns[name] = np.array([row.get(name) or 0 for row in rows], dtype=np.int64)
+            columns[name + "_valid"] = np.array([row.get(name) is not None for row in rows], dtype=bool)
+        columns["sentiment_confidence"] = np.array(
+            [row.get("sentiment_confidence") if row.get("sentiment_confidence") is not None else np.nan for row in rows], dtype=np.float64
+        )
+        for name in ["text", "day"]:
+            columns[name] = np.array([row.get(name) for row in rows], dtype=object)
+        engine.columns, engine.categories = columns, categories
+        return engine
+
+    def _snapshot(self):
+        """
+        Return the current columns, reloading them when the snapshot file changed.
+        """
+        if self.path is None:
+            return self.columns
+        mtime = os.path.getmtime(self.path)
+        if mtime != self._mtime:
+            with self._lock:
+                if mtime != self._mtime:
+                    self.columns, self.categories = self._load()
+                    self._mtime = mtime
+                    logger.info(f"Columnar analytics snapshot loaded: {len(self.columns['year'])} tweets")
+        return self.columns
+
+    def _code(self, column: str, value) -> int:
+        try:
+            return self.categories[column].index(value)
+        except ValueError:
+            return -2  # Matches no row (nulls are -1)
+
+    def _author_mask(self, c, author: str):
+        return np.ones(len(c["year"]), dtype=bool) if author == "All" else c["author"] == self._code("author", author)
+
+    async def A_get_topics_by_author(self, author: str):
+        c = self._snapshot()
+        codes = np.unique(c["topic"][self._author_mask(c, author) & (c["topic"] >= 0)])
+        return sorted(self.categories["topic"][i] for i in codes)
+
+    async def A_get_years_by_author(self, author: str):
+        c = self._snapshot()
+        years = np.unique(c["year"][self._author_mask(c, author) & (c["year"] >= 0)])
+        return sorted(str(y) for y in years)
+
+    async def A1_get_likes_by_year_for_topic_and_author(self, topic: str, author: str):
+        c = self._snapshot()
+        mask = (c["topic"] == self._code("topic", topic)) & (c["author"] == self._code("author", author)) & (c["year"] >= 0)
+        years, inverse = np.unique(c["year"][mask], return_inverse=True)
+        likes = np.bincount(inverse, weights=c["likes"][mask], minlength=len(years))
+        return [{"year": str(y), "likes": int(l)} for y, l in zip(years, likes)]
+
+    async def A2_get_topic_trend_by_month_year(self, year: str, author: str):
+        c = self._snapshot()
+        mask = self._author_mask(c, author) & (c["year"] == int(year)) & (c["topic"] >= 0) & (c["month"] >= 0)
+        n_topics = len(self.categories["topic"])
+        keys = c["month"][mask].astype(np.int64) * n_topics + c["topic"][mask]
+        groups, counts = np.unique(keys, return_counts=True)
+        rows = [
+            {"month": f"{g // n_topics:02d}", "topic": self.categories["topic"][g % n_topics], "count": int(n)}
+            for g, n in zip(groups, counts)
+        ]
+        return sorted(rows, key=lambda r: (r["month"], -r["count"]))
+
+    async def A3_get_top_tweets(self, metric: str, limit: int, author: str):
+        assert metric in ["likes", "retweets"]
+        c = self._snapshot()
+        candidates = np.flatnonzero(self._author_mask(c, author) & c[metric + "_valid"])
+        values = c[metric][candidates]
+        if 0 < limit < len(candidates):
+            part = np.argpartition(-values, limit - 1)[:limit]
+            candidates, values = candidates[part], values[part]
+        top = candidates[np.argsort(-values, kind="stable")][:max(limit, 0)]
+
+        def label(column, i):
+            code = c[column][i]
+            return self.categories[column][code] if code >= 0 else None
+
+        return [
+            {
+                "content": c["text"][i],
+                "likes": int(c["likes"][i]) if c["likes_valid"][i] else None,
+                "retweets": int(c["retweets"][i]) if c["retweets_valid"][i] else None,
+                "date": c["day"][i],
+                "topic": label("topic", i),
+                "author": label("author", i),
+            }
+            for i in top
+        ]
+
+    async def A4_get_average_sentiment_by_topic(self):
+        c = self._snapshot()
+        values = np.array([SENTIMENT_VALUES.get(s, np.nan) for s in self.categories["sentiment"]] + [np.nan])
+        s_value = values[c["sentiment"]]  # Code -1 picks the trailing NaN
+        weight = c["sentiment_confidence"]
+        mask = ~np.isnan(s_value) & (c["topic"] >= 0) & ~np.isnan(weight)
+        n_topics = len(self.categories["topic"])
+        weighted = np.bincount(c["topic"][mask], weights=s_value[mask] * weight[mask], minlength=n_topics)
+        weights = np.bincount(c["topic"][mask], weights=weight[mask], minlength=n_topics)
+        present = np.bincount(c["topic"][mask], minlength=n_topics) > 0
+        rows = [
+            {"topic": self.categories["topic"][i], "average_sentiment": float(weighted[i] / weights[i])}
+            for i in np.flatnonzero(present)
+        ]
+        return sorted(rows, key=lambda r: r["average_sentiment"], reverse=True)
+
+    async def A5_get_average_sentiment_per_year(self, author):
+        c = self._snapshot()
+        signs = np.array([1.0 if s == "positive" else -1.0 if s == "negative" else 0.0 for s in self.categories["sentiment"]] + [0.0])
+        sign = signs[c["sentiment"]]
+        # Positive/negative scores are confidence-weighted (NaN confidence -> skipped), others count as 0
+        score = np.where(sign != 0, sign * c["sentiment_confidence"], 0.0)
+        mask = (c["author"] == self._code("author", author)) & (c["year"] >= 0) & ~np.isnan(score)
+        years, inverse = np.unique(c["year"][mask], return_inverse=True)
+        sums = np.bincount(inverse, weights=score[mask], minlength=len(years))
+        counts = np.bincount(inverse, minlength=len(years))
+        return [{"year": int(y), "avg_sentiment": float(s / n)} for y, s, n in zip(years, sums, counts)]
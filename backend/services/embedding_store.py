@@ -0,0 +1,136 @@
+import fcntl
+import hashlib
+import json
+import os
+
+import numpy as np
+
+# Default location of the shared embedding matrix
+DEFAULT_STORE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache", "embeddings")
+
+
+def tweet_id(date: str, text: str) -> str:
+    """
+    Compute the stable identifier of a tweet from its date and text
+    (the same pair the dataset script uses to identify Tweet nodes).
+
+    Args:
+        date (str): The tweet date as stored in the dataset.
+        text (str): The tweet text.
+
+    Returns:
+        str: A 16 hex characters identifier.
+    """
+    return hashlib.sha1(f"{date}\x1f{text}".encode("utf-8")).hexdigest()[:16]
+
+
+class EmbeddingStore:
+    """
+    Append-only float32 embedding matrix stored as a raw file and opened with `np.memmap`.
+
+    The matrix lives in `embeddings.f32` and the tweet-id -> row mapping in `ids.json`.
+    Readers map the file read-only, so several backend workers share the same pages
+    through the OS page cache instead of each holding a private copy in RAM.
+    """
+
+    def __init__(self, store_dir: str = None):
+        """
+        Args:
+            store_dir (str): Folder holding `embeddings.f32` and `ids.json`.
+        """
+        self.store_dir = store_dir or os.getenv("EMBEDDING_STORE_DIR", DEFAULT_STORE_DIR)
+        self.matrix_path = os.path.join(self.store_dir, "embeddings.f32")
+        self.ids_path = os.path.join(self.store_dir, "ids.json")
+        self.lock_path = os.path.join(self.store_dir, ".lock")
+        self.model = None
+        self.dim = None
+        self.ids = []
+        self.rows = {}
+        self.matrix = None
+        self._loaded_mtime = None
+        self.reload()
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __contains__(self, tid: str):
+        return tid in self.rows
+
+    def reload(self):
+        """
+        (Re)open the mapping and the matrix when `ids.json` changed on disk.
+        """
+        if not os.path.exists(self.ids_path):
+            return
+        mtime = os.path.getmtime(self.ids_path)
+        if mtime == self._loaded_mtime:
+            return
+        with open(self.ids_path, encoding="utf-8") as f:
+            meta = json.load(f)
+        self.model, self.dim, self.ids = meta["model"], meta["dim"], meta["ids"]
+        self.rows = {tid: i for i, tid in enumerate(self.ids)}
+        self.matrix = np.memmap(self.matrix_path, dtype=np.float32, mode="r", shape=(len(self.ids), self.dim)) if self.ids else None
+        self._loaded_mtime = mtime
+
+    def get(self, tids, model: str = None):
+        """
+        Look up the vectors of several tweets.
+
+        Args:
+            tids (list): Tweet identifiers.
+            model (str): Encoder the vectors must come from; nothing is found when the store
+                holds another encoder's vectors.
+
+        Returns:
+            tuple: (np.ndarray of found vectors, list of positions in `tids` that were found)
+        """
+        self.reload()
+        if model is not None and self.model is not None and self.model != model:
+            return np.empty((0, self.dim or 0), dtype=np.float32), []
+        found = [i for i, tid in enumerate(tids) if tid in self.rows]
+        if not found:
+            return np.empty((0, self.dim or 0), dtype=np.float32), []
+        return np.asarray(self.matrix[[self.rows[tids[i]] for i in found]]), found
+
+    def add(self, tids, vectors, model: str):
+        """
+        Append new vectors; identifiers already in the store are skipped.
+
+        Args:
+            tids (list): Tweet identifiers, aligned with `vectors`.
+            vectors (np.ndarray): Matrix of shape (len(tids), dim).
+            model (str): Name of the encoder that produced the vectors.
+
+        Returns:
+            int: Number of rows actually appended.
+        """
+        os.makedirs(self.store_dir, exist_ok=True)
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        with open(self.lock_path, "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            self._loaded_mtime = None
+            self.reload()
+            if self.model is not None and (self.model != model or self.dim != vectors.shape[1]):
+                raise ValueError(f"Store holds {self.model} ({self.dim}d) vectors, got {model} ({vectors.shape[1]}d)")
+
+            keep, seen = [], set()
+            for i, tid in enumerate(tids):
+                if tid not in self.rows and tid not in seen:
+                    keep.append(i)
+                    seen.add(tid)
+            if not keep:
+                return 0
+
+            # The matrix is written before the mapping, so readers never see ids without rows.
+            # Rows past the committed ids (left by a crash between the two writes) are cut
+            # first, otherwise every later row would be read at the wrong position
+            with open(self.matrix_path, "ab") as f:
+                f.truncate(len(self.ids) * vectors.shape[1] * vectors.itemsize)
+                f.write(vectors[keep].tobytes())
+            ids = self.ids + [tids[i] for i in keep]
+            with open(self.ids_path + ".tmp", "w", encoding="utf-8") as f:
+                json.dump({"model": model, "dim": int(vectors.shape[1]), "ids": ids}, f)
+            os.replace(self.ids_path + ".tmp", self.ids_path)
+            self._loaded_mtime = None
+            self.reload()
+            return len(keep)
@@ -0,0 +1,434 @@
+import logging
+import json
+import os
+import threading
+import time
+
+import faiss
+import numpy as np
+
+from services.embedding_store import tweet_id
+
+logger = logging.getLogger(__name__)
+
+# Default location of the persisted corpus-wide index
+DEFAULT_INDEX_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache", "global_index")
+
+METADATA_COLUMNS = ["author", "topic"]
+
+
+class GlobalVectorIndex:
+    """
+    Corpus-wide HNSW index of the tweet embeddings with per-vector metadata (author, topic, year).
+
+    Searches can be restricted with metadata filters (e.g. topic in the top-2 predicted
+    topics, author in a set): large filtered sets are searched with HNSW and an ID selector,
+    small ones exactly. The index is refreshed when the corpus fingerprint stored in Neo4j
+    changes: new tweets are added, removed ones are tombstoned and changed metadata is
+    updated in place; the index is rebuilt once too many vectors are tombstoned. Vectors
+    come from the current index or the embedding store; only unknown tweets are encoded.
+    """
+
+    def __init__(self, encode, index_dir: str = None, check_interval: float = None, store=None,
+                 m: int = None, ef_construction: int = None, ef_search: int = None, exact_below: int = None,
+                 encoder_id: str = None):
+        """
+        Args:
+            encode (callable): Function embedding a list of texts into float32 vectors.
+            encoder_id (str): Identity of `encode` (model and backend); a persisted index or
+                stored vectors of another encoder are not used.
+            index_dir (str): Folder of the persisted index (env GLOBAL_INDEX_DIR, default backend/.cache/global_index).
+            check_interval (float): Seconds between two fingerprint checks (env VECTOR_INDEX_CHECK_SECONDS, default 60).
+            store (EmbeddingStore): Optional precomputed embeddings, looked up by tweet id.
+            m (int): HNSW neighbours per node (env GLOBAL_INDEX_M, default 32).
+            ef_construction (int): HNSW build beam width (env GLOBAL_INDEX_EF_CONSTRUCTION, default 200).
+            ef_search (int): HNSW search beam width (env GLOBAL_INDEX_EF_SEARCH, default 64).
+            exact_below (int): Filtered sets up to this size are searched exactly (env GLOBAL_INDEX_EXACT_BELOW, default 2000).
+        """
+        self.encode = encode
+        self.encoder_id = encoder_id
+        self.store = store
+        self.index_dir = index_dir or os.getenv("GLOBAL_INDEX_DIR", DEFAULT_INDEX_DIR)
+        self.check_interval = check_interval if check_interval is not None else float(os.getenv("VECTOR_INDEX_CHECK_SECONDS", "60"))
+        self.m = m or int(os.getenv("GLOBAL_INDEX_M", "32"))
+        self.ef_construction = ef_construction or int(os.getenv("GLOBAL_INDEX_EF_CONSTRUCTION", "200"))
+        self.ef_search = ef_search or int(os.getenv("GLOBAL_INDEX_EF_SEARCH", "64"))
+        self.exact_below = exact_below if exact_below is not None else int(os.getenv("GLOBAL_INDEX_EXACT_BELOW", "2000"))
+        self.rebuild_ratio = float(os.getenv("GLOBAL_INDEX_REBUILD_RATIO", "0.2"))
+        self._lock = threading.RLock()  # Guards the index state; held by searches and the swaps
+        self._update_lock = threading.RLock()  # One refresh / update at a time
+        self._loaded = False
+        self.index = None
+        self.rows = []  # {"id", "text", "author", "topic", "year"}, aligned with the index ids
+        self.alive = np.zeros(0, dtype=bool)
+        self.fingerprint = None
+        self.checked_at = 0.0
+        self._categories = {name: {} for name in METADATA_COLUMNS}
+        self._codes = {name: np.zeros(0, dtype=np.int32) for name in METADATA_COLUMNS}
+        self._years = np.zeros(0, dtype=np.int32)
+        self._positions = None  # Tweet id -> index id, built on first use
+
+    # Metadata -------------------------------------------------------------------------
+
+    @staticmethod
+    def _code(categories: dict, value) -> int:
+        if value is None:
+            return -1
+        return categories.setdefault(value, len(categories))
+
+    def _encode_metadata(self, rows: list, categories: dict):
+        codes = {name: np.array([self._code(categories[name], row[name]) for row in rows], dtype=np.int32) for name in METADATA_COLUMNS}
+        years = np.array([row["year"] if row.get("year") is not None else -1 for row in rows], dtype=np.int32)
+        return codes, years
+
+    def _install(self, index, rows: list, alive, fingerprint, categories: dict = None, codes: dict = None, years=None):
+        """
+        Swap in a new index state in one step (metadata encoded from `rows` when not given).
+        """
+        if categories is None:
+            categories = {name: {} for name in METADATA_COLUMNS}
+            codes, years = self._encode_metadata(rows, categories)
+        with self._lock:
+            self.index, self.rows, self.alive, self.fingerprint = index, rows, alive, fingerprint
+            self._categories, self._codes, self._years = categories, codes, years
+            self._positions = None
+
+    def _filter_mask(self, topics=None, authors=None, years=None, ids=None):
+        """
+        Boolean mask of the live vectors matching the filters.
+        """
+        mask = self.alive.copy()
+        if ids is not None:
+            if self._positions is None:
+                self._positions = {row["id"]: i for i, row in enumerate(self.rows)}
+            selected = np.zeros(len(mask), dtype=bool)
+            selected[[self._positions[i] for i in ids if i in self._positions]] = True
+            mask &= selected
+        for name, values in (("topic", topics), ("author", authors)):
+            if values:
+                codes = [self._categories[name][v] for v in values if v in self._categories[name]]
+                mask &= np.isin(self._codes[name], codes)
+        if years:
+            mask &= np.isin(self._years, [int(y) for y in years])
+        return mask
+
+    def filter_size(self, topics=None, authors=None, years=None, ids=None) -> int:
+        """
+        Number of live vectors a search with these filters ranks (its search set).
+        """
+        with self._lock:
+            return int(self._filter_mask(topics, authors, years, ids).sum())
+
+    # Persistence ----------------------------------------------------------------------
+
+    def _paths(self):
+        return os.path.join(self.index_dir, "index.faiss"), os.path.join(self.index_dir, "meta.json")
+
+    def _load_from_disk(self):
+        index_path, meta_path = self._paths()
+        if not (os.path.exists(index_path) and os.path.exists(meta_path)):
+            return
+        try:
+            with open(meta_path, encoding="utf-8") as f:
+                meta = json.load(f)
+            index = faiss.read_index(index_path)
+        except Exception as e:
+            logger.warning(f"Could not load the global index: {e}")
+            return
+        if index.ntotal != len(meta["rows"]):
+            return
+        if meta.get("encoder") != self.encoder_id:
+            logger.info(f"Global index built with encoder {meta.get('encoder')}, not {self.encoder_id}: rebuilding")
+            return
+        self._install(index, meta["rows"], np.array(meta["alive"], dtype=bool), meta["fingerprint"])
+        logger.info(f"Global index loaded: {int(self.alive.sum())} live vectors")
+
+    def _save_to_disk(self):
+        os.makedirs(self.index_dir, exist_ok=True)
+        index_path, meta_path = self._paths()
+        faiss.write_index(self.index, index_path + ".tmp")
+        with open(meta_path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump({"encoder": self.encoder_id, "fingerprint": self.fingerprint, "rows": self.rows, "alive": self.alive.tolist()}, f)
+        os.replace(index_path + ".tmp", index_path)
+        os.replace(meta_path + ".tmp", meta_path)
+
+    # Build / refresh ------------------------------------------------------------------
+
+    def _new_index(self, dim: int):
+        index = faiss.IndexHNSWFlat(dim, self.m)
+        index.hnsw.efConstruction = self.ef_construction
+        index.hnsw.efSearch = self.ef_search
+        return index
+
+    def _vectors(self, rows: list, known: dict) -> np.ndarray:
+        """
+        Vectors of `rows`, taken from the current index (`known`: id -> position), the
+        embedding store, or encoded.
+        """
+        vectors = [None] * len(rows)
+        for i, row in enumerate(rows):
+            if row["id"] in known:
+                vectors[i] = self.index.reconstruct(int(known[row["id"]]))
+        reused = sum(v is not None for v in vectors)
+
+        stored = 0
+        if self.store is not None:
+            pending = [i for i, v in enumerate(vectors) if v is None]
+            found_vectors, found = self.store.get([rows[i]["id"] for i in pending], model=self.encoder_id)
+            for vector, pos in zip(found_vectors, found):
+                vectors[pending[pos]] = vector
+            stored = len(found)
+
+        missing = [i for i, v in enumerate(vectors) if v is None]
+        for start in range(0, len(missing), 1024):
+            batch = missing[start:start + 1024]
+            for i, vector in zip(batch, self.encode([rows[i]["text"] for i in batch])):
+                vectors[i] = vector
+        logger.debug(f"Global index vectors: {len(rows)} ({len(missing)} encoded, {reused} reused, {stored} from store)")
+        return np.vstack(vectors).astype(np.float32)
+
+    def _build(self, rows: list, known: dict):
+        vectors = self._vectors(rows, known)
+        index = self._new_index(vectors.shape[1])
+        index.add(vectors)
+        return index
+
+    def update(self, tweets: list, fingerprint=None):
+        """
+        Bring the index in line with the corpus: add new tweets, tombstone removed ones and
+        update changed metadata, or rebuild when the tombstones exceed GLOBAL_INDEX_REBUILD_RATIO.
+
+        The new state is prepared (and new tweets encoded) while searches keep using the
+        current one; they only wait for the final swap.
+
+        Args:
+            tweets (list): Dictionaries with text, date, author, topic and year.
+            fingerprint: Corpus fingerprint the index now corresponds to.
+        """
+        rows, seen = [], set()
+        for t in tweets:
+            row = {"id": tweet_id(t["date"], t["text"]), "text": t["text"], "author": t.get("author"), "topic": t.get("topic"), "year": t.get("year")}
+            if row["id"] not in seen:
+                seen.add(row["id"])
+                rows.append(row)
+
+        # Only this (serialized) writer replaces the state, so it can be read without `_lock`
+        with self._update_lock:
+            start = time.perf_counter()
+            known = {row["id"]: i for i, row in enumerate(self.rows) if self.alive[i]}
+            removed = [i for tid, i in known.items() if tid not in seen]
+            added = [row for row in rows if row["id"] not in known]
+            dead = int((~self.alive).sum()) + len(removed)
+
+            if self.index is None or not rows or dead > self.rebuild_ratio * max(1, len(self.rows) + len(added)):
+                if rows:
+                    self._install(self._build(rows, known), rows, np.ones(len(rows), dtype=bool), fingerprint)
+                else:
+                    self._install(None, [], np.zeros(0, dtype=bool), fingerprint)
+                action = "rebuilt"
+            else:
+                # Updated copies of the rows and metadata arrays, swapped in with the new vectors
+                new_rows, alive = list(self.rows), self.alive.copy()
+                categories = {name: dict(values) for name, values in self._categories.items()}
+                codes = {name: values.copy() for name, values in self._codes.items()}
+                years = self._years.copy()
+                alive[removed] = False
+                changed = 0
+                for row in rows:
+                    i = known.get(row["id"])
+                    if i is not None and any(new_rows[i][k] != row[k] for k in ("author", "topic", "year")):
+                        new_rows[i] = row
+                        for name in METADATA_COLUMNS:
+                            codes[name][i] = self._code(categories[name], row[name])
+                        years[i] = row["year"] if row["year"] is not None else -1
+                        changed += 1
+                vectors = None
+                if added:
+                    vectors = self._vectors(added, {})
+                    added_codes, added_years = self._encode_metadata(added, categories)
+                    for name in METADATA_COLUMNS:
+                        codes[name] = np.concatenate([codes[name], added_codes[name]])
+                    years = np.concatenate([years, added_years])
+                    new_rows.extend(added)
+                    alive = np.concatenate([alive, np.ones(len(added), dtype=bool)])
+                with self._lock:
+                    # FAISS indexes are not safe to extend while searched
+                    if vectors is not None:
+                        self.index.add(vectors)
+                    self._install(self.index, new_rows, alive, fingerprint, categories, codes, years)
+                action = f"extended (+{len(added)}, -{len(removed)}, {changed} updated)"
+
+            self.checked_at = time.monotonic()
+            if self.index is not None:
+                self._save_to_disk()
+            logger.info(f"Global index {action}: {int(self.alive.sum())} live vectors in {time.perf_counter() - start:.1f}s")
+
+    def refresh(self, connector):
+        """
+        Load the persisted index, then update it when the corpus fingerprint changed
+        (checked at most every `check_interval` seconds). While another thread refreshes a
+        loaded index, this returns at once and searches use the current one.
+
+        Args:
+            connector: Sync connector providing LLM_get_corpus_fingerprint / LLM_get_corpus_tweets.
+        """
+        if not self._update_lock.acquire(blocking=self.index is None):
+            return
+        try:
+            if not self._loaded:
+                self._load_from_disk()
+                self._loaded = True
+            now = time.monotonic()
+            if self.index is not None and now - self.checked_at < self.check_interval:
+                return
+            fingerprint = connector.LLM_get_corpus_fingerprint()
+            if self.index is not None and fingerprint == self.fingerprint:
+                self.checked_at = now
+                return
+            self.update(connector.LLM_get_corpus_tweets(), fingerprint)
+        finally:
+            self._update_lock.release()
+
+    # Search ---------------------------------------------------------------------------
+
+    def _search_ids(self, vectors, k: int, mask, exact: bool = None, ef_search: int = None) -> list:
+        """
+        Ids and distances of the k nearest vectors within `mask` for each query row; `exact`
+        True/False forces the exact/HNSW search, None picks exact search for small filtered sets.
+        """
+        queries = np.asarray(vectors, dtype=np.float32).reshape(-1, self.index.d)
+        candidates = np.flatnonzero(mask)
+        if len(candidates) == 0:
+            return [(np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)) for _ in queries]
+        k = min(k, len(candidates))
+
+        if exact or (exact is None and len(candidates) <= self.exact_below):
+            stored = self.index.reconstruct_batch(candidates)
+            distances = (queries ** 2).sum(1)[:, None] - 2 * queries @ stored.T + (stored ** 2).sum(1)[None, :]
+            results = []
+            for row in distances:
+                order = np.argsort(row, kind="stable")[:k]
+                results.append((candidates[order], row[order]))
+            return results
+
+        params = faiss.SearchParametersHNSW()
+        params.efSearch = max(ef_search or self.ef_search, k)
+        if len(candidates) < len(mask):
+            bitmap = np.packbits(mask, bitorder="little")
+            params.sel = faiss.IDSelectorBitmap(len(mask), faiss.swig_ptr(bitmap))
+        distances, ids = self.index.search(queries, k, params=params)
+        return [(row_ids[row_ids >= 0], row_d[row_ids >= 0]) for row_ids, row_d in zip(ids, distances)]
+
+    def search(self, vector, k: int = 10, topics=None, authors=None, years=None, ids=None, exact: bool = None) -> list:
+        """
+        Return the k nearest live tweets matching the metadata filters.
+
+        Args:
+            vector: Query embedding.
+            k (int): Number of neighbours.
+            topics / authors / years (iterable): Keep only tweets whose metadata is in the set.
+            ids (iterable): Keep only these tweet ids (e.g. the candidates of a graph prefilter).
+            exact (bool): Force an exact (True) or approximate (False) search; by default
+                filtered sets of up to `exact_below` tweets are searched exactly.
+
+        Returns:
+            list: Row dictionaries ("id", "text", "author", "topic", "year") with their "distance", nearest first.
+        """
+        with self._lock:
+            if self.index is None:
+                return []
+            ids, distances = self._search_ids(vector, k, self._filter_mask(topics, authors, years, ids), exact)[0]
+            return [dict(self.rows[i], distance=float(d)) for i, d in zip(ids, distances)]
+
+    def search_batch(self, vectors, k: int = 10, topics: list = None, exact: bool = None) -> list:
+        """
+        Search several queries at once. Queries sharing the same topic filter are answered
+        with a single matrix search.
+
+        Args:
+            vectors: Query embeddings, one per row.
+            k (int): Number of neighbours per query.
+            topics (list): Topic filter of each query (None or an empty list: no filter).
+            exact (bool): As in `search`.
+
+        Returns:
+            list: For each query (in input order), the row dictionaries of `search`.
+        """
+        vectors = np.asarray(vectors, dtype=np.float32)
+        topics = topics or [None] * len(vectors)
+        results = [[] for _ in range(len(vectors))]
+        with self._lock:
+            if self.index is None or len(vectors) == 0:
+                return results
+            vectors = vectors.reshape(len(vectors), -1)
+            groups = {}
+            for position, query_topics in enumerate(topics):
+                groups.setdefault(tuple(sorted(query_topics or [])), []).append(position)
+            for query_topics, positions in groups.items():
+                mask = self._filter_mask(topics=list(query_topics))
+                found = self._search_ids(vectors[positions], k, mask, exact)
+                for position, (ids, distances) in zip(positions, found):
+                    results[position] = [dict(self.rows[i], distance=float(d)) for i, d in zip(ids, distances)]
+        return results
+
+    def recall_at_k(self, queries: int = 200, k: int = 10, ef_search: int = None, filter_topics: int = 0, seed: int = 0) -> dict:
+        """
+        Recall of the approximate search against exact search, using stored tweets as queries
+        (the query tweet itself is excluded from both result lists).
+
+        Args:
+            queries (int): Number of sampled query tweets.
+            k (int): Neighbours compared.
+            ef_search (int): HNSW beam width to evaluate (default: the configured one).
+            filter_topics (int): When > 0, filter each search on the query topic plus
+                `filter_topics - 1` other random topics (as /analyze does with the top-2 topics).
+            seed (int): Sampling seed.
+
+        Returns:
+            dict: recall, mean ms per query of both searches, and the parameters.
+        """
+        with self._lock:
+            rng = np.random.default_rng(seed)
+            live = np.flatnonzero(self.alive)
+            sample = rng.choice(live, size=min(queries, len(live)), replace=False)
+            topics = list(self._categories["topic"])
+            hits = total = 0
+            ann_s = exact_s = 0.0
+            for i in sample:
+                mask = self.alive.copy()
+                if filter_topics > 0 and self.rows[i]["topic"] is not None:
+                    others = [t for t in topics if t != self.rows[i]["topic"]]
+                    chosen = [self.rows[i]["topic"]] + list(rng.choice(others, size=min(filter_topics - 1, len(others)), replace=False))
+                    mask = self._filter_mask(topics=chosen)
+                mask[i] = False
+                vector = self.index.reconstruct(int(i))
+
+                start = time.perf_counter()
+                ann, _ = self._search_ids(vector, k, mask, exact=False, ef_search=ef_search)[0]
+                ann_s += time.perf_counter() - start
+                start = time.perf_counter()
+                exact, _ = self._search_ids(vector, k, mask, exact=True)[0]
+                exact_s += time.perf_counter() - start
+
+                hits += len(set(ann.tolist()) & set(exact.tolist()))
+                total += len(exact)
+            return {
+                "k": k,
+                "queries": len(sample),
+                "ef_search": ef_search or self.ef_search,
+                "filter_topics": filter_topics,
+                "recall": hits / total if total else None,
+                "ann_ms_per_query": 1000 * ann_s / max(1, len(sample)),
+                "exact_ms_per_query": 1000 * exact_s / max(1, len(sample)),
+            }
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "vectors": len(self.rows),
+                "live": int(self.alive.sum()),
+                "tombstoned": int((~self.alive).sum()),
+                "m": self.m,
+                "ef_search": self.ef_search,
+                "fingerprint": self.fingerprint,
+            }
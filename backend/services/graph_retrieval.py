@@ -0,0 +1,66 @@
+import os
+
+from services.metrics import metrics
+from services.topic_extraction import filter_entities
+
+# Candidate tweets fetched through the entity graph per query, and whether they are merged with
+# the topic-filtered embedding neighbours (1) or only topped up with them when too few (0)
+GRAPH_PREFILTER_LIMIT = int(os.getenv("GRAPH_PREFILTER_LIMIT", "300"))
+GRAPH_PREFILTER_MERGE = os.getenv("GRAPH_PREFILTER_MERGE", "1") == "1"
+
+graph_candidates = metrics.histogram(
+    "retrieval_graph_candidates", "Candidate tweets returned by the entity-graph prefilter.",
+    buckets=(0, 10, 25, 50, 100, 200, 300, 500, 1000),
+)
+
+
+def entity_names(entities) -> list:
+    """
+    Distinct names of the (text, label) entities worth a graph lookup (no dates, numbers, ...).
+    """
+    return sorted({name.strip() for name, _ in filter_entities(entities) if name.strip()})
+
+
+def merge_neighbours(row_lists: list, k: int) -> list:
+    """
+    The k nearest distinct tweets of several neighbour lists (rows with "id" and "distance").
+    """
+    best = {}
+    for rows in row_lists:
+        for row in rows:
+            if row["id"] not in best or row["distance"] < best[row["id"]]["distance"]:
+                best[row["id"]] = dict(best.get(row["id"], {}), **row)
+    return sorted(best.values(), key=lambda row: row["distance"])[:k]
+
+
+def graph_search(index, connector, vector, entities, topics: list, k: int = 10, limit: int = None, merge: bool = None) -> tuple:
+    """
+    Entity-graph prefiltered retrieval: the tweets that MENTION the query entities are fetched
+    with indexed Entity lookups, then ranked exactly by embedding distance, so the search set is
+    a few hundred related tweets instead of whole topics.
+
+    Args:
+        index (GlobalVectorIndex): Refreshed corpus-wide index (vectors looked up by tweet id).
+        connector: Sync connector providing LLM_get_tweets_by_entities.
+        vector: Query embedding.
+        entities (list): (text, label) entities of the query tweet.
+        topics (list): Topic filter of the embedding neighbours merged in / used as fallback.
+        k (int): Number of neighbours.
+        limit (int): Maximum graph candidates (default GRAPH_PREFILTER_LIMIT).
+        merge (bool): Merge with the embedding neighbours (default GRAPH_PREFILTER_MERGE);
+            otherwise they only fill up when the graph yields fewer than k tweets.
+
+    Returns:
+        tuple: The k nearest rows (graph ones carry "shared_entities") and the number of graph candidates.
+    """
+    limit = limit or GRAPH_PREFILTER_LIMIT
+    merge = GRAPH_PREFILTER_MERGE if merge is None else merge
+    names = entity_names(entities)
+    candidates = connector.LLM_get_tweets_by_entities(names, limit) if names else []
+    graph_candidates.observe(len(candidates))
+
+    shared = {row["id"]: row["shared"] for row in candidates}
+    rows = [dict(row, shared_entities=shared[row["id"]]) for row in index.search(vector, k, ids=shared, exact=True)] if shared else []
+    if merge or len(rows) < k:
+        rows = merge_neighbours([rows, index.search(vector, k, topics=topics)], k)
+    return rows, len(candidates)
@@ -0,0 +1,179 @@
+"""
+In-process llama.cpp chat backend (LLM_BACKEND=llama_cpp, needs `pip install llama-cpp-python`).
+
+Every request starts with the same system prompt, so its KV cache is evaluated once per
+distinct system prompt, saved with `Llama.save_state` and restored with `load_state`:
+only the per-request user prompt (and the generated tokens) are evaluated. When two
+consecutive requests share the system prompt, the state is not even restored, llama.cpp
+reuses the longest common token prefix of the previous prompt (which also covers the
+fixed scaffolding at the start of the user prompt).
+"""
+import asyncio
+import codecs
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from services.model_registry import models, model_source
+from services.tweet_analysis_generation import LLMBackend
+
+# Prompt templates: system part (cached prefix), user part + assistant header, stop strings
+PROMPT_FORMATS = {
+    "llama-3": {
+        "prefix": "<|begin_of_text|><|start_header_id|>system<|end_header_id|>\n\n{system}<|eot_id|>",
+        "suffix": "<|start_header_id|>user<|end_header_id|>\n\n{user}<|eot_id|><|start_header_id|>assistant<|end_header_id|>\n\n",
+        "stop": ["<|eot_id|>"],
+    },
+    "chatml": {
+        "prefix": "<|im_start|>system\n{system}<|im_end|>\n",
+        "suffix": "<|im_start|>user\n{user}<|im_end|>\n<|im_start|>assistant\n",
+        "stop": ["<|im_end|>"],
+    },
+    # Instruct/Output format of phi-2 (see prompting/local_prompting.ipynb)
+    "phi-2": {
+        "prefix": "{system}\n",
+        "suffix": "Instruct: {user}\nOutput:",
+        "stop": ["\nInstruct:"],
+    },
+}
+
+
+def _held_back(text: str, stops: list) -> int:
+    """
+    Length of the end of `text` that could be the start of a stop string.
+    """
+    return max((i for stop in stops for i in range(1, len(stop)) if text.endswith(stop[:i])), default=0)
+
+
+class LlamaCppBackend(LLMBackend):
+    """
+    llama.cpp model loaded in the backend process (GGUF file), one generation at a time.
+    """
+
+    name = "llama_cpp"
+
+    def __init__(self, model_path: str = None, n_ctx: int = None, n_threads: int = None, n_batch: int = None,
+                 prompt_format: str = None, prefix_cache_size: int = None):
+        """
+        Args:
+            model_path (str): GGUF model file (env LLAMA_MODEL_PATH).
+            n_ctx (int): Context size in tokens (env LLAMA_N_CTX, default 4096).
+            n_threads (int): CPU threads (env LLAMA_THREADS, default 0 = llama.cpp default).
+            n_batch (int): Prompt evaluation batch size (env LLAMA_N_BATCH, default 512).
+            prompt_format (str): Key of PROMPT_FORMATS (env LLAMA_PROMPT_FORMAT, default llama-3).
+            prefix_cache_size (int): System prompts whose KV state is kept (env LLAMA_PREFIX_CACHE_SIZE, default 8).
+        """
+        super().__init__()
+        self.model_path = model_path or model_source("LLAMA_MODEL_PATH", os.path.join("models", "llama-3.1-8b-instruct.Q4_K_M.gguf"))
+        self.n_ctx = n_ctx or int(os.getenv("LLAMA_N_CTX", "4096"))
+        self.n_threads = n_threads or int(os.getenv("LLAMA_THREADS", "0")) or None
+        self.n_batch = n_batch or int(os.getenv("LLAMA_N_BATCH", "512"))
+        self.format = PROMPT_FORMATS[prompt_format or os.getenv("LLAMA_PROMPT_FORMAT", "llama-3")]
+        self.prefix_cache_size = prefix_cache_size or int(os.getenv("LLAMA_PREFIX_CACHE_SIZE", "8"))
+        self._prefix_states = OrderedDict()  # system prompt -> (prefix tokens, saved state), least recently used first
+        self._active_prefix = None
+        # The llama.cpp context is not thread-safe: generations run one at a time on this thread
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="llama-cpp")
+        self._stats.update(prefix_hits=0, prefix_misses=0, prompt_tokens=0, evaluated_prompt_tokens=0)
+        models.register("llm", self._load, self.model_path)
+
+    def _load(self):
+        from llama_cpp import Llama
+        return Llama(model_path=self.model_path, n_ctx=self.n_ctx, n_threads=self.n_threads, n_batch=self.n_batch, verbose=False)
+
+    def _tokenize(self, llm, text: str) -> list:
+        return llm.tokenize(text.encode("utf-8"), add_bos=False, special=True)
+
+    def _restore_prefix(self, llm, system_prompt: str) -> list:
+        """
+        Put the KV cache of the system prompt in the context (evaluating and saving it on
+        first use) and return its tokens.
+        """
+        entry = self._prefix_states.get(system_prompt)
+        if entry is None:
+            self._stats["prefix_misses"] += 1
+            tokens = self._tokenize(llm, self.format["prefix"].format(system=system_prompt))
+            llm.reset()
+            llm.eval(tokens)
+            self._prefix_states[system_prompt] = (tokens, llm.save_state())
+            while len(self._prefix_states) > self.prefix_cache_size:
+                self._prefix_states.popitem(last=False)
+        else:
+            self._stats["prefix_hits"] += 1
+            self._prefix_states.move_to_end(system_prompt)
+            tokens, state = entry
+            if self._active_prefix != system_prompt:
+                llm.load_state(state)
+        self._active_prefix = system_prompt
+        return tokens
+
+    def _generate(self, system_prompt: str, user_prompt: str, temperature: float, max_tokens: int, emit, cancelled):
+        """
+        Blocking generation: calls `emit(text)` for each decoded piece until a stop token,
+        `max_tokens` or `cancelled` is set.
+        """
+        llm = models.get("llm")
+        prefix = self._restore_prefix(llm, system_prompt)
+        prompt = prefix + self._tokenize(llm, self.format["suffix"].format(user=user_prompt))
+        if len(prompt) + max_tokens > self.n_ctx:
+            raise ValueError(f"Prompt of {len(prompt)} tokens does not fit the {self.n_ctx}-token context (LLAMA_N_CTX).")
+        # Tokens already in the KV cache (restored prefix or common prefix with the previous prompt)
+        reused = next((i for i, (a, b) in enumerate(zip(llm._input_ids, prompt)) if a != b), min(llm.n_tokens, len(prompt)))
+        self._stats["prompt_tokens"] += len(prompt)
+        self._stats["evaluated_prompt_tokens"] += len(prompt) - reused
+
+        stops = self.format["stop"]
+        stop_ids = {llm.token_eos()} | {ids[0] for ids in (self._tokenize(llm, stop) for stop in stops) if len(ids) == 1}
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        pending = ""
+        for n, token in enumerate(llm.generate(prompt, temp=temperature, top_k=40, top_p=0.95, repeat_penalty=1.1)):
+            if cancelled.is_set() or token in stop_ids or n >= max_tokens:
+                break
+            pending += decoder.decode(llm.detokenize([token]))
+            hits = [pending.find(stop) for stop in stops if stop in pending]
+            if hits:
+                pending = pending[:min(hits)]
+                break
+            # Hold back text that may be the start of a stop string
+            keep = _held_back(pending, stops)
+            if len(pending) > keep:
+                emit(pending[:len(pending) - keep])
+                pending = pending[len(pending) - keep:]
+        if pending and not cancelled.is_set():
+            emit(pending)
+
+    async def _stream_chat(self, system_prompt: str, user_prompt: str, temperature: float, max_tokens: int):
+        loop = asyncio.get_running_loop()
+        queue = asyncio.Queue()
+        cancelled = threading.Event()
+        done = object()
+
+        def put(item):
+            try:
+                loop.call_soon_threadsafe(queue.put_nowait, item)
+            except RuntimeError:
+                pass  # Event loop closed (shutdown)
+
+        def run():
+            try:
+                self._generate(system_prompt, user_prompt, temperature, max_tokens, put, cancelled)
+                put(done)
+            except Exception as e:
+                put(e)
+
+        loop.run_in_executor(self.executor, run)
+        try:
+            while True:
+                item = await queue.get()
+                if item is done:
+                    return
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            # Consumer gone (client disconnected) or finished: stop decoding
+            cancelled.set()
+
+    def stats(self) -> dict:
+        return dict(super().stats(), cached_prefixes=len(self._prefix_states), n_ctx=self.n_ctx, n_threads=self.n_threads)
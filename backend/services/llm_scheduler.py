@@ -0,0 +1,188 @@
+import asyncio
+import math
+import os
+import time
+from contextlib import asynccontextmanager
+
+from services.metrics import metrics
+
+llm_queue_wait = metrics.histogram("llm_queue_wait_seconds", "Time LLM calls waited for a free slot.", ["kind"])
+llm_rejections = metrics.counter("llm_rejections_total", "LLM calls rejected because the wait queue was full.", ["kind"])
+
+
+class LLMQueueFull(Exception):
+    """
+    Raised by `LLMScheduler.admit` when the wait queue is full.
+    """
+
+    def __init__(self, kind: str, retry_after: int):
+        super().__init__(f"The LLM queue is full for '{kind}' requests.")
+        self.kind = kind
+        self.retry_after = retry_after
+
+
+class LLMTicket:
+    """
+    Place of one LLM call in the scheduler: waiting, then holding a slot until released.
+    """
+
+    def __init__(self, kind: str, priority: int, seq: int):
+        self.kind = kind
+        self.priority = priority
+        self.seq = seq
+        self.enqueued_at = time.perf_counter()
+        self.granted_at = None
+        self.granted = asyncio.Event()
+        self.changed = asyncio.Event()  # Set when the ticket moves in the queue or is granted
+        self.position = 0  # 1-based place among the waiting tickets, 0 once granted
+        self.released = False
+
+
+class LLMScheduler:
+    """
+    Admission control in front of the LLM.
+
+    At most `concurrency` LLM calls run at once. Other calls wait in a queue ordered by
+    priority class (classes earlier in `priorities` go first, FIFO within a class). A new
+    call is rejected at once (`admit` raises LLMQueueFull, answered with 429 and Retry-After)
+    when `max_queue` calls of the same or a higher priority are already waiting, so bursts
+    of interactive requests fail fast instead of all timing out, and lower classes (e.g. batch
+    jobs) never cause the rejection of higher ones.
+    """
+
+    def __init__(self, concurrency: int = None, max_queue: int = None, priorities: list = None):
+        """
+        Args:
+            concurrency (int): Concurrent LLM calls (env LLM_CONCURRENCY, default 2).
+            max_queue (int): Waiting calls of a priority class and above before rejecting (env LLM_MAX_QUEUE, default 16).
+            priorities (list): Call kinds, highest priority first (env LLM_PRIORITIES, default "attribution,generation,batch").
+        """
+        self.concurrency = concurrency or int(os.getenv("LLM_CONCURRENCY", "2"))
+        self.max_queue = max_queue if max_queue is not None else int(os.getenv("LLM_MAX_QUEUE", "16"))
+        self.priorities = priorities or os.getenv("LLM_PRIORITIES", "attribution,generation,batch").split(",")
+        self.active = 0
+        self._waiting = []  # Tickets, in grant order
+        self._seq = 0
+        self._mean_hold = None  # Moving average of the slot hold time, for Retry-After
+        self._stats = {kind: {"admitted": 0, "rejected": 0, "wait_total": 0.0, "wait_max": 0.0} for kind in self.priorities}
+
+    def _priority(self, kind: str) -> int:
+        return self.priorities.index(kind) if kind in self.priorities else len(self.priorities)
+
+    def _kind_stats(self, kind: str) -> dict:
+        return self._stats.setdefault(kind, {"admitted": 0, "rejected": 0, "wait_total": 0.0, "wait_max": 0.0})
+
+    def retry_after(self, waiting_ahead: int) -> int:
+        """
+        Seconds after which a rejected caller may retry: time for the queue ahead to drain.
+        """
+        hold = self._mean_hold if self._mean_hold is not None else 5.0
+        return max(1, math.ceil(hold * (waiting_ahead + 1) / self.concurrency))
+
+    def admit(self, kind: str) -> LLMTicket:
+        """
+        Queue a `kind` call, or raise LLMQueueFull if it would have to wait behind `max_queue`
+        others. The check and the enqueue happen in one step (no await in between), so a
+        burst of requests cannot all pass the check against the same queue; always `release`
+        the returned ticket.
+        """
+        if self.active >= self.concurrency:
+            ahead = sum(ticket.priority <= self._priority(kind) for ticket in self._waiting)
+            if ahead >= self.max_queue:
+                self._kind_stats(kind)["rejected"] += 1
+                llm_rejections.inc(kind=kind)
+                raise LLMQueueFull(kind, self.retry_after(ahead))
+        return self.reserve(kind)
+
+    def reserve(self, kind: str) -> LLMTicket:
+        """
+        Queue a call (granted at once when a slot is free); always `release` the ticket.
+        """
+        self._seq += 1
+        ticket = LLMTicket(kind, self._priority(kind), self._seq)
+        self._waiting.append(ticket)
+        self._waiting.sort(key=lambda t: (t.priority, t.seq))
+        self._dispatch()
+        return ticket
+
+    def release(self, ticket: LLMTicket):
+        """
+        Free the slot of a granted ticket, or leave the queue (caller gone while waiting).
+        Releasing a ticket again is a no-op.
+        """
+        if ticket.released:
+            return
+        ticket.released = True
+        if ticket.granted.is_set():
+            self.active -= 1
+            hold = time.perf_counter() - ticket.granted_at
+            self._mean_hold = hold if self._mean_hold is None else 0.8 * self._mean_hold + 0.2 * hold
+        elif ticket in self._waiting:
+            self._waiting.remove(ticket)
+        self._dispatch()
+
+    def _dispatch(self):
+        while self.active < self.concurrency and self._waiting:
+            ticket = self._waiting.pop(0)
+            self.active += 1
+            ticket.granted_at = time.perf_counter()
+            wait = ticket.granted_at - ticket.enqueued_at
+            stats = self._kind_stats(ticket.kind)
+            stats["admitted"] += 1
+            stats["wait_total"] += wait
+            stats["wait_max"] = max(stats["wait_max"], wait)
+            llm_queue_wait.observe(wait, kind=ticket.kind)
+            ticket.position = 0
+            ticket.granted.set()
+            ticket.changed.set()
+        for position, ticket in enumerate(self._waiting, start=1):
+            if ticket.position != position:
+                ticket.position = position
+                ticket.changed.set()
+
+    async def positions(self, ticket: LLMTicket):
+        """
+        Yield the queue position of a waiting ticket each time it changes, until it is granted.
+        """
+        while not ticket.granted.is_set():
+            ticket.changed.clear()
+            yield ticket.position
+            await ticket.changed.wait()
+
+    @asynccontextmanager
+    async def slot(self, kind: str):
+        """
+        Wait for a slot (no rejection) and hold it for the duration of the block.
+        """
+        ticket = self.reserve(kind)
+        try:
+            await ticket.granted.wait()
+            yield ticket
+        finally:
+            self.release(ticket)
+
+    def stats(self) -> dict:
+        """
+        Slots, queue depth per kind, admissions, rejections and queue wait times, for /stats/llm.
+        """
+        return {
+            "concurrency": self.concurrency,
+            "max_queue": self.max_queue,
+            "active": self.active,
+            "waiting": len(self._waiting),
+            "kinds": {
+                kind: {
+                    "waiting": sum(t.kind == kind for t in self._waiting),
+                    "admitted": s["admitted"],
+                    "rejected": s["rejected"],
+                    "mean_wait_ms": round(1000 * s["wait_total"] / s["admitted"], 1) if s["admitted"] else None,
+                    "max_wait_ms": round(1000 * s["wait_max"], 1),
+                }
+                for kind, s in self._stats.items()
+            },
+        }
+
+
+llm_scheduler = LLMScheduler()
+metrics.gauge("llm_active_calls", "LLM calls holding a scheduler slot.", collect=lambda: {(): llm_scheduler.active})
+metrics.gauge("llm_queue_depth", "LLM calls waiting for a scheduler slot.", collect=lambda: {(): len(llm_scheduler._waiting)})
@@ -0,0 +1,337 @@
+import bisect
+import contextvars
+import heapq
+import os
+import sys
+import threading
+import time
+from collections import Counter as _Counter, deque
+from contextlib import contextmanager
+
+# Latency buckets (seconds) shared by every histogram
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names, values, extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class _Metric:
+    type = None
+
+    def __init__(self, name: str, help: str, labels=()):
+        self.name, self.help, self.label_names = name, help, tuple(labels)
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def _key(self, labels: dict) -> tuple:
+        return tuple(labels.get(n, "") for n in self.label_names)
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.type}"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            lines.extend(self._render_value(key, value))
+        return lines
+
+    def _render_value(self, key, value) -> list:
+        return [f"{self.name}{_labels(self.label_names, key)} {value}"]
+
+
+class Counter(_Metric):
+    type = "counter"
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    """
+    Gauge set explicitly, or computed at scrape time by `collect` (returning {label tuple: value}).
+    """
+    type = "gauge"
+
+    def __init__(self, name: str, help: str, labels=(), collect=None):
+        super().__init__(name, help, labels)
+        self.collect = collect
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+    def render(self) -> list:
+        if self.collect is not None:
+            values = {key: value for key, value in self.collect().items() if value is not None}
+            with self._lock:
+                self._values = values
+        return super().render()
+
+
+class Histogram(_Metric):
+    type = "histogram"
+
+    def __init__(self, name: str, help: str, labels=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            entry[0][bisect.bisect_left(self.buckets, value)] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    def _render_value(self, key, value) -> list:
+        counts, total, n = value
+        lines, cumulative = [], 0
+        for bound, count in zip(self.buckets + (float("inf"),), counts):
+            cumulative += count
+            le = "+Inf" if bound == float("inf") else repr(bound)
+            bucket = 'le="' + le + '"'
+            lines.append(f"{self.name}_bucket{_labels(self.label_names, key, bucket)} {cumulative}")
+        lines.append(f"{self.name}_sum{_labels(self.label_names, key)} {total}")
+        lines.append(f"{self.name}_count{_labels(self.label_names, key)} {n}")
+        return lines
+
+
+class MetricsRegistry:
+    """
+    Minimal Prometheus-style registry: counters, gauges and histograms rendered in the
+    text exposition format served by `/metrics`.
+    """
+
+    def __init__(self):
+        self._metrics = {}
+
+    def _add(self, metric):
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help: str, labels=()) -> Counter:
+        return self._add(Counter(name, help, labels))
+
+    def gauge(self, name: str, help: str, labels=(), collect=None) -> Gauge:
+        return self._add(Gauge(name, help, labels, collect))
+
+    def histogram(self, name: str, help: str, labels=(), buckets=DEFAULT_BUCKETS) -> Histogram:
+        return self._add(Histogram(name, help, labels, buckets))
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+def process_rss_bytes():
+    """
+    Resident set size of this process (Linux /proc, None elsewhere).
+    """
+    try:
+        with open("/proc/self/statm", encoding="utf-8") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return None
+
+
+metrics = MetricsRegistry()
+
+requests_in_flight = metrics.gauge("http_requests_in_flight", "Requests currently being served.")
+request_duration = metrics.histogram(
+    "http_request_duration_seconds", "Request duration until the last body chunk is sent.", ["method", "route", "status"]
+)
+request_errors = metrics.counter("http_request_errors_total", "Requests answered with a 5xx status.", ["route", "status"])
+stage_duration = metrics.histogram("stage_duration_seconds", "Duration of the request processing stages.", ["stage"])
+query_duration = metrics.histogram("neo4j_query_duration_seconds", "Duration of the Neo4j connector queries.", ["query"])
+query_errors = metrics.counter("neo4j_query_errors_total", "Neo4j connector queries that raised.", ["query"])
+llm_tokens = metrics.counter("llm_tokens_total", "Text chunks streamed by the LLM.", ["kind"])
+llm_first_token = metrics.histogram("llm_time_to_first_token_seconds", "Time from the LLM request to its first token.", ["kind"])
+llm_errors = metrics.counter("llm_errors_total", "LLM requests that failed.", ["kind"])
+llm_tokens_per_second = metrics.histogram(
+    "llm_tokens_per_second", "Decoding speed of the LLM streams (after the first token).", ["kind"],
+    buckets=(1, 2, 5, 10, 20, 30, 50, 75, 100, 150, 200, 400),
+)
+metrics.gauge("process_resident_memory_bytes", "Resident memory of the backend process.", collect=lambda: {(): process_rss_bytes()})
+
+# Spans of the request being served (set by MetricsMiddleware)
+_trace = contextvars.ContextVar("trace", default=None)
+
+
+def _trace_span(stage: str, seconds: float, start: float = None):
+    trace = _trace.get()
+    if trace is not None:
+        if start is None:
+            start = time.perf_counter() - seconds
+        trace["spans"].append({"stage": stage, "start_ms": round((start - trace["start"]) * 1000, 2), "ms": round(seconds * 1000, 2)})
+
+
+def record_stage(stage: str, seconds: float, start: float = None):
+    """
+    Observe a stage duration and attach it to the current request trace, if any.
+    """
+    stage_duration.observe(seconds, stage=stage)
+    _trace_span(stage, seconds, start)
+
+
+def record_query(name: str, seconds: float, start: float, failed: bool = False):
+    """
+    Observe a connector query duration (and failure) and attach it to the current request trace.
+    """
+    query_duration.observe(seconds, query=name)
+    if failed:
+        query_errors.inc(query=name)
+    _trace_span("neo4j." + name, seconds, start)
+
+
+@contextmanager
+def span(stage: str):
+    """
+    Time a block (sync or inside a coroutine) as one processing stage.
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_stage(stage, time.perf_counter() - start, start)
+
+
+class SlowRequestLog:
+    """
+    Keep the N slowest requests with their stage spans and, when the stack sampler runs,
+    the most frequent stacks sampled while they were served (a poor man's profiler).
+    """
+
+    def __init__(self, size: int = None, sample_interval_ms: float = None):
+        """
+        Args:
+            size (int): Requests kept (env PROFILE_SLOW_REQUESTS, default 0 = disabled).
+            sample_interval_ms (float): Stack sampling period (env PROFILE_SAMPLE_INTERVAL_MS, default 10, 0 = no sampling).
+        """
+        self.size = size if size is not None else int(os.getenv("PROFILE_SLOW_REQUESTS", "0"))
+        self.interval = (sample_interval_ms if sample_interval_ms is not None else float(os.getenv("PROFILE_SAMPLE_INTERVAL_MS", "10"))) / 1000
+        self._heap = []  # (duration, seq, entry), smallest first
+        self._seq = 0
+        self._lock = threading.Lock()
+        self._samples = deque(maxlen=200000)  # (timestamp, thread name, folded stack)
+        self._thread = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.size > 0
+
+    def start(self):
+        """
+        Start the background stack sampler (no-op when disabled).
+        """
+        if not self.enabled or self.interval <= 0 or self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._sample_loop, name="stack-sampler", daemon=True)
+        self._thread.start()
+
+    def _sample_loop(self):
+        own = threading.get_ident()
+        names = {}
+        while True:
+            now = time.perf_counter()
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                stack = []
+                while frame is not None and len(stack) < 64:
+                    stack.append(f"{os.path.basename(frame.f_code.co_filename)}:{frame.f_code.co_name}")
+                    frame = frame.f_back
+                if ident not in names:
+                    names = {t.ident: t.name for t in threading.enumerate()}
+                self._samples.append((now, names.get(ident, str(ident)), ";".join(reversed(stack))))
+            time.sleep(self.interval)
+
+    def record(self, method: str, route: str, status: int, start: float, duration: float, spans: list):
+        if not self.enabled:
+            return
+        with self._lock:
+            if len(self._heap) >= self.size and duration <= self._heap[0][0]:
+                return
+        stacks = _Counter(
+            f"{thread}: {stack}" for ts, thread, stack in list(self._samples) if start <= ts <= start + duration
+        )
+        entry = {
+            "method": method, "route": route, "status": status, "ms": round(duration * 1000, 2),
+            "at": time.strftime("%Y-%m-%dT%H:%M:%S"), "spans": spans,
+            "top_stacks": [{"samples": n, "stack": s} for s, n in stacks.most_common(20)],
+        }
+        with self._lock:
+            self._seq += 1
+            item = (duration, self._seq, entry)
+            if len(self._heap) < self.size:
+                heapq.heappush(self._heap, item)
+            else:
+                heapq.heappushpop(self._heap, item)
+
+    def dump(self) -> list:
+        """
+        Slowest requests first.
+        """
+        with self._lock:
+            return [entry for _, _, entry in sorted(self._heap, reverse=True)]
+
+
+slow_requests = SlowRequestLog()
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware counting in-flight requests and timing each request until its last
+    body chunk (so streamed NDJSON responses are timed in full).
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        start = time.perf_counter()
+        status = {"code": 500}
+        trace = {"start": start, "spans": []}
+        token = _trace.set(trace)
+
+        async def send_with_status(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        requests_in_flight.inc()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            requests_in_flight.dec()
+            _trace.reset(token)
+            duration = time.perf_counter() - start
+            # Route template (bounded label values), not the raw path
+            route = getattr(scope.get("route"), "path", "unmatched")
+            request_duration.observe(duration, method=scope["method"], route=route, status=str(status["code"]))
+            if status["code"] >= 500:
+                request_errors.inc(route=route, status=str(status["code"]))
+            slow_requests.record(scope["method"], route, status["code"], start, duration, trace["spans"])
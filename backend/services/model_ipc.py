@@ -0,0 +1,180 @@
+import json
+import os
+import socket
+import struct
+import threading
+import time
+
+import numpy as np
+
+# Unix socket of the shared model server (model_server.py); unset = models are loaded in-process
+MODEL_SERVER_SOCKET = os.getenv("MODEL_SERVER_SOCKET")
+
+# Frame: header length, payload length (network order), JSON header, raw payload bytes
+FRAME_PREFIX = struct.Struct("!II")
+
+
+def _payload_view(payload) -> memoryview:
+    """
+    Byte view of an array payload, without copying when it is already C-contiguous.
+    """
+    if payload is None:
+        return memoryview(b"")
+    return memoryview(np.ascontiguousarray(payload)).cast("B")
+
+
+def array_header(array: np.ndarray) -> dict:
+    return {"dtype": array.dtype.str, "shape": list(array.shape)}
+
+
+def array_from_payload(header: dict, payload) -> np.ndarray:
+    """
+    Array view over a received payload buffer (no copy).
+    """
+    return np.frombuffer(payload or b"", dtype=np.dtype(header["dtype"])).reshape(header["shape"])
+
+
+def send_frame(sock: socket.socket, header: dict, payload=None):
+    data = json.dumps(header).encode("utf-8")
+    view = _payload_view(payload)
+    sock.sendall(FRAME_PREFIX.pack(len(data), view.nbytes) + data)
+    if view.nbytes:
+        sock.sendall(view)
+
+
+def _recv_exact(sock: socket.socket, size: int) -> bytearray:
+    buffer = bytearray(size)
+    view = memoryview(buffer)
+    received = 0
+    while received < size:
+        n = sock.recv_into(view[received:])
+        if n == 0:
+            raise ConnectionError("Model server closed the connection.")
+        received += n
+    return buffer
+
+
+def recv_frame(sock: socket.socket) -> tuple:
+    header_size, payload_size = FRAME_PREFIX.unpack(_recv_exact(sock, FRAME_PREFIX.size))
+    header = json.loads(_recv_exact(sock, header_size))
+    return header, (_recv_exact(sock, payload_size) if payload_size else None)
+
+
+async def read_frame(reader) -> tuple:
+    header_size, payload_size = FRAME_PREFIX.unpack(await reader.readexactly(FRAME_PREFIX.size))
+    header = json.loads(await reader.readexactly(header_size))
+    return header, (await reader.readexactly(payload_size) if payload_size else None)
+
+
+async def write_frame(writer, header: dict, payload=None):
+    data = json.dumps(header).encode("utf-8")
+    view = _payload_view(payload)
+    writer.write(FRAME_PREFIX.pack(len(data), view.nbytes) + data)
+    if view.nbytes:
+        writer.write(view)
+    await writer.drain()
+
+
+class ModelServerClient:
+    """
+    Blocking client of the shared model server, safe to use from several threads
+    (one Unix socket connection per thread, requests are answered in order).
+
+    Arrays travel as raw buffers described in the JSON header (dtype, shape) and are
+    returned as numpy views over the received bytes; nothing is pickled.
+    """
+
+    def __init__(self, path: str, timeout: float = None, connect_timeout: float = None):
+        """
+        Args:
+            path (str): Unix socket of the model server.
+            timeout (float): Seconds to wait for one answer (env MODEL_SERVER_TIMEOUT, default 120).
+            connect_timeout (float): Seconds `wait_loaded` keeps retrying while the server is
+                unreachable (env MODEL_SERVER_CONNECT_TIMEOUT, default 120).
+        """
+        self.path = path
+        self.timeout = timeout if timeout is not None else float(os.getenv("MODEL_SERVER_TIMEOUT", "120"))
+        self.connect_timeout = connect_timeout if connect_timeout is not None else float(os.getenv("MODEL_SERVER_CONNECT_TIMEOUT", "120"))
+        self._local = threading.local()
+
+    def _connection(self) -> socket.socket:
+        sock = getattr(self._local, "sock", None)
+        if sock is None:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(self.timeout)
+            try:
+                sock.connect(self.path)
+            except OSError:
+                sock.close()
+                raise
+            self._local.sock = sock
+        return sock
+
+    def _reset(self):
+        sock = getattr(self._local, "sock", None)
+        if sock is not None:
+            sock.close()
+            self._local.sock = None
+
+    def call(self, op: str, texts: list = None):
+        """
+        Run one operation on the server ("status", "stats", "entities", "rank_topics", "encode").
+
+        Returns:
+            The JSON result, or a numpy array for array results.
+        """
+        for attempt in range(2):
+            try:
+                sock = self._connection()
+                send_frame(sock, {"op": op, "texts": texts})
+                header, payload = recv_frame(sock)
+                break
+            except (ConnectionError, FileNotFoundError):
+                # Stale connection (e.g. server restarted): reconnect once, the operations are idempotent
+                self._reset()
+                if attempt:
+                    raise
+            except OSError:
+                # Timeout: the server may still be working on it, so it is not sent again; the
+                # connection is dropped so its late answer is never read as the next one's
+                self._reset()
+                raise
+        if not header["ok"]:
+            raise RuntimeError(f"Model server error on '{op}': {header['error']}")
+        if "array" in header:
+            return array_from_payload(header["array"], payload)
+        return header["result"]
+
+    def wait_loaded(self, name: str):
+        """
+        Block until the server has loaded model `name` (used as the registry loader in the workers).
+        """
+        deadline = time.monotonic() + self.connect_timeout
+        while True:
+            try:
+                status = self.call("status")[name]
+                if status["state"] == "loaded":
+                    return self
+                if status["state"] == "failed":
+                    raise RuntimeError(f"Model server failed to load '{name}': {status['error']}")
+            except (OSError, ConnectionError) as e:
+                if time.monotonic() > deadline:
+                    raise RuntimeError(f"Model server unreachable at {self.path}: {e}")
+            time.sleep(0.5)
+
+
+class RemoteEncoder:
+    """
+    SentenceTransformer-like `encode` served by the model server.
+    """
+
+    def __init__(self, client: ModelServerClient):
+        self.client = client
+
+    def encode(self, sentences, convert_to_numpy: bool = True, **kwargs):
+        single = isinstance(sentences, str)
+        vectors = self.client.call("encode", [sentences] if single else list(sentences))
+        return vectors[0] if single else vectors
+
+
+model_server = ModelServerClient(MODEL_SERVER_SOCKET) if MODEL_SERVER_SOCKET else None
@@ -0,0 +1,148 @@
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from services.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Offline mode: never reach the Hugging Face Hub, only use locally cached/exported models.
+# Must be set before transformers / sentence_transformers are imported by the loaders.
+if os.getenv("MODELS_OFFLINE", "0") == "1":
+    os.environ.setdefault("HF_HUB_OFFLINE", "1")
+    os.environ.setdefault("TRANSFORMERS_OFFLINE", "1")
+
+
+def model_source(env_var: str, default: str) -> str:
+    """
+    Return the model name or local path configured in `env_var`, falling back to `default`.
+    """
+    return os.getenv(env_var) or default
+
+
+def _parameter_bytes(model):
+    """
+    Size of the weights of a torch model or transformers pipeline (None when unknown, e.g. spaCy).
+    """
+    parameters = getattr(getattr(model, "model", model), "parameters", None)
+    if not callable(parameters):
+        return None
+    try:
+        return sum(p.numel() * p.element_size() for p in parameters())
+    except Exception:
+        return None
+
+
+class ModelRegistry:
+    """
+    Registry of named models that are loaded lazily, in parallel, in background threads.
+
+    Services register a loader at import time (cheap); `start()` loads every model in
+    parallel once the app is up, and `get()` waits for (or triggers) the load of one model.
+    """
+
+    def __init__(self):
+        self._models = {}
+        self._executor = None
+
+    def register(self, name: str, loader, source: str = None):
+        """
+        Register a model loader.
+
+        Args:
+            name (str): Name of the model in the registry.
+            loader (callable): Zero-argument function returning the loaded model.
+            source (str): Model name or local path, reported by `status()`.
+        """
+        self._models[name] = {
+            "loader": loader,
+            "source": source,
+            "state": "pending",
+            "model": None,
+            "error": None,
+            "load_seconds": None,
+            "memory_bytes": None,
+            "lock": threading.Lock(),
+            "done": threading.Event(),
+        }
+
+    def _load(self, name: str):
+        entry = self._models[name]
+        with entry["lock"]:
+            if entry["done"].is_set():
+                return
+            entry["state"] = "loading"
+            start = time.perf_counter()
+            try:
+                entry["model"] = entry["loader"]()
+                entry["memory_bytes"] = _parameter_bytes(entry["model"])
+                entry["state"] = "loaded"
+                logger.info(f"Model '{name}' loaded from {entry['source']} in {time.perf_counter() - start:.1f}s")
+            except Exception as e:
+                entry["state"] = "failed"
+                entry["error"] = str(e)
+                logger.error(f"Model '{name}' failed to load: {e}")
+            finally:
+                entry["load_seconds"] = round(time.perf_counter() - start, 3)
+                entry["done"].set()
+
+    def start(self):
+        """
+        Start loading every registered model in parallel, without blocking the caller.
+        """
+        if self._executor is not None:
+            return
+        self._executor = ThreadPoolExecutor(max_workers=max(1, len(self._models)), thread_name_prefix="model-loader")
+        for name in self._models:
+            self._executor.submit(self._load, name)
+
+    def get(self, name: str, timeout: float = None):
+        """
+        Return a loaded model, loading it in the calling thread if loading was not started.
+
+        Args:
+            name (str): Name of the model.
+            timeout (float): Maximum seconds to wait for a background load.
+
+        Returns:
+            The loaded model.
+        """
+        entry = self._models[name]
+        if entry["state"] == "pending" and self._executor is None:
+            self._load(name)
+        elif not entry["done"].wait(timeout):
+            raise RuntimeError(f"Model '{name}' is still loading.")
+        if entry["state"] != "loaded":
+            raise RuntimeError(f"Model '{name}' is not available: {entry['error']}")
+        return entry["model"]
+
+    def is_ready(self, names=None) -> bool:
+        """
+        Tell whether the given models (default: all) are loaded.
+        """
+        names = names or list(self._models)
+        return all(self._models[n]["state"] == "loaded" for n in names)
+
+    def status(self) -> dict:
+        """
+        Return the load state, source and load time of each model.
+        """
+        return {
+            name: {
+                "state": entry["state"],
+                "source": entry["source"],
+                "load_seconds": entry["load_seconds"],
+                "memory_bytes": entry["memory_bytes"],
+                "error": entry["error"],
+            }
+            for name, entry in self._models.items()
+        }
+
+
+models = ModelRegistry()
+metrics.gauge(
+    "model_memory_bytes", "Weight size of each loaded model.", ["model"],
+    collect=lambda: {(name,): status["memory_bytes"] for name, status in models.status().items()},
+)
@@ -0,0 +1,126 @@
+"""
+Quantized ONNX Runtime inference for the zero-shot classifier and the sentence encoder.
+
+Selected with INFERENCE_BACKEND=onnx. The models are exported and dynamically quantized
+to int8 by `export_onnx.py` into ONNX_MODEL_DIR/<name>/ (model_quantized.onnx, tokenizer
+and config files). The wrappers mirror the call signatures used by the code, so they can
+replace the transformers zero-shot pipeline and the SentenceTransformer encoder.
+"""
+import json
+import os
+
+import numpy as np
+
+INFERENCE_BACKEND = os.getenv("INFERENCE_BACKEND", "torch")
+DEFAULT_ONNX_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache", "onnx")
+QUANTIZED_FILE = "model_quantized.onnx"
+
+
+def onnx_model_dir(name: str) -> str:
+    """
+    Directory of an exported model (env ONNX_MODEL_DIR, default backend/.cache/onnx).
+    """
+    return os.path.join(os.getenv("ONNX_MODEL_DIR", DEFAULT_ONNX_DIR), name)
+
+
+def create_session(path: str, intra_op_threads: int = None, inter_op_threads: int = None):
+    """
+    Open an ONNX Runtime CPU session with the configured thread counts
+    (env ONNX_INTRA_OP_THREADS / ONNX_INTER_OP_THREADS, 0 = runtime default).
+    """
+    import onnxruntime as ort
+
+    options = ort.SessionOptions()
+    options.intra_op_num_threads = intra_op_threads if intra_op_threads is not None else int(os.getenv("ONNX_INTRA_OP_THREADS", "0"))
+    options.inter_op_num_threads = inter_op_threads if inter_op_threads is not None else int(os.getenv("ONNX_INTER_OP_THREADS", "0"))
+    options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+    return ort.InferenceSession(path, sess_options=options, providers=["CPUExecutionProvider"])
+
+
+class _OnnxModel:
+    def __init__(self, model_dir: str, intra_op_threads: int = None, max_length: int = 256):
+        from transformers import AutoTokenizer
+
+        self.model_dir = model_dir
+        self.max_length = max_length
+        self.tokenizer = AutoTokenizer.from_pretrained(model_dir)
+        self.session = create_session(os.path.join(model_dir, QUANTIZED_FILE), intra_op_threads)
+        self.input_names = [i.name for i in self.session.get_inputs()]
+
+    def _run(self, *texts) -> tuple:
+        """
+        Tokenize and run the session, returning (first output, attention mask).
+        """
+        encoded = self.tokenizer(*texts, padding=True, truncation="only_first", max_length=self.max_length, return_tensors="np")
+        feed = {name: encoded[name].astype(np.int64) for name in self.input_names}
+        return self.session.run(None, feed)[0], encoded["attention_mask"]
+
+
+class OnnxZeroShotClassifier(_OnnxModel):
+    """
+    NLI-based zero-shot classification, same inputs/outputs as the transformers pipeline:
+    every (text, "This example is {label}.") pair is scored in batches and the entailment
+    logits are soft-maxed over the labels (or per label with `multi_label`).
+    """
+
+    def __init__(self, model_dir: str, intra_op_threads: int = None, hypothesis_template: str = "This example is {}."):
+        super().__init__(model_dir, intra_op_threads)
+        self.hypothesis_template = hypothesis_template
+        with open(os.path.join(model_dir, "config.json"), encoding="utf-8") as f:
+            label2id = {k.lower(): v for k, v in json.load(f)["label2id"].items()}
+        self.entailment_id = label2id["entailment"]
+        self.contradiction_id = label2id["contradiction"]
+
+    def __call__(self, sequences, candidate_labels, multi_label: bool = False, batch_size: int = 16):
+        single = isinstance(sequences, str)
+        sequences = [sequences] if single else list(sequences)
+        hypotheses = [self.hypothesis_template.format(label) for label in candidate_labels]
+        pairs = [(text, hypothesis) for text in sequences for hypothesis in hypotheses]
+
+        logits = []
+        step = max(1, batch_size) * len(hypotheses)
+        for start in range(0, len(pairs), step):
+            batch = pairs[start:start + step]
+            out, _ = self._run([p[0] for p in batch], [p[1] for p in batch])
+            logits.append(out)
+        logits = np.concatenate(logits).reshape(len(sequences), len(hypotheses), -1)
+
+        if multi_label:
+            pair = logits[..., [self.contradiction_id, self.entailment_id]]
+            pair = np.exp(pair - pair.max(-1, keepdims=True))
+            scores = pair[..., 1] / pair.sum(-1)
+        else:
+            entail = logits[..., self.entailment_id]
+            entail = np.exp(entail - entail.max(-1, keepdims=True))
+            scores = entail / entail.sum(-1, keepdims=True)
+
+        results = []
+        for text, row in zip(sequences, scores):
+            order = np.argsort(-row)
+            results.append({
+                "sequence": text,
+                "labels": [candidate_labels[i] for i in order],
+                "scores": [float(row[i]) for i in order],
+            })
+        return results[0] if single else results
+
+
+class OnnxSentenceEncoder(_OnnxModel):
+    """
+    Sentence embeddings (mean pooling + L2 normalization, as all-MiniLM-L6-v2),
+    with the `encode` signature of SentenceTransformer.
+    """
+
+    def encode(self, sentences, convert_to_numpy: bool = True, batch_size: int = 32, normalize_embeddings: bool = True, **kwargs):
+        single = isinstance(sentences, str)
+        sentences = [sentences] if single else list(sentences)
+        vectors = []
+        for start in range(0, len(sentences), max(1, batch_size)):
+            hidden, mask = self._run(sentences[start:start + batch_size])
+            mask = mask[..., None].astype(np.float32)
+            pooled = (hidden * mask).sum(1) / np.clip(mask.sum(1), 1e-9, None)
+            if normalize_embeddings:
+                pooled /= np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+            vectors.append(pooled.astype(np.float32))
+        vectors = np.concatenate(vectors) if vectors else np.zeros((0, 0), dtype=np.float32)
+        return vectors[0] if single else vectors
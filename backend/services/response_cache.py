@@ -0,0 +1,105 @@
+import asyncio
+import hashlib
+import json
+import os
+import time
+from collections import OrderedDict
+
+from fastapi import Request, Response
+from fastapi.responses import JSONResponse
+
+
+class ResponseCache:
+    """
+    TTL cache of JSON payloads with single-flight computation.
+
+    Concurrent requests for the same key share one in-flight computation instead of
+    each running the query. Each payload carries an ETag (hash of its JSON), so clients
+    can revalidate with `If-None-Match` and get a 304 without a body. Expired payloads are
+    dropped on insert and the least recently used ones are evicted beyond `max_entries`.
+    """
+
+    def __init__(self, ttl: float = None, max_entries: int = None):
+        """
+        Args:
+            ttl (float): Seconds a payload is served from the cache (env ANALYTICS_CACHE_TTL, default 60).
+            max_entries (int): Maximum number of payloads (env ANALYTICS_CACHE_SIZE, default 1000).
+        """
+        self.ttl = ttl if ttl is not None else float(os.getenv("ANALYTICS_CACHE_TTL", "60"))
+        self.max_entries = max_entries if max_entries is not None else int(os.getenv("ANALYTICS_CACHE_SIZE", "1000"))
+        self._entries = OrderedDict()  # key -> (expires_at, payload, etag), least recently used first
+        self._inflight = {}  # key -> asyncio.Task
+        self.stats = {"hits": 0, "misses": 0, "coalesced": 0, "evictions": 0, "expired": 0}
+
+    async def get(self, key, compute):
+        """
+        Return the cached payload for `key`, computing it at most once at a time.
+
+        Args:
+            key: Hashable cache key (e.g. route and query parameters).
+            compute (callable): Coroutine function returning the JSON-serializable payload.
+
+        Returns:
+            tuple: (payload, etag)
+        """
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] > time.monotonic():
+            self.stats["hits"] += 1
+            self._entries.move_to_end(key)
+            return entry[1], entry[2]
+
+        if key in self._inflight:
+            self.stats["coalesced"] += 1
+            return await asyncio.shield(self._inflight[key])
+
+        self.stats["misses"] += 1
+        # The computation runs in its own task: a caller that goes away (client disconnect)
+        # stops waiting without cancelling it for the callers coalesced on the same key
+        task = asyncio.ensure_future(self._compute(key, compute))
+        task.add_done_callback(lambda t: t.cancelled() or t.exception())  # Errors nobody waited for are not logged
+        self._inflight[key] = task
+        return await asyncio.shield(task)
+
+    async def _compute(self, key, compute):
+        # Errors are shared with the waiting callers but never cached
+        try:
+            payload = await compute()
+            etag = '"' + hashlib.sha1(json.dumps(payload, sort_keys=True, default=str).encode("utf-8")).hexdigest() + '"'
+            self._store(key, payload, etag)
+            return payload, etag
+        finally:
+            del self._inflight[key]
+
+    def _store(self, key, payload, etag):
+        now = time.monotonic()
+        expired = [k for k, entry in self._entries.items() if entry[0] <= now]
+        for k in expired:
+            del self._entries[k]
+        self.stats["expired"] += len(expired)
+        self._entries[key] = (now + self.ttl, payload, etag)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.stats["evictions"] += 1
+
+    async def respond(self, request: Request, key, compute) -> Response:
+        """
+        Serve a cached payload with ETag / Cache-Control headers, or 304 when the client copy is current.
+        """
+        payload, etag = await self.get(key, compute)
+        headers = {"ETag": etag, "Cache-Control": f"public, max-age={int(self.ttl)}"}
+        if request.headers.get("if-none-match") == etag:
+            return Response(status_code=304, headers=headers)
+        return JSONResponse(content=payload, headers=headers)
+
+    def summary(self) -> dict:
+        """
+        Counters and configuration, for /stats/cache.
+        """
+        return dict(self.stats, entries=len(self._entries), ttl=self.ttl, max_entries=self.max_entries)
+
+    def clear(self):
+        """
+        Drop every cached payload (e.g. after new tweets were ingested).
+        """
+        self._entries.clear()
@@ -0,0 +1,151 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import unicodedata
+from collections import OrderedDict
+
+import numpy as np
+
+
+def normalize_text(text: str) -> str:
+    """
+    Normalize a tweet before hashing: Unicode NFC and collapsed whitespace.
+    Case is kept, since NER and classification are case-sensitive.
+    """
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+
+def text_key(kind: str, text: str) -> str:
+    """
+    Build the content-addressed key of a result kind for a text.
+    """
+    return f"{kind}:{hashlib.sha1(normalize_text(text).encode('utf-8')).hexdigest()}"
+
+
+class ResultCache:
+    """
+    Bounded LRU cache of per-text model results (entities, topic, query vector),
+    keyed by the hash of the normalized text, with an optional SQLite disk tier
+    that survives restarts.
+
+    Vectors are stored as raw float32 bytes, every other result as JSON.
+    """
+
+    def __init__(self, max_entries: int = None, disk_path: str = None):
+        """
+        Args:
+            max_entries (int): Maximum number of in-memory entries (env RESULT_CACHE_SIZE, default 10000).
+            disk_path (str): SQLite file of the disk tier (env RESULT_CACHE_DB, disabled when unset).
+        """
+        self.max_entries = max_entries or int(os.getenv("RESULT_CACHE_SIZE", "10000"))
+        self.disk_path = disk_path or os.getenv("RESULT_CACHE_DB")
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._db = None
+        if self.disk_path:
+            os.makedirs(os.path.dirname(os.path.abspath(self.disk_path)), exist_ok=True)
+            self._db = sqlite3.connect(self.disk_path, check_same_thread=False)
+            self._db.execute("CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, value BLOB)")
+            self._db.commit()
+
+    def _count(self, kind: str, outcome: str):
+        counters = self._counters.setdefault(kind, {"memory_hits": 0, "disk_hits": 0, "misses": 0})
+        counters[outcome] += 1
+
+    @staticmethod
+    def _dump(value) -> bytes:
+        if isinstance(value, np.ndarray):
+            return b"v" + np.ascontiguousarray(value, dtype=np.float32).tobytes()
+        return b"j" + json.dumps(value).encode("utf-8")
+
+    @staticmethod
+    def _load(blob: bytes):
+        if blob[:1] == b"v":
+            return np.frombuffer(blob[1:], dtype=np.float32).copy()
+        return json.loads(blob[1:].decode("utf-8"))
+
+    def _remember(self, key: str, value):
+        self._memory[key] = value
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def get(self, kind: str, text: str, count_miss: bool = True):
+        """
+        Return the cached result of a kind for a text, or None.
+
+        Args:
+            kind (str): Result kind.
+            text (str): The input text.
+            count_miss (bool): Whether a miss is counted (False for a fast-path peek
+                that falls back to `cached_batch`, which counts it).
+        """
+        key = text_key(kind, text)
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                self._count(kind, "memory_hits")
+                return self._memory[key]
+            if self._db is not None:
+                row = self._db.execute("SELECT value FROM results WHERE key = ?", (key,)).fetchone()
+                if row is not None:
+                    value = self._load(row[0])
+                    self._remember(key, value)
+                    self._count(kind, "disk_hits")
+                    return value
+            if count_miss:
+                self._count(kind, "misses")
+            return None
+
+    def put(self, kind: str, text: str, value):
+        """
+        Store the result of a kind for a text in memory (and on disk when enabled).
+        """
+        key = text_key(kind, text)
+        with self._lock:
+            self._remember(key, value)
+            if self._db is not None:
+                self._db.execute("INSERT OR REPLACE INTO results (key, value) VALUES (?, ?)", (key, self._dump(value)))
+                self._db.commit()
+
+    def cached_batch(self, kind: str, texts: list[str], compute) -> list:
+        """
+        Resolve a batch of texts from the cache and compute only the misses.
+
+        Args:
+            kind (str): Result kind (should include the model name).
+            texts (list[str]): The input texts.
+            compute (callable): Function mapping the list of missing texts to their results.
+
+        Returns:
+            list: One result per text, in input order.
+        """
+        results = [self.get(kind, text) for text in texts]
+        missing = [i for i, r in enumerate(results) if r is None]
+        if missing:
+            for i, value in zip(missing, compute([texts[i] for i in missing])):
+                self.put(kind, texts[i], value)
+                results[i] = value
+        return results
+
+    def stats(self) -> dict:
+        """
+        Return the hit/miss counters per result kind and the cache size.
+        """
+        with self._lock:
+            kinds = {}
+            for kind, c in self._counters.items():
+                lookups = c["memory_hits"] + c["disk_hits"] + c["misses"]
+                kinds[kind] = dict(c, hit_rate=round((lookups - c["misses"]) / lookups, 4) if lookups else 0.0)
+            return {
+                "entries": len(self._memory),
+                "max_entries": self.max_entries,
+                "disk_tier": self.disk_path,
+                "kinds": kinds,
+            }
+
+
+result_cache = ResultCache()
@@ -0,0 +1,77 @@
+import json
+
+from fastapi import Request
+
+# Accept header parameter selecting the delta format, e.g. "application/x-ndjson; format=delta"
+DELTA_ACCEPT_PARAM = "format=delta"
+
+
+def wants_delta(request: Request) -> bool:
+    """
+    Tell whether the client asked for delta frames (`?stream=delta` or `Accept: ...; format=delta`).
+    """
+    if request.query_params.get("stream") == "delta":
+        return True
+    return DELTA_ACCEPT_PARAM in request.headers.get("accept", "").replace(" ", "")
+
+
+class NDJSONTextStream:
+    """
+    Encode a streamed LLM text as NDJSON frames.
+
+    Cumulative format (default): every frame repeats the whole text so far in `field`,
+    e.g. {"explanation": "Based on", "streaming": true}.
+
+    Delta format: frames carry only the new text and a sequence number,
+    e.g. {"seq": 3, "delta": " on", "streaming": true}; the final frame
+    ({"seq": n, "done": true, "streaming": false, ...}) carries the summary and the full text once.
+    """
+
+    def __init__(self, field: str, delta: bool = False):
+        """
+        Args:
+            field (str): Name of the text field ("explanation", "generated_tweet").
+            delta (bool): Emit delta frames instead of cumulative ones.
+        """
+        self.field = field
+        self.delta = delta
+        self.text = ""
+        self.seq = 0
+
+    @property
+    def format(self) -> str:
+        return "delta" if self.delta else "cumulative"
+
+    def _frame(self, payload: dict) -> str:
+        if self.delta:
+            payload = {"seq": self.seq, **payload}
+            self.seq += 1
+        return json.dumps(payload) + "\n"
+
+    def start(self) -> str:
+        """
+        Opening frame, sent before the first token.
+        """
+        return self._frame({"delta": "", "streaming": True} if self.delta else {self.field: "", "streaming": True})
+
+    def queued(self, position: int) -> str:
+        """
+        Frame telling the caller its place in the LLM wait queue (sent before the first token).
+        """
+        return self._frame({"queued": True, "queue_position": position, "streaming": True})
+
+    def chunk(self, text: str) -> str:
+        """
+        Frame for a new piece of text.
+        """
+        self.text += text
+        return self._frame({"delta": text, "streaming": True} if self.delta else {self.field: self.text, "streaming": True})
+
+    def final(self, payload: dict) -> str:
+        """
+        Closing frame: `payload` (summary fields, including `field`) with `streaming` false.
+        """
+        payload = dict(payload, streaming=False)
+        if self.delta:
+            payload["done"] = True
+        return self._frame(payload)
@@ -1,11 +1,41 @@
-from transformers import pipeline
 import pandas as pd
 from collections import Counter
-import spacy
 
+from services.model_registry import models, model_source
+from services.result_cache import result_cache
+from services.metrics import span
+from services.onnx_backend import INFERENCE_BACKEND, onnx_model_dir
+from services.model_ipc import model_server
 
-nlp = spacy.load("en_core_web_trf")
-classifier = pipeline("zero-shot-classification", model="facebook/bart-large-mnli")
+SPACY_MODEL = model_source("SPACY_MODEL", "en_core_web_trf")
+ZERO_SHOT_MODEL = model_source("ZERO_SHOT_MODEL", "facebook/bart-large-mnli")
+
+
+def _load_nlp():
+    if model_server is not None:
+        return model_server.wait_loaded("ner")
+    import spacy
+    return spacy.load(SPACY_MODEL)
+
+
+def _load_classifier():
+    if model_server is not None:
+        return model_server.wait_loaded("zero_shot")
+    if INFERENCE_BACKEND == "onnx":
+        from services.onnx_backend import OnnxZeroShotClassifier
+        return OnnxZeroShotClassifier(onnx_model_dir("zero_shot"))
+    from transformers import pipeline
+    return pipeline("zero-shot-classification", model=ZERO_SHOT_MODEL)
+
+
+# Models are loaded in the background by the registry (see main.py startup)
+models.register("ner", _load_nlp, SPACY_MODEL)
+models.register("zero_shot", _load_classifier, onnx_model_dir("zero_shot") if INFERENCE_BACKEND == "onnx" else ZERO_SHOT_MODEL)
+
+# Result cache kinds include the model, so switching model never replays stale results
+ENTITIES_CACHE_KIND = f"entities/{SPACY_MODEL}"
+# Cached topic results are the full ranking of the candidate labels
+TOPIC_CACHE_KIND = f"topics/{ZERO_SHOT_MODEL}" + ("/onnx-int8" if INFERENCE_BACKEND == "onnx" else "")
 
 candidate_labels = ["politics", "climate change", "USA", "health", "family", "business", "finance"]
 
@@ -20,7 +50,27 @@ def extract_entities(text: str):
     Returns:
         list: A list of tuples, each containing the entity text and its label.
     """
-    return [(ent.text, ent.label_) for ent in nlp(text).ents]
+    return extract_entities_batch([text])[0]
+
+
+def extract_entities_batch(texts: list[str], batch_size: int = 16):
+    """
+    Extracts the named entities of several texts with `nlp.pipe`, reusing cached results.
+
+    Args:
+        texts (list[str]): The input texts.
+        batch_size (int): Batch size used by spaCy.
+
+    Returns:
+        list: One list of (entity text, label) pairs per text, in input order.
+    """
+    def compute(missing):
+        if model_server is not None:
+            return model_server.call("entities", missing)
+        nlp = models.get("ner")
+        return [[(ent.text, ent.label_) for ent in doc.ents] for doc in nlp.pipe(missing, batch_size=batch_size)]
+
+    return [[tuple(e) for e in ents] for ents in result_cache.cached_batch(ENTITIES_CACHE_KIND, texts, compute)]
 
 
 def filter_entities(entities):
@@ -30,13 +80,56 @@ def filter_entities(entities):
 def entities_to_string(entities):
     return " ".join(ent for ent, _ in entities)
 
+def build_classifier_input(text: str, entities) -> str:
+    """
+    Appends the filtered entities to the text, as done when the dataset was classified.
+    """
+    ent_str = entities_to_string(filter_entities(entities))
+    return f"{text} - {ent_str}" if ent_str else text
+
+
 def classify_topic(text: str) -> tuple[str, float]:
     """
     Classifies the topic of a given text using zero-shot classification.
     """
-    entities = filter_entities(extract_entities(text))
-    ent_str = entities_to_string(entities)
-    input_text = f"{text} - {ent_str}" if ent_str else text
+    return classify_topics([text])[0]
+
+
+def rank_topics(texts: list[str], batch_size: int = 16) -> list[list[tuple[str, float]]]:
+    """
+    Ranks the candidate topics of several texts at once, running NER with `nlp.pipe`
+    and the zero-shot classifier on the whole batch. Texts already seen are
+    answered from the result cache.
 
-    result = classifier(input_text, candidate_labels, multi_label=False)
-    return result["labels"][0], float(result["scores"][0])
+    Args:
+        texts (list[str]): The input texts.
+        batch_size (int): Batch size used by spaCy and the classifier.
+
+    Returns:
+        list[list[tuple[str, float]]]: For each text (in input order), the (topic, confidence)
+        pairs of every candidate label, most likely first.
+    """
+    def compute(missing):
+        if model_server is not None:
+            return model_server.call("rank_topics", missing)
+        with span("ner"):
+            entities = extract_entities_batch(missing, batch_size)
+        inputs = [build_classifier_input(text, ents) for text, ents in zip(missing, entities)]
+
+        with span("zero_shot"):
+            results = models.get("zero_shot")(inputs, candidate_labels, multi_label=False, batch_size=batch_size)
+        if isinstance(results, dict):
+            results = [results]
+        return [[[label, float(score)] for label, score in zip(r["labels"], r["scores"])] for r in results]
+
+    return [[tuple(t) for t in ranking] for ranking in result_cache.cached_batch(TOPIC_CACHE_KIND, texts, compute)]
+
+
+def classify_topics(texts: list[str], batch_size: int = 16) -> list[tuple[str, float]]:
+    """
+    Classifies the topics of several texts at once (top-1 of `rank_topics`).
+
+    Returns:
+        list[tuple[str, float]]: The (topic, confidence) of each text, in input order.
+    """
+    return [ranking[0] for ranking in rank_topics(texts, batch_size)]
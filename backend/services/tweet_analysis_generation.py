@@ -1,76 +1,283 @@
-from sentence_transformers import SentenceTransformer
+import logging
 import faiss
 import pandas as pd
 import openai
+import httpx
+import os
+import time
 import collections.abc 
+from abc import ABC, abstractmethod
+from contextlib import aclosing
 
-# Zero-shot classification and encoder initialization
-encoder = SentenceTransformer("all-MiniLM-L6-v2")
-# LM Studio client initialization
-client = openai.OpenAI(base_url="http://localhost:1234/v1", api_key="lm-studio")
+from services.model_registry import models, model_source
+from services.result_cache import result_cache
+from services.metrics import llm_errors, llm_first_token, llm_tokens, llm_tokens_per_second, record_stage, span
+from services.onnx_backend import INFERENCE_BACKEND, onnx_model_dir
+from services.model_ipc import model_server, RemoteEncoder
 
-async def stream_llm_response(prompt: str):
+logger = logging.getLogger(__name__)
+
+# Encoder initialization (loaded in the background by the registry)
+ENCODER_MODEL_NAME = "all-MiniLM-L6-v2"
+ENCODER_MODEL = model_source("ENCODER_MODEL", ENCODER_MODEL_NAME)
+
+
+def _load_encoder():
+    if model_server is not None:
+        return RemoteEncoder(model_server.wait_loaded("encoder"))
+    if INFERENCE_BACKEND == "onnx":
+        from services.onnx_backend import OnnxSentenceEncoder
+        return OnnxSentenceEncoder(onnx_model_dir("encoder"))
+    from sentence_transformers import SentenceTransformer
+    return SentenceTransformer(ENCODER_MODEL)
+
+
+models.register("encoder", _load_encoder, onnx_model_dir("encoder") if INFERENCE_BACKEND == "onnx" else ENCODER_MODEL)
+# Identity of the vectors: int8 ONNX vectors are not interchangeable with torch ones, so stored
+# embeddings and persisted indexes built with another encoder are never mixed with the queries
+ENCODER_ID = ENCODER_MODEL + ("/onnx-int8" if INFERENCE_BACKEND == "onnx" else "")
+VECTOR_CACHE_KIND = f"vector/{ENCODER_ID}"
+
+
+def get_encoder():
+    """
+    Return the shared sentence encoder, waiting for it to be loaded if needed.
+    """
+    return models.get("encoder")
+
+
+def encode_queries(texts: list[str]):
     """
-    Stream a response from the local LLM using LM Studio API.
+    Embed a batch of query tweets with the shared encoder, reusing cached vectors.
 
     Args:
-        prompt (str): The prompt to send to the LLM for generating a response.
+        texts (list[str]): The tweets to embed.
 
     Returns:
-        collections.abc.Generator[str, None, None]: A generator yielding chunks of the LLM's response.
+        list: One float32 vector per tweet, in input order.
     """
-    try:
-        completion = client.chat.completions.create(
+    def compute(missing):
+        with span("encode"):
+            return list(get_encoder().encode(missing, convert_to_numpy=True, batch_size=len(missing)).astype("float32"))
+
+    return result_cache.cached_batch(VECTOR_CACHE_KIND, texts, compute)
+
+class LLMBackend(ABC):
+    """
+    Chat LLM used by /analyze and /generate_tweet (selected with LLM_BACKEND).
+
+    Backends implement `_stream_chat`, an async generator of text pieces; `stream_chat`
+    adds what is common to all of them: time to first token, token count, decoding speed
+    (tokens/s after the first token) and the `llm_stream.{kind}` stage.
+    """
+
+    name = "base"
+
+    def __init__(self):
+        self._stats = {"streams": 0, "tokens": 0, "ttft_total": 0.0, "decode_seconds": 0.0}
+
+    @abstractmethod
+    def _stream_chat(self, system_prompt: str, user_prompt: str, temperature: float, max_tokens: int):
+        """
+        Async generator of the text pieces of one answer (implemented by every backend).
+        """
+
+    async def stream_chat(self, kind: str, system_prompt: str, user_prompt: str, temperature: float, max_tokens: int):
+        """
+        Stream the answer to a system + user prompt. Closing the generator cancels the generation.
+
+        Args:
+            kind (str): Label of the metrics ("attribution", "generation").
+        """
+        start = time.perf_counter()
+        first_at, tokens = None, 0
+        try:
+            async with aclosing(self._stream_chat(system_prompt, user_prompt, temperature, max_tokens)) as stream:
+                async for text in stream:
+                    if first_at is None:
+                        first_at = time.perf_counter()
+                        llm_first_token.observe(first_at - start, kind=kind)
+                    tokens += 1
+                    llm_tokens.inc(kind=kind)
+                    yield text
+        finally:
+            end = time.perf_counter()
+            record_stage(f"llm_stream.{kind}", end - start, start)
+            if first_at is not None:
+                self._stats["streams"] += 1
+                self._stats["tokens"] += tokens
+                self._stats["ttft_total"] += first_at - start
+                self._stats["decode_seconds"] += end - first_at
+                rate = (tokens - 1) / (end - first_at) if tokens > 1 and end > first_at else 0.0
+                if rate:
+                    llm_tokens_per_second.observe(rate, kind=kind)
+                logger.debug(f"LLM {kind} ({self.name}): first token after {(first_at - start) * 1000:.0f} ms, {tokens} tokens at {rate:.1f} tok/s")
+
+    def stats(self) -> dict:
+        """
+        Mean time to first token and decoding speed since startup, for /stats/llm.
+        """
+        stats = dict(self._stats)
+        streams, ttft, decode = stats.pop("streams"), stats.pop("ttft_total"), stats.pop("decode_seconds")
+        return dict(
+            stats,
+            backend=self.name,
+            streams=streams,
+            mean_ttft_ms=round(1000 * ttft / streams, 1) if streams else None,
+            tokens_per_second=round((stats["tokens"] - streams) / decode, 1) if decode > 0 else None,
+        )
+
+    async def close(self):
+        pass
+
+
+class LMStudioBackend(LLMBackend):
+    """
+    OpenAI-compatible HTTP API of LM Studio, over a pooled keep-alive connection.
+    """
+
+    name = "lmstudio"
+
+    def __init__(self, base_url: str = None):
+        super().__init__()
+        self.http_client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=int(os.getenv("LLM_MAX_CONNECTIONS", "8")),
+                max_keepalive_connections=int(os.getenv("LLM_MAX_KEEPALIVE_CONNECTIONS", "8")),
+            ),
+            timeout=httpx.Timeout(float(os.getenv("LLM_TIMEOUT_SECONDS", "120")), connect=5.0),
+        )
+        self.client = openai.AsyncOpenAI(
+            base_url=base_url or os.getenv("LLM_BASE_URL", "http://localhost:1234/v1"),
+            api_key="lm-studio",
+            http_client=self.http_client,
+        )
+
+    async def _stream_chat(self, system_prompt: str, user_prompt: str, temperature: float, max_tokens: int):
+        completion = await self.client.chat.completions.create(
             model="local-model", # Local model name (using meta-llama-3.1-8b-instruct)
             messages=[
-                {"role": "system", "content": "You are an expert in tweet author attribution. Provide concise and accurate explanations based on the context."},
-                {"role": "user", "content": prompt}
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_prompt}
             ],
-            temperature=0.1, # Making the model more deterministic
-            max_tokens=200,
+            temperature=temperature,
+            max_tokens=max_tokens,
             stream=True, # Enable streaming
         )
+        # Always release the upstream request, so a cancelled consumer stops the generation
+        try:
+            async for chunk in completion:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+        finally:
+            await completion.close()
+
+    async def close(self):
+        await self.client.close()
+
 
-        for chunk in completion:
-            if chunk.choices and chunk.choices[0].delta.content:
-                yield chunk.choices[0].delta.content
+def create_llm_backend(name: str = None) -> LLMBackend:
+    """
+    Create the LLM backend named `name` (env LLM_BACKEND: "lmstudio", default, or "llama_cpp").
+    """
+    name = name or os.getenv("LLM_BACKEND", "lmstudio")
+    if name == "lmstudio":
+        return LMStudioBackend()
+    if name == "llama_cpp":
+        from services.llama_cpp_backend import LlamaCppBackend
+        return LlamaCppBackend()
+    raise ValueError(f"Unknown LLM_BACKEND '{name}' (expected 'lmstudio' or 'llama_cpp').")
+
+
+llm_backend = create_llm_backend()
+
+ATTRIBUTION_SYSTEM_PROMPT = "You are an expert in tweet author attribution. Provide concise and accurate explanations based on the context."
+
+
+async def close_llm_client():
+    """
+    Release the LLM backend (pooled HTTP connections to LM Studio).
+    """
+    await llm_backend.close()
+
+
+def build_attribution_prompt(tweet: str, context_rows: list) -> str:
+    """
+    Prompt asking the LLM to attribute `tweet` given the retrieved context tweets.
+    """
+    context_str = "\n".join(f'- "{row["text"]}" (Author: {row["author"]})' for row in context_rows)
+    return f"""I will provide you with a list of tweets.
+
+Tweets:
+{context_str}
+
+Now, consider this new tweet:
+
+"{tweet}"
+Question: Could this tweet have been written by Obama, Musk or neither?
+Answer and give a brief explanation."""
+
+
+def predict_author(explanation: str) -> str:
+    """
+    Author named in the LLM explanation ("neither" if no author found).
+    """
+    response_lower = explanation.lower()
+    if "obama" in response_lower:
+        return "Obama"
+    if "musk" in response_lower or "elon" in response_lower:
+        return "Musk"
+    return "neither"
+
+
+async def stream_llm_response(prompt: str):
+    """
+    Stream a response from the local LLM (LLM_BACKEND: LM Studio API or in-process llama.cpp).
+
+    Args:
+        prompt (str): The prompt to send to the LLM for generating a response.
+
+    Returns:
+        collections.abc.AsyncGenerator[str, None]: An async generator yielding chunks of the LLM's response.
+    """
+    try:
+        # Low temperature makes the model more deterministic
+        attribution = llm_backend.stream_chat("attribution", ATTRIBUTION_SYSTEM_PROMPT, prompt, temperature=0.1, max_tokens=200)
+        async with aclosing(attribution) as stream:
+            async for text_chunk in stream:
+                yield text_chunk
     except openai.APIConnectionError as e:
-        print(f"ERROR: Could not connect to LM Studio API. Is LM Studio running and the server started? {e}")
+        llm_errors.inc(kind="attribution")
+        logger.error(f"Could not connect to LM Studio API. Is LM Studio running and the server started? {e}")
         yield "ERROR: LLM API connection failed."
     except Exception as e:
-        print(f"An unexpected error occurred during LLM inference: {e}")
+        llm_errors.inc(kind="attribution")
+        logger.error(f"An unexpected error occurred during LLM inference: {e}")
         yield f"ERROR: An unexpected error occurred: {e}"
         
         
 async def stream_llm_generation(system_prompt: str, user_prompt: str):
     """
-    Stream a tweet generation response from the local LLM using LM Studio API.
+    Stream a tweet generation response from the local LLM (LLM_BACKEND: LM Studio API or in-process llama.cpp).
 
     Args:
         system_prompt (str): The system-level prompt for the LLM.
         user_prompt (str): The user-level prompt for the LLM.
 
     Returns:
-        collections.abc.Generator[str, None, None]: A generator yielding chunks of the LLM's response.
+        collections.abc.AsyncGenerator[str, None]: An async generator yielding chunks of the LLM's response.
     """
     try:
-        completion = client.chat.completions.create(
-            model="local-model", # Local model name (using meta-llama-3.1-8b-instruct)
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt}
-            ],
-            temperature=0.7, # Making the model less deterministic
-            max_tokens=200, 
-            stream=True, # Enable streaming
-        )
-
-        for chunk in completion:
-            if chunk.choices and chunk.choices[0].delta.content:
-                yield chunk.choices[0].delta.content
+        # Higher temperature makes the model less deterministic
+        generation = llm_backend.stream_chat("generation", system_prompt, user_prompt, temperature=0.7, max_tokens=200)
+        async with aclosing(generation) as stream:
+            async for text_chunk in stream:
+                yield text_chunk
     except openai.APIConnectionError as e:
-        print(f"ERROR: Could not connect to LM Studio API for generation. Is LM Studio running and the server started? {e}")
+        llm_errors.inc(kind="generation")
+        logger.error(f"Could not connect to LM Studio API for generation. Is LM Studio running and the server started? {e}")
         yield "ERROR: LLM API connection failed."
     except Exception as e:
-        print(f"An unexpected error occurred during LLM generation: {e}")
+        llm_errors.inc(kind="generation")
+        logger.error(f"An unexpected error occurred during LLM generation: {e}")
         yield f"ERROR: An unexpected error occurred: {e}"
\ No newline at end of file
@@ -0,0 +1,185 @@
+import logging
+import json
+import os
+import re
+import threading
+import time
+
+import faiss
+import numpy as np
+
+from services.embedding_store import tweet_id
+
+logger = logging.getLogger(__name__)
+
+# Default location of the on-disk index cache (one sub-folder per topic)
+DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache", "topic_index")
+
+
+def _topic_slug(topic: str) -> str:
+    """
+    Turn a topic label into a file-system safe folder name.
+    """
+    return re.sub(r"[^a-z0-9]+", "_", topic.lower()).strip("_") or "topic"
+
+
+class TopicIndexCache:
+    """
+    Long-lived cache of per-topic FAISS indexes and their row metadata (text, author).
+
+    Each topic index is built once (on first use or at startup), persisted to disk so
+    restarts do not rebuild it, and rebuilt incrementally when the topic fingerprint
+    stored in Neo4j changes. Vectors are taken from the previous index or from the
+    precomputed embedding store; only tweets found in neither are encoded.
+    """
+
+    def __init__(self, encode, cache_dir: str = None, check_interval: float = None, store=None, encoder_id: str = None):
+        """
+        Args:
+            encode (callable): Function embedding a list of texts into float32 vectors.
+            encoder_id (str): Identity of `encode`; persisted indexes or stored vectors of
+                another encoder are not used.
+            cache_dir (str): Folder where indexes and metadata are persisted.
+            check_interval (float): Seconds between two fingerprint checks for the same topic.
+            store (EmbeddingStore): Optional precomputed embeddings, looked up by tweet id.
+        """
+        self.encode = encode
+        self.encoder_id = encoder_id
+        self.store = store
+        self.cache_dir = cache_dir or os.getenv("VECTOR_INDEX_DIR", DEFAULT_CACHE_DIR)
+        self.check_interval = check_interval if check_interval is not None else float(os.getenv("VECTOR_INDEX_CHECK_SECONDS", "60"))
+        self._entries = {}  # topic -> {"index", "rows", "fingerprint", "checked_at"}
+        self._locks = {}
+        self._guard = threading.Lock()
+
+    def _topic_lock(self, topic: str) -> threading.Lock:
+        with self._guard:
+            return self._locks.setdefault(topic, threading.Lock())
+
+    def _paths(self, topic: str):
+        folder = os.path.join(self.cache_dir, _topic_slug(topic))
+        return folder, os.path.join(folder, "index.faiss"), os.path.join(folder, "meta.json")
+
+    def _load_from_disk(self, topic: str):
+        """
+        Load a persisted topic index, if any.
+
+        Returns:
+            dict or None: The cache entry, or None when nothing usable is on disk.
+        """
+        _, index_path, meta_path = self._paths(topic)
+        if not (os.path.exists(index_path) and os.path.exists(meta_path)):
+            return None
+        try:
+            with open(meta_path, encoding="utf-8") as f:
+                meta = json.load(f)
+            index = faiss.read_index(index_path)
+        except Exception as e:
+            logger.warning(f"Could not load cached index for topic '{topic}': {e}")
+            return None
+        if index.ntotal != len(meta["rows"]) or meta.get("encoder") != self.encoder_id:
+            return None
+        return {"index": index, "rows": meta["rows"], "fingerprint": meta.get("fingerprint"), "checked_at": 0.0}
+
+    def _save_to_disk(self, topic: str, entry: dict):
+        folder, index_path, meta_path = self._paths(topic)
+        os.makedirs(folder, exist_ok=True)
+        faiss.write_index(entry["index"], index_path + ".tmp")
+        with open(meta_path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump({"topic": topic, "encoder": self.encoder_id, "fingerprint": entry["fingerprint"], "rows": entry["rows"]}, f)
+        os.replace(index_path + ".tmp", index_path)
+        os.replace(meta_path + ".tmp", meta_path)
+
+    def _build(self, topic: str, connector, fingerprint, previous: dict = None) -> dict:
+        """
+        Build the index for a topic, reusing the vectors of `previous` and of the embedding store.
+        """
+        rows = [
+            {"id": tweet_id(r["date"], r["text"]), "text": r["text"], "author": r["author"]}
+            for r in connector.LLM_get_tweets_by_topic(topic)
+        ]
+        if not rows:
+            return {"index": None, "rows": [], "fingerprint": fingerprint, "checked_at": time.monotonic()}
+
+        vectors = [None] * len(rows)
+        if previous and previous.get("index") is not None:
+            known = {}
+            for i, row in enumerate(previous["rows"]):
+                known.setdefault(row["text"], i)
+            for i, row in enumerate(rows):
+                if row["text"] in known:
+                    vectors[i] = previous["index"].reconstruct(known[row["text"]])
+        reused = sum(v is not None for v in vectors)
+
+        stored = 0
+        if self.store is not None:
+            pending = [i for i, v in enumerate(vectors) if v is None]
+            found_vectors, found = self.store.get([rows[i]["id"] for i in pending], model=self.encoder_id)
+            for vector, pos in zip(found_vectors, found):
+                vectors[pending[pos]] = vector
+            stored = len(found)
+
+        missing = [i for i, v in enumerate(vectors) if v is None]
+        if missing:
+            encoded = self.encode([rows[i]["text"] for i in missing])
+            for i, vector in zip(missing, encoded):
+                vectors[i] = vector
+
+        vectors = np.vstack(vectors).astype(np.float32)
+        index = faiss.IndexFlatL2(vectors.shape[1])
+        index.add(vectors)
+        logger.info(f"Built index for topic '{topic}': {len(rows)} tweets ({len(missing)} encoded, {reused} reused, {stored} from store)")
+        return {"index": index, "rows": rows, "fingerprint": fingerprint, "checked_at": time.monotonic()}
+
+    def get(self, topic: str, connector):
+        """
+        Return the index and row metadata for a topic, building or refreshing it when needed.
+
+        Args:
+            topic (str): The topic whose tweets should be indexed.
+            connector: Neo4j connector used to fetch the topic tweets and fingerprint.
+
+        Returns:
+            tuple: (faiss.Index or None, list of {"id", "text", "author"} rows aligned with the index)
+        """
+        with self._topic_lock(topic):
+            entry = self._entries.get(topic)
+            if entry is None:
+                entry = self._load_from_disk(topic)
+
+            now = time.monotonic()
+            if entry is not None and now - entry["checked_at"] < self.check_interval:
+                self._entries[topic] = entry
+                return entry["index"], entry["rows"]
+
+            fingerprint = connector.LLM_get_topic_fingerprint(topic)
+            if entry is None or entry["fingerprint"] != fingerprint:
+                entry = self._build(topic, connector, fingerprint, previous=entry)
+                if entry["index"] is not None:
+                    self._save_to_disk(topic, entry)
+            else:
+                entry["checked_at"] = now
+
+            self._entries[topic] = entry
+            return entry["index"], entry["rows"]
+
+    def warm(self, topics, connector):
+        """
+        Build (or load) the indexes for several topics up front.
+        """
+        for topic in topics:
+            try:
+                self.get(topic, connector)
+            except Exception as e:
+                logger.warning(f"Could not warm index for topic '{topic}': {e}")
+
+    def invalidate(self, topic: str = None):
+        """
+        Force the next `get` to re-check the Neo4j fingerprint for one topic (or all topics).
+        """
+        with self._guard:
+            topics = [topic] if topic is not None else list(self._entries)
+        for t in topics:
+            entry = self._entries.get(t)
+            if entry is not None:
+                entry["checked_at"] = 0.0
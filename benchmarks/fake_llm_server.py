@@ -0,0 +1,87 @@
+"""
+Fake OpenAI-compatible LLM server for benchmarks.
+
+Serves `POST /v1/chat/completions` with streamed (SSE) chunks at a configurable time to
+first token and token rate, so the backend can be load-tested without LM Studio and with
+a reproducible LLM cost.
+
+Usage:
+    python fake_llm_server.py --port 1235 --ttft-ms 300 --tokens-per-second 40
+then point the backend at it with LLM_BASE_URL=http://127.0.0.1:1235/v1
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+import uuid
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+WORDS = (
+    "Based on the style and topic this tweet was most likely written by Obama because the "
+    "wording focuses on families communities and progress while Musk usually writes short "
+    "technical or playful remarks about rockets cars and engineering"
+).split()
+
+app = FastAPI()
+settings = {"ttft_ms": 300.0, "tokens_per_second": 40.0, "max_tokens": 200}
+
+
+def _chunk(completion_id: str, model: str, delta: dict, finish_reason=None) -> str:
+    payload = {
+        "id": completion_id,
+        "object": "chat.completion.chunk",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+    }
+    return f"data: {json.dumps(payload)}\n\n"
+
+
+@app.get("/v1/models")
+async def list_models():
+    return {"object": "list", "data": [{"id": "fake-model", "object": "model"}]}
+
+
+@app.post("/v1/chat/completions")
+async def chat_completions(request: Request):
+    body = await request.json()
+    model = body.get("model", "fake-model")
+    n_tokens = min(int(body.get("max_tokens") or settings["max_tokens"]), settings["max_tokens"])
+    completion_id = "chatcmpl-" + uuid.uuid4().hex
+    rng = random.Random(completion_id)
+    tokens = [rng.choice(WORDS) + " " for _ in range(n_tokens)]
+
+    if not body.get("stream"):
+        await asyncio.sleep(settings["ttft_ms"] / 1000 + n_tokens / settings["tokens_per_second"])
+        return JSONResponse({
+            "id": completion_id, "object": "chat.completion", "created": int(time.time()), "model": model,
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": "".join(tokens)}, "finish_reason": "stop"}],
+        })
+
+    async def stream():
+        await asyncio.sleep(settings["ttft_ms"] / 1000)
+        yield _chunk(completion_id, model, {"role": "assistant", "content": ""})
+        for token in tokens:
+            yield _chunk(completion_id, model, {"content": token})
+            await asyncio.sleep(1 / settings["tokens_per_second"])
+        yield _chunk(completion_id, model, {}, finish_reason="stop")
+        yield "data: [DONE]\n\n"
+
+    return StreamingResponse(stream(), media_type="text/event-stream")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fake OpenAI-compatible streaming LLM server.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=1235)
+    parser.add_argument("--ttft-ms", type=float, default=300.0, help="Delay before the first token")
+    parser.add_argument("--tokens-per-second", type=float, default=40.0)
+    parser.add_argument("--max-tokens", type=int, default=200, help="Upper bound of tokens per completion")
+    args = parser.parse_args()
+
+    settings.update(ttft_ms=args.ttft_ms, tokens_per_second=args.tokens_per_second, max_tokens=args.max_tokens)
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
@@ -0,0 +1,300 @@
+"""
+End-to-end load benchmark of the backend.
+
+Starts the fake LLM server and the backend (by default on the in-memory connector seeded
+from utils/dataset.csv, so no Neo4j is needed), waits until the models are loaded, then
+drives a concurrent mix of /analyze, /generate_tweet and analytics requests for a fixed
+duration. Reports per request kind p50/p95/p99 latency, time to first NDJSON chunk,
+throughput and errors, plus the peak RSS of the backend, and writes everything (with the
+git commit) to a JSON file so runs can be compared across commits.
+
+Usage (from the repository root):
+    python benchmarks/run_benchmark.py --duration 60 --concurrency 16 \\
+        --mix analyze=1,generate=1,analytics=4 --output benchmarks/results/run.json
+    python benchmarks/run_benchmark.py ... --compare benchmarks/results/baseline.json
+
+With --connector neo4j the backend uses the database from the NEO4J_* variables (load it
+first with `python backend/load_dataset.py`).
+"""
+import argparse
+import asyncio
+import csv
+import json
+import math
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+
+import httpx
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BACKEND_DIR = os.path.join(ROOT, "backend")
+DEFAULT_DATASET = os.path.join(ROOT, "utils", "dataset.csv")
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def percentile(values: list, q: float):
+    """
+    Nearest-rank percentile (None for an empty list).
+    """
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(q / 100 * len(ordered)) - 1)]
+
+
+def peak_rss_mb(pid: int):
+    """
+    Peak resident set size of a process (VmHWM, Linux only).
+    """
+    try:
+        with open(f"/proc/{pid}/status", encoding="utf-8") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"], cwd=ROOT, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def load_workload(path: str) -> dict:
+    """
+    Tweets, authors, topics and years of the dataset used to build the requests.
+    """
+    tweets, pairs, years = [], set(), set()
+    with open(path, newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            if row.get("Text"):
+                tweets.append(row["Text"])
+            if row.get("Author") and row.get("topic"):
+                pairs.add((row["Author"], row["topic"]))
+            if len(row.get("Date") or "") >= 4:
+                years.add(row["Date"][:4])
+    return {"tweets": tweets, "pairs": sorted(pairs), "years": sorted(years)}
+
+
+def parse_mix(text: str) -> dict:
+    mix = {}
+    for part in text.split(","):
+        kind, _, weight = part.partition("=")
+        if kind not in ("analyze", "generate", "analytics"):
+            raise argparse.ArgumentTypeError(f"unknown request kind: {kind}")
+        mix[kind] = float(weight or 1)
+    return mix
+
+
+def analytics_request(rng: random.Random, workload: dict) -> tuple:
+    author, topic = rng.choice(workload["pairs"])
+    return rng.choice([
+        ("/analytics/topics", {"author": author}),
+        ("/analytics/years", {"author": rng.choice([author, "All"])}),
+        ("/analytics/likes-by-year", {"topic": topic, "author": author}),
+        ("/topic-trend-by-year", {"year": rng.choice(workload["years"]), "author": rng.choice([author, "All"])}),
+        ("/top-tweets", {"metric": rng.choice(["likes", "retweets"]), "limit": 5, "author": author}),
+        ("/analytics/sentiment-by-topic", {}),
+        ("/sentiment-per-year", {"author": author}),
+    ])
+
+
+async def timed_stream(client: httpx.AsyncClient, method: str, url: str, **kwargs) -> dict:
+    """
+    Send one request, reading the body line by line to time the first NDJSON chunk.
+    """
+    start = time.perf_counter()
+    first_chunk = None
+    size = 0
+    async with client.stream(method, url, **kwargs) as response:
+        async for line in response.aiter_lines():
+            if line and first_chunk is None:
+                first_chunk = time.perf_counter() - start
+            size += len(line)
+        status = response.status_code
+    return {"latency": time.perf_counter() - start, "first_chunk": first_chunk, "status": status, "bytes": size}
+
+
+async def worker(client: httpx.AsyncClient, rng: random.Random, workload: dict, mix: dict, deadline: float, records: list,
+                 stream_format: str = "cumulative"):
+    kinds, weights = list(mix), list(mix.values())
+    stream_params = {"stream": "delta"} if stream_format == "delta" else {}
+    while time.perf_counter() < deadline:
+        kind = rng.choices(kinds, weights)[0]
+        if kind == "analyze":
+            args = ("POST", "/analyze"), {"json": {"tweet": rng.choice(workload["tweets"])}, "params": stream_params}
+        elif kind == "generate":
+            author, topic = rng.choice(workload["pairs"])
+            args = ("POST", "/generate_tweet"), {"json": {"author": author, "topic": topic}, "params": stream_params}
+        else:
+            path, params = analytics_request(rng, workload)
+            args = ("GET", path), {"params": params}
+        try:
+            record = await timed_stream(client, *args[0], **args[1])
+            record["error"] = record["status"] >= 400
+        except httpx.HTTPError as e:
+            record = {"latency": None, "first_chunk": None, "status": None, "bytes": 0, "error": True, "exception": repr(e)}
+        record["kind"] = kind
+        records.append(record)
+
+
+def summarize(records: list, duration: float) -> dict:
+    def ms(values):
+        return {f"p{q}": round(percentile(values, q) * 1000, 2) if values else None for q in (50, 95, 99)}
+
+    results = {}
+    for kind in sorted({r["kind"] for r in records}):
+        rows = [r for r in records if r["kind"] == kind]
+        ok = [r for r in rows if not r["error"]]
+        results[kind] = {
+            "requests": len(rows),
+            "errors": len(rows) - len(ok),
+            "throughput_rps": round(len(ok) / duration, 3),
+            "latency_ms": ms([r["latency"] for r in ok]),
+            "first_chunk_ms": ms([r["first_chunk"] for r in ok if r["first_chunk"] is not None]),
+        }
+    ok = [r for r in records if not r["error"]]
+    results["all"] = {
+        "requests": len(records),
+        "errors": len(records) - len(ok),
+        "throughput_rps": round(len(ok) / duration, 3),
+        "latency_ms": ms([r["latency"] for r in ok]),
+    }
+    return results
+
+
+async def wait_ready(base_url: str, process: subprocess.Popen, timeout: float):
+    """
+    Poll /ready until the models are loaded.
+    """
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient(base_url=base_url, timeout=5) as client:
+        while time.monotonic() < deadline:
+            if process.poll() is not None:
+                raise SystemExit(f"Backend exited with code {process.returncode}")
+            try:
+                if (await client.get("/ready")).status_code == 200:
+                    return
+            except httpx.HTTPError:
+                pass
+            await asyncio.sleep(1)
+    raise SystemExit(f"Backend not ready after {timeout:.0f}s")
+
+
+async def run(args, base_url: str, workload: dict, backend: subprocess.Popen) -> dict:
+    await wait_ready(base_url, backend, args.ready_timeout)
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=base_url, timeout=args.request_timeout, limits=limits) as client:
+        if args.warmup > 0:
+            print(f"[BENCH] Warm-up for {args.warmup:.0f}s")
+            deadline = time.perf_counter() + args.warmup
+            await asyncio.gather(*[
+                worker(client, random.Random(args.seed - i - 1), workload, args.mix, deadline, [], args.stream_format)
+                for i in range(args.concurrency)
+            ])
+        print(f"[BENCH] Measuring for {args.duration:.0f}s at concurrency {args.concurrency}")
+        records = []
+        start = time.perf_counter()
+        deadline = start + args.duration
+        await asyncio.gather(*[
+            worker(client, random.Random(args.seed + i), workload, args.mix, deadline, records, args.stream_format)
+            for i in range(args.concurrency)
+        ])
+        elapsed = time.perf_counter() - start
+    return {"elapsed_s": round(elapsed, 3), "results": summarize(records, elapsed)}
+
+
+def compare(current: dict, baseline_path: str):
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = json.load(f)
+    print(f"\nComparison with {baseline_path} (commit {baseline.get('commit')}):")
+    for kind, stats in current["results"].items():
+        before = baseline.get("results", {}).get(kind)
+        if not before:
+            continue
+        for metric in ("latency_ms", "first_chunk_ms"):
+            for q, value in (stats.get(metric) or {}).items():
+                old = (before.get(metric) or {}).get(q)
+                if value is not None and old:
+                    print(f"  {kind:10s} {metric:15s} {q}: {old:10.1f} -> {value:10.1f} ({(value - old) / old:+.1%})")
+        print(f"  {kind:10s} throughput_rps     : {before['throughput_rps']:10.2f} -> {stats['throughput_rps']:10.2f}")
+    if baseline.get("peak_rss_mb") and current.get("peak_rss_mb"):
+        print(f"  peak RSS MB: {baseline['peak_rss_mb']:.0f} -> {current['peak_rss_mb']:.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load benchmark of the tweet analysis backend.")
+    parser.add_argument("--duration", type=float, default=60, help="Measured seconds")
+    parser.add_argument("--warmup", type=float, default=10, help="Unmeasured seconds before measuring")
+    parser.add_argument("--concurrency", type=int, default=8, help="Concurrent clients")
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix("analyze=1,generate=1,analytics=4"),
+                        help="Request kind weights, e.g. analyze=1,generate=1,analytics=4")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--stream-format", choices=["cumulative", "delta"], default="cumulative",
+                        help="NDJSON format requested from /analyze and /generate_tweet")
+    parser.add_argument("--dataset", default=DEFAULT_DATASET, help="Dataset CSV (workload and in-memory connector)")
+    parser.add_argument("--connector", choices=["memory", "neo4j"], default="memory")
+    parser.add_argument("--ttft-ms", type=float, default=300.0, help="Fake LLM time to first token")
+    parser.add_argument("--tokens-per-second", type=float, default=40.0, help="Fake LLM token rate")
+    parser.add_argument("--max-tokens", type=int, default=200, help="Fake LLM tokens per completion")
+    parser.add_argument("--ready-timeout", type=float, default=600, help="Seconds to wait for the models to load")
+    parser.add_argument("--request-timeout", type=float, default=120)
+    parser.add_argument("--output", default=os.path.join(ROOT, "benchmarks", "results", "latest.json"))
+    parser.add_argument("--compare", help="Previous result file to compare with")
+    args = parser.parse_args()
+
+    workload = load_workload(args.dataset)
+    llm_port, backend_port = free_port(), free_port()
+    env = dict(os.environ, LLM_BASE_URL=f"http://127.0.0.1:{llm_port}/v1")
+    if args.connector == "memory":
+        env.update(CONNECTOR_BACKEND="memory", MEMORY_DATASET=os.path.abspath(args.dataset))
+
+    llm = subprocess.Popen([
+        sys.executable, os.path.join(ROOT, "benchmarks", "fake_llm_server.py"), "--port", str(llm_port),
+        "--ttft-ms", str(args.ttft_ms), "--tokens-per-second", str(args.tokens_per_second), "--max-tokens", str(args.max_tokens),
+    ])
+    backend = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(backend_port), "--log-level", "warning"],
+        cwd=BACKEND_DIR, env=env,
+    )
+    try:
+        report = asyncio.run(run(args, f"http://127.0.0.1:{backend_port}", workload, backend))
+        report["peak_rss_mb"] = peak_rss_mb(backend.pid)
+    finally:
+        for process in (backend, llm):
+            process.terminate()
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+
+    report = {
+        "commit": git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "config": {k: v for k, v in vars(args).items() if k not in ("output", "compare")},
+        **report,
+    }
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+
+    print(json.dumps(report["results"], indent=2))
+    print(f"[BENCH] Peak RSS: {report['peak_rss_mb']} MB, results written to {args.output}")
+    if args.compare:
+        compare(report, args.compare)
+
+
+if __name__ == "__main__":
+    main()
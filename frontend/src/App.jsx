@@ -29,7 +29,8 @@ const App = () => {
     setCurrentExplanation(''); // Reset streaming explanation
 
     try {
-      const res = await fetch('http://localhost:8000/analyze', {
+      // Delta frames: only the new text of each token, plus a final summary frame
+      const res = await fetch('http://localhost:8000/analyze?stream=delta', {
         method: 'POST',
         headers: { 'Content-Type': 'application/json' },
         body: JSON.stringify({ tweet })
@@ -39,8 +40,23 @@ const App = () => {
       const reader = res.body.getReader();
       const decoder = new TextDecoder();
       let accumulatedResponse = {}; // Save the final response
+      let explanation = ''; // Text accumulated from the delta frames
       let buffer = '';
 
+      const handleFrame = (data) => {
+        if (data.queued) {
+          setCurrentExplanation(`Waiting for the language model (position ${data.queue_position} in the queue)...`);
+        }
+        if (data.delta !== undefined) {
+          explanation += data.delta;
+          setCurrentExplanation(explanation);
+        }
+        if (!data.streaming) {
+          accumulatedResponse = data; // Final JSON response (summary, or an error without streaming)
+          setCurrentExplanation(data.explanation);
+        }
+      };
+
       while (true) {
         const { value, done } = await reader.read();
         if (done) break;
@@ -54,14 +70,7 @@ const App = () => {
         for (const line of lines) {
           if (line.trim() === '') continue; 
           try {
-            const data = JSON.parse(line);
-            
-            setCurrentExplanation(data.explanation);
-
-            if (!data.streaming) { 
-                accumulatedResponse = data; // Final JSON response
-            }
-
+            handleFrame(JSON.parse(line));
           } catch (jsonError) {
             console.error('Error parsing JSON chunk:', jsonError, line);
             setCurrentExplanation(prev => prev + `\nError processing data: ${jsonError.message}`);
@@ -69,6 +78,11 @@ const App = () => {
         }
       }
 
+      // Non-streamed error responses (e.g. 503 while the models load, 429 when the LLM queue is full) have no trailing newline
+      if (buffer.trim() !== '') {
+        handleFrame(JSON.parse(buffer));
+      }
+
       setResponse(accumulatedResponse); // Set the final response after streaming completes
       
     } catch (error) {
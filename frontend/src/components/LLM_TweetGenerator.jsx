@@ -41,7 +41,8 @@ const LLM_TweetGenerator = () => {
     setErrorGeneration(null);
 
     try {
-      const res = await fetch('http://localhost:8000/generate_tweet', {
+      // Delta frames: only the new text of each token, the final frame carries the cleaned-up tweet
+      const res = await fetch('http://localhost:8000/generate_tweet?stream=delta', {
         method: 'POST',
         headers: { 'Content-Type': 'application/json' },
         body: JSON.stringify({ author: selectedAuthor, topic: selectedTopic })
@@ -54,6 +55,7 @@ const LLM_TweetGenerator = () => {
       const reader = res.body.getReader();
       const decoder = new TextDecoder();
       let buffer = '';
+      let tweetText = '';
 
       while (true) {
         const { value, done } = await reader.read();
@@ -67,7 +69,14 @@ const LLM_TweetGenerator = () => {
           if (line.trim() === '') continue;
           try {
             const data = JSON.parse(line);
-            if (data.generated_tweet) {
+            if (data.queued) {
+              setGeneratedTweet(`Waiting for the language model (position ${data.queue_position} in the queue)...`);
+            }
+            if (data.delta) {
+              tweetText += data.delta;
+              setGeneratedTweet(tweetText);
+            }
+            if (!data.streaming && data.generated_tweet !== undefined) {
               setGeneratedTweet(data.generated_tweet);
             }
             if (data.error) { // Handle errors from backend stream
@@ -0,0 +1,237 @@
+"""
+Streaming preprocessing pipeline: raw tweets CSV -> dataset.csv format expected by the graph loader.
+
+Command-line version of `preprocessing.ipynb`. The input is read in chunks and every
+stage writes one checkpoint file per chunk in the work directory, so an interrupted run
+resumes where it stopped and corpora larger than RAM can be processed.
+
+Stages:
+    1. ner        NER with `nlp.pipe` over several worker processes (filtered entities)
+    2. classify   batched zero-shot topic classification (text + entities)
+    3. filter     per-topic median confidence threshold (capped at 0.6), computed over all chunks
+    4. sentiment  batched sentiment analysis (text + entities)
+    5. output     concatenation into the final CSV
+
+Usage:
+    python pipeline.py ds_obama.csv dataset_obama.csv --author Obama \\
+        --text-column Tweet-text --sep ";" --workdir work_obama --ner-processes 4
+"""
+import argparse
+import ast
+import glob
+import json
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+CANDIDATE_LABELS = ["politics", "family", "USA", "climate change", "health", "business", "finance"]
+ENTITIES_TO_REMOVE = ["ORDINAL", "DATE", "CARDINAL", "MONEY", "TIME", "PERCENT"]
+SENTIMENT_MODEL = "cardiffnlp/twitter-roberta-base-sentiment"
+SENTIMENT_LABELS = {"LABEL_0": "negative", "LABEL_1": "neutral", "LABEL_2": "positive"}
+OUTPUT_COLUMNS = ["Date", "Text", "Retweets", "Likes", "entities", "topic", "confidence", "sentiment", "sentiment_confidence", "Author"]
+
+
+def entities_to_string(entities):
+    return " ".join(ent for ent, _ in entities)
+
+
+def chunk_path(workdir: str, stage: str, index: int) -> str:
+    return os.path.join(workdir, stage, f"chunk_{index:05d}.csv")
+
+
+def write_chunk(df: pd.DataFrame, path: str):
+    """
+    Write a stage output atomically, so a partially written chunk is never taken as done.
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    df.to_csv(path + ".tmp", index=False)
+    os.replace(path + ".tmp", path)
+
+
+def stage_chunks(workdir: str, stage: str) -> list:
+    return sorted(glob.glob(os.path.join(workdir, stage, "chunk_*.csv")))
+
+
+def check_manifest(args):
+    """
+    Record the run parameters in the work directory and refuse to resume with different ones.
+    """
+    os.makedirs(args.workdir, exist_ok=True)
+    manifest = {"input": os.path.abspath(args.input), "chunk_size": args.chunk_size, "text_column": args.text_column}
+    path = os.path.join(args.workdir, "manifest.json")
+    if os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            saved = json.load(f)
+        if saved != manifest:
+            raise SystemExit(f"Work directory {args.workdir} belongs to another run: {saved}")
+    else:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f)
+
+
+def run_ner(args):
+    import spacy
+
+    nlp = None
+    reader = pd.read_csv(args.input, sep=args.sep, engine="python", quotechar='"', encoding="utf-8",
+                         on_bad_lines="skip", chunksize=args.chunk_size)
+    for index, chunk in enumerate(reader):
+        path = chunk_path(args.workdir, "ner", index)
+        if os.path.exists(path):
+            continue
+        if nlp is None:
+            nlp = spacy.load(args.spacy_model)
+        chunk = chunk.dropna(subset=[args.text_column])
+        texts = chunk[args.text_column].astype(str).tolist()
+        docs = nlp.pipe(texts, batch_size=args.batch_size, n_process=args.ner_processes)
+        chunk["entities"] = [
+            str([[ent.text, ent.label_] for ent in doc.ents if ent.label_ not in ENTITIES_TO_REMOVE]) for doc in docs
+        ]
+        write_chunk(chunk, path)
+        print(f"[NER] chunk {index}: {len(chunk)} tweets")
+
+
+def load_zero_shot(args):
+    if args.inference_backend == "onnx":
+        # Quantized model exported by backend/export_onnx.py
+        sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend"))
+        from services.onnx_backend import OnnxZeroShotClassifier, onnx_model_dir
+        return OnnxZeroShotClassifier(args.onnx_dir or onnx_model_dir("zero_shot"), intra_op_threads=args.onnx_threads)
+    from transformers import pipeline
+    return pipeline("zero-shot-classification", model=args.zero_shot_model, device=args.device)
+
+
+def run_classify(args):
+    classifier = None
+    for path in stage_chunks(args.workdir, "ner"):
+        out = path.replace(os.sep + "ner" + os.sep, os.sep + "classify" + os.sep)
+        if os.path.exists(out):
+            continue
+        classifier = classifier or load_zero_shot(args)
+        chunk = pd.read_csv(path)
+        inputs = []
+        for text, entities in zip(chunk[args.text_column].astype(str), chunk["entities"]):
+            ent_str = entities_to_string(ast.literal_eval(entities))
+            inputs.append(f"{text} - {ent_str}" if ent_str.strip() else text)
+        results = classifier(inputs, CANDIDATE_LABELS, multi_label=False, batch_size=args.batch_size)
+        if isinstance(results, dict):
+            results = [results]
+        chunk["topic"] = [r["labels"][0] for r in results]
+        chunk["confidence"] = [r["scores"][0] for r in results]
+        write_chunk(chunk, out)
+        print(f"[CLASSIFY] {os.path.basename(path)}: {len(chunk)} tweets")
+
+
+def compute_thresholds(args) -> dict:
+    """
+    Per-topic median confidence (capped at 0.6) over every classified chunk.
+    Only the topic and confidence columns are read, one chunk at a time.
+    """
+    path = os.path.join(args.workdir, "thresholds.json")
+    if os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+
+    confidences = {}
+    for chunk_file in stage_chunks(args.workdir, "classify"):
+        chunk = pd.read_csv(chunk_file, usecols=["topic", "confidence"])
+        for topic, group in chunk.groupby("topic"):
+            confidences.setdefault(topic, []).append(group["confidence"].to_numpy(dtype=np.float32))
+    thresholds = {topic: min(float(np.median(np.concatenate(parts))), args.max_threshold) for topic, parts in confidences.items()}
+
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(thresholds, f)
+    print(f"[FILTER] thresholds: {thresholds}")
+    return thresholds
+
+
+def load_sentiment(args):
+    from transformers import pipeline, AutoTokenizer, AutoModelForSequenceClassification
+
+    tokenizer = AutoTokenizer.from_pretrained(SENTIMENT_MODEL)
+    model = AutoModelForSequenceClassification.from_pretrained(SENTIMENT_MODEL)
+    return pipeline("sentiment-analysis", model=model, tokenizer=tokenizer, truncation=True, padding=True,
+                    max_length=512, device=args.device)
+
+
+def run_filter_and_sentiment(args, thresholds: dict):
+    classifier = None
+    for path in stage_chunks(args.workdir, "classify"):
+        out = path.replace(os.sep + "classify" + os.sep, os.sep + "sentiment" + os.sep)
+        if os.path.exists(out):
+            continue
+        chunk = pd.read_csv(path)
+        chunk = chunk[chunk["confidence"] >= chunk["topic"].map(thresholds).fillna(1)]
+        if len(chunk):
+            classifier = classifier or load_sentiment(args)
+            texts = []
+            for text, entities in zip(chunk[args.text_column].astype(str), chunk["entities"]):
+                ent_str = entities_to_string(ast.literal_eval(entities))
+                texts.append(f"{text} [Entities: {ent_str}]" if ent_str else text)
+            results = classifier(texts, batch_size=args.batch_size)
+            chunk = chunk.assign(
+                sentiment=[SENTIMENT_LABELS.get(r["label"], r["label"]).lower() for r in results],
+                sentiment_confidence=[r["score"] for r in results],
+            )
+        else:
+            chunk = chunk.assign(sentiment=[], sentiment_confidence=[])
+        write_chunk(chunk, out)
+        print(f"[SENTIMENT] {os.path.basename(path)}: {len(chunk)} tweets kept")
+
+
+def write_output(args):
+    """
+    Concatenate the final chunks into the dataset.csv format (streamed, chunk by chunk).
+    """
+    columns = {args.text_column: "Text", args.date_column: "Date", args.retweets_column: "Retweets", args.likes_column: "Likes"}
+    total = 0
+    with open(args.output + ".tmp", "w", encoding="utf-8", newline="") as f:
+        for i, path in enumerate(stage_chunks(args.workdir, "sentiment")):
+            chunk = pd.read_csv(path).rename(columns=columns)
+            if args.author_column:
+                chunk["Author"] = chunk[args.author_column]
+            else:
+                chunk["Author"] = args.author
+            for column in OUTPUT_COLUMNS:
+                if column not in chunk:
+                    chunk[column] = None
+            chunk[OUTPUT_COLUMNS].to_csv(f, index=False, header=(i == 0))
+            total += len(chunk)
+    os.replace(args.output + ".tmp", args.output)
+    print(f"[OUTPUT] {total} tweets written to {args.output}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Chunked, resumable tweet preprocessing pipeline.")
+    parser.add_argument("input", help="Raw tweets CSV")
+    parser.add_argument("output", help="Output CSV in the utils/dataset.csv format")
+    parser.add_argument("--workdir", default="preprocessing_work", help="Checkpoint directory")
+    parser.add_argument("--sep", default=",")
+    parser.add_argument("--chunk-size", type=int, default=5000)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--ner-processes", type=int, default=1, help="spaCy worker processes")
+    parser.add_argument("--device", type=int, default=-1, help="Transformers device (-1 = CPU, 0 = first GPU)")
+    parser.add_argument("--max-threshold", type=float, default=0.6, help="Cap of the per-topic median threshold")
+    parser.add_argument("--spacy-model", default="en_core_web_trf")
+    parser.add_argument("--zero-shot-model", default="facebook/bart-large-mnli")
+    parser.add_argument("--inference-backend", choices=["torch", "onnx"], default="torch",
+                        help="Zero-shot classifier runtime (onnx: int8 model from backend/export_onnx.py)")
+    parser.add_argument("--onnx-dir", help="Exported zero-shot model directory (default: ONNX_MODEL_DIR/zero_shot)")
+    parser.add_argument("--onnx-threads", type=int, default=0, help="ONNX Runtime intra-op threads (0 = all cores)")
+    parser.add_argument("--text-column", default="Text")
+    parser.add_argument("--date-column", default="Date")
+    parser.add_argument("--retweets-column", default="Retweets")
+    parser.add_argument("--likes-column", default="Likes")
+    author = parser.add_mutually_exclusive_group(required=True)
+    author.add_argument("--author", help="Author of every tweet of the input")
+    author.add_argument("--author-column", help="Column holding the author")
+    args = parser.parse_args()
+
+    check_manifest(args)
+    run_ner(args)
+    run_classify(args)
+    thresholds = compute_thresholds(args)
+    run_filter_and_sentiment(args, thresholds)
+    write_output(args)